@@ -1,23 +1,39 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+import asyncio
 import atexit
+import gzip
+import hashlib
 import json
 import logging
 import os
-from queue import Queue, Empty
 import random
 import re
 import signal
+import socket
+import sqlite3
 import threading
 import time
 import uuid
+from contextlib import contextmanager
 from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
 
 from selenium.common.exceptions import TimeoutException
 
 from dotenv import load_dotenv
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, render_template, request
 from flask_sqlalchemy import SQLAlchemy
 from seleniumbase import SB
+from sqlalchemy import bindparam, event, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+import capture
+import crawl_engine
+from chapters import parse_fenrir_chapter_html, parse_fenrir_href, parse_vol_ch
+import metrics
+import nu_crawler
+import nu_session
 
 # ------------------ SETUP ------------------
 
@@ -29,11 +45,102 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///novels.db"
+app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv(
+    "DATABASE_URL", "sqlite:///replay.db" if nu_session.REPLAY else "sqlite:///novels.db"
+)
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+    # Request threads, refresh threads and the sync task all share the file.
+    # check_same_thread is off because the pool hands connections across threads;
+    # the 30s timeout is the driver-level busy wait on a locked database.
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "connect_args": {"timeout": 30, "check_same_thread": False},
+        "pool_size": 10,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+    }
 db = SQLAlchemy(app)
+if nu_session.REPLAY:
+    logger.warning(
+        "🧪 Replay mode (site base URL overridden): database %s, NU session %s, profiles %s",
+        app.config["SQLALCHEMY_DATABASE_URI"], nu_session.SESSION_FILE, nu_session.PROFILE_ROOT,
+    )
+
+
+@event.listens_for(Engine, "connect")
+def _sqlite_pragmas(dbapi_conn, _record):
+    """WAL lets readers run alongside the single writer; NORMAL sync is safe under WAL."""
+    if not isinstance(dbapi_conn, sqlite3.Connection):
+        return
+    cur = dbapi_conn.cursor()
+    try:
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute("PRAGMA busy_timeout=30000")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.execute("PRAGMA cache_size=-16000")
+    finally:
+        cur.close()
+
+
+# SQLite allows one writer at a time. Write units that run DML (session.execute
+# of INSERT/UPDATE/DELETE) hold this lock from their first statement to the
+# commit via db_write(), so threads in this process queue on it instead of
+# racing each other into "database is locked". ORM-only changes are flushed by
+# the commit itself, so db_commit() alone covers them. Other processes still
+# rely on the busy timeout.
+_DB_WRITE_LOCK = threading.RLock()
+
+
+def db_commit(session=None):
+    """Flush and commit the (scoped) session under the process-wide write lock."""
+    session = session or db.session
+    with _DB_WRITE_LOCK:
+        try:
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
 
-submission_queue = Queue()
+
+@contextmanager
+def db_write(session=None):
+    """
+    Hold the write lock for a whole write unit: its DML and the commit.
+
+        with db_write():
+            db.session.execute(db.update(...))
+    """
+    session = session or db.session
+    with _DB_WRITE_LOCK:
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+# Set whenever submissions are queued so the worker wakes without polling delay.
+submission_wakeup = threading.Event()
+
+# Site roots. Point these at a local stand-in (see replay_server.py) to run
+# crawls, sync and submissions offline.
+NU_BASE_URL = nu_session.NU_BASE_URL
+FENRIR_BASE_URL = os.getenv("FENRIR_BASE_URL", nu_session.DEFAULT_FENRIR_BASE_URL).rstrip("/")
+_DEFAULT_HOSTS = {"nu": "www.novelupdates.com", "fenrir": "fenrirealm.com"}
+
+
+def rebase_url(url, site):
+    """Rewrite a stored NU/Fenrir URL onto the configured base URL for that site."""
+    base = NU_BASE_URL if site == "nu" else FENRIR_BASE_URL
+    if not url:
+        return url
+    p = urlparse(url)
+    host = (p.netloc or "").lower()
+    if host.removeprefix("www.") != _DEFAULT_HOSTS[site].removeprefix("www."):
+        return url
+    b = urlparse(base)
+    return urlunparse((b.scheme, b.netloc, p.path, p.params, p.query, p.fragment))
 
 _LAST_LIVESEARCH_TS = 0.0
 
@@ -49,14 +156,230 @@ def _throttle_livesearch(min_interval_seconds=2.0):
 
 TASKS = {}
 
+# ------------------ METRICS ------------------
+
+PAGE_OPEN_SECONDS = metrics.Histogram(
+    "tracker_page_open_seconds", "fast_open navigation time", ["site"]
+)
+PAGE_OPEN_TIMEOUTS = metrics.Counter(
+    "tracker_page_open_timeouts_total", "fast_open navigations cut off by the load timeout", ["site"]
+)
+CRAWL_PHASE_SECONDS = metrics.Histogram(
+    "tracker_crawl_phase_seconds", "Crawl time per phase", ["crawl", "phase"]
+)
+CRAWL_CHAPTERS = metrics.Histogram(
+    "tracker_crawl_chapters",
+    "Chapters found per crawl",
+    ["crawl"],
+    buckets=(0, 10, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+NU_STRATEGY_SECONDS = metrics.Histogram(
+    "tracker_nu_strategy_seconds", "Time spent per NU chapter strategy", ["strategy"]
+)
+NU_STRATEGY_ATTEMPTS = metrics.Counter(
+    "tracker_nu_strategy_attempts_total",
+    "NU chapter strategy attempts by result (hit = produced chapters)",
+    ["strategy", "result"],
+)
+BROWSER_LAUNCH_SECONDS = metrics.Histogram(
+    "tracker_browser_launch_seconds", "Chrome launch time", ["browser"]
+)
+BROWSER_MEMORY_BYTES = metrics.Gauge(
+    "tracker_browser_memory_bytes", "Resident memory of each browser's process tree", ["browser"]
+)
+BROWSER_LOGIN_SECONDS = metrics.Histogram(
+    "tracker_browser_login_seconds", "NU login time by method", ["browser", "method"]
+)
+SUBMISSION_STEP_SECONDS = metrics.Histogram(
+    "tracker_submission_step_seconds", "Time per submission step", ["step"]
+)
+SUBMISSIONS = metrics.Counter(
+    "tracker_submissions_total", "Submission attempts by outcome", ["result"]
+)
+PAGE_TRANSFER_BYTES = metrics.Histogram(
+    "tracker_page_transfer_bytes",
+    "Bytes transferred per page (document + sub-resources) by blocking profile",
+    ["site", "profile"],
+    buckets=(50e3, 100e3, 250e3, 500e3, 1e6, 2e6, 5e6, 10e6),
+)
+PAGE_REQUESTS = metrics.Histogram(
+    "tracker_page_requests",
+    "Requests per page by blocking profile",
+    ["site", "profile"],
+    buckets=(1, 5, 10, 25, 50, 100, 200, 400),
+)
+PAGE_BLOCKED_REQUESTS = metrics.Counter(
+    "tracker_page_blocked_requests_total",
+    "Sub-resources referenced by the page that the blocking profile kept from loading",
+    ["site", "profile"],
+)
+
+
+def _site_label(url):
+    netloc = (urlparse(url).netloc or "").lower()
+    if "novelupdates" in netloc or netloc == urlparse(NU_BASE_URL).netloc:
+        return "nu"
+    if "fenrirealm" in netloc or netloc == urlparse(FENRIR_BASE_URL).netloc:
+        return "fenrir"
+    return netloc or "unknown"
+
+
+# ------------------ RESOURCE BLOCKING ------------------
+
+_BLOCK_MEDIA = ["*.png", "*.jpg", "*.gif", "*.jpeg", "*.webp", "*.mp4", "*.svg", "*.ico"]
+_BLOCK_FONTS = ["*.woff", "*.woff2", "*.ttf", "*.otf", "*fonts.googleapis.com/*", "*fonts.gstatic.com/*"]
+_BLOCK_CSS = ["*.css", "*.css?*"]
+_BLOCK_ADS = [
+    "*doubleclick.net/*",
+    "*googlesyndication.com/*",
+    "*googleadservices.com/*",
+    "*googletagservices.com/*",
+    "*googletagmanager.com/*",
+    "*google-analytics.com/*",
+    "*analytics.google.com/*",
+    "*adsystem.com/*",
+    "*adservice.google.com/*",
+    "*amazon-adsystem.com/*",
+    "*taboola.com/*",
+    "*outbrain.com/*",
+    "*scorecardresearch.com/*",
+    "*quantserve.com/*",
+    "*zedo.com/*",
+    "*criteo.com/*",
+    "*criteo.net/*",
+    "*adsrvr.org/*",
+    "*pubmatic.com/*",
+    "*openx.net/*",
+    "*rubiconproject.com/*",
+    "*yieldmo.com/*",
+    "*moatads.com/*",
+    "*serving-sys.com/*",
+    "*adnxs.com/*",
+    "*facebook.net/*",
+    "*connect.facebook.net/*",
+    "*hotjar.com/*",
+    "*datadoghq.com/*",
+    "*clarity.ms/*",
+]
+# Third-party widgets NU pages pull in that nothing we scrape depends on.
+_BLOCK_THIRD_PARTY = [
+    "*cloudflareinsights.com/*",
+    "*gravatar.com/*",
+    "*disqus.com/*",
+    "*disquscdn.com/*",
+    "*addthis.com/*",
+    "*sharethis.com/*",
+    "*platform.twitter.com/*",
+    "*pinterest.com/*",
+    "*onesignal.com/*",
+    "*pushnami.com/*",
+    "*recaptcha/api.js*",
+]
+
+# profile -> CDP Network.setBlockedURLs patterns. The page profile is picked per
+# navigation in fast_open. NU series pages only need NU's own scripts (for
+# nd_getchapters / the popup), so styles, fonts and widgets go too; forms and
+# the Fenrir grid keep their CSS because visibility waits and the scrollable
+# grid depend on it. BLOCK_PROFILES_FILE (JSON {name: [patterns]}) overrides.
+BLOCK_PROFILES = {
+    "default": _BLOCK_MEDIA + _BLOCK_ADS,
+    "fenrir": _BLOCK_MEDIA + _BLOCK_ADS + _BLOCK_FONTS,
+    "nu_series": _BLOCK_MEDIA + _BLOCK_ADS + _BLOCK_FONTS + _BLOCK_CSS + _BLOCK_THIRD_PARTY,
+    "nu": _BLOCK_MEDIA + _BLOCK_ADS + _BLOCK_FONTS + _BLOCK_THIRD_PARTY,
+    "off": [],
+}
+
+try:
+    with open(os.getenv("BLOCK_PROFILES_FILE") or "", "r", encoding="utf-8") as _fh:
+        BLOCK_PROFILES.update({k: list(v) for k, v in json.load(_fh).items()})
+except (OSError, ValueError):
+    pass
+
+
+def block_profile_for(url):
+    """Pick the blocking profile for a navigation target."""
+    site = _site_label(url)
+    if site == "fenrir":
+        return "fenrir"
+    if site == "nu":
+        return "nu_series" if urlparse(url).path.startswith("/series/") else "nu"
+    return "default"
+
+
+def _block_patterns_regex(patterns):
+    """CDP wildcard patterns -> one JS regex source, for counting blocked references."""
+    parts = [re.escape(p).replace(r"\*", ".*") for p in patterns]
+    return "^(?:" + "|".join(parts) + ")$" if parts else ""
+
+
+def apply_block_profile(sb, profile):
+    """Switch Network.setBlockedURLs to ``profile``; no-op when it is already active."""
+    if profile not in BLOCK_PROFILES:
+        profile = "default"
+    if getattr(sb, "_block_profile", None) == profile:
+        return
+    try:
+        sb.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCK_PROFILES[profile]})
+        sb._block_profile = profile
+    except Exception as e:
+        logger.warning("⚠️ Could not apply blocking profile %s: %s", profile, e)
+
+
+_PAGE_WEIGHT_JS = """
+var re = arguments[0] ? new RegExp(arguments[0], 'i') : null;
+var out = {requests: 0, bytes: 0, blocked: 0};
+try {
+    var nav = performance.getEntriesByType('navigation')[0];
+    if (nav) { out.requests += 1; out.bytes += nav.transferSize || 0; }
+    performance.getEntriesByType('resource').forEach(function(e) {
+        out.requests += 1;
+        out.bytes += e.transferSize || 0;
+    });
+    if (re) {
+        var seen = {};
+        document.querySelectorAll('img[src], script[src], link[href], iframe[src], source[src]').forEach(function(el) {
+            var u = el.src || el.href;
+            if (u && !seen[u] && re.test(u)) { seen[u] = 1; out.blocked += 1; }
+        });
+    }
+} catch (e) {}
+return out;
+"""
+
+
+def record_page_weight(sb):
+    """Record bytes / requests / blocked references of the page currently loaded."""
+    profile = getattr(sb, "_block_profile", None)
+    if not profile:
+        return None
+    try:
+        url = sb.get_current_url()
+        if not url.startswith("http"):
+            return None
+        weight = sb.execute_script(_PAGE_WEIGHT_JS, _block_patterns_regex(BLOCK_PROFILES.get(profile, [])))
+    except Exception:
+        return None
+    if not weight:
+        return None
+    site = _site_label(url)
+    PAGE_TRANSFER_BYTES.observe(weight.get("bytes") or 0, site=site, profile=profile)
+    PAGE_REQUESTS.observe(weight.get("requests") or 0, site=site, profile=profile)
+    PAGE_BLOCKED_REQUESTS.inc(weight.get("blocked") or 0, site=site, profile=profile)
+    return weight
+
+
 # ------------------ DATABASE ------------------
 
 
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
 class Novel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     fenrir_url = db.Column(db.String(500), nullable=False)
-    nu_url = db.Column(db.String(500), nullable=False)
+    nu_url = db.Column(db.String(500), nullable=False, unique=True, index=True)
     group_name = db.Column(db.String(100), default="Fenrir Realm")
     nu_series_id = db.Column(db.String(32))
     nu_group_id = db.Column(db.String(32))
@@ -66,6 +389,24 @@ class Novel(db.Model):
     last_checked = db.Column(db.DateTime)
     # 'active' | 'missing' — missing means no Fenrir page found (DMCA / not yet published)
     status = db.Column(db.String(20), default="active")
+    # Denormalized len(compute_missing()) so the list can filter/sort without JSON decoding.
+    missing_count = db.Column(db.Integer, default=0)
+    # Bumped on every write; drives list ETags and the ?since= delta mode.
+    updated_at = db.Column(db.DateTime, default=_utcnow, onupdate=_utcnow)
+    # Refresh lease held by a worker node (worker.py node); free once expired.
+    lease_owner = db.Column(db.String(120))
+    lease_expires = db.Column(db.DateTime)
+
+    # Declared here so fresh databases get them from create_all(); existing ones
+    # get them from the migrations below (same names, IF NOT EXISTS).
+    __table_args__ = (
+        db.Index("ix_novel_status_name", "status", "name"),
+        db.Index("ix_novel_name", "name"),
+        db.Index("ix_novel_status_last_checked", "status", "last_checked"),
+        db.Index("ix_novel_nu_series_id", "nu_series_id"),
+        db.Index("ix_novel_updated_at", "updated_at"),
+        db.Index("ix_novel_lease_owner", "lease_owner"),
+    )
 
     def to_dict(self):
         return {
@@ -80,35 +421,357 @@ class Novel(db.Model):
             "last_checked": (
                 self.last_checked.isoformat() if self.last_checked else None
             ),
+            "missing_count": self.missing_count or 0,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
 
-with app.app_context():
+class Submission(db.Model):
+    """Persistent NU submission queue: one row per (novel, release) to post."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    novel_id = db.Column(db.Integer, nullable=False)
+    vol = db.Column(db.Integer, nullable=False, default=0)
+    ch = db.Column(db.Integer, nullable=False)
+    # 'queued' | 'in_flight' | 'done' | 'failed'
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    # Rate-limit backoff: not claimable before this time.
+    not_before = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=_utcnow)
+    updated_at = db.Column(db.DateTime, default=_utcnow, onupdate=_utcnow)
+
+    __table_args__ = (
+        db.Index("ix_submission_status_id", "status", "id"),
+        # At most one pending row per release; done/failed rows don't block re-queueing.
+        db.Index(
+            "uq_submission_pending",
+            "novel_id",
+            "vol",
+            "ch",
+            unique=True,
+            sqlite_where=db.text("status IN ('queued', 'in_flight')"),
+        ),
+    )
+
+
+class WorkerNode(db.Model):
+    """A refresh node (one worker.py node process); alive while it heartbeats."""
+
+    id = db.Column(db.String(120), primary_key=True)
+    host = db.Column(db.String(120))
+    pid = db.Column(db.Integer)
+    shard = db.Column(db.String(20))
+    started_at = db.Column(db.DateTime, default=_utcnow)
+    heartbeat_at = db.Column(db.DateTime, default=_utcnow)
+    refreshed = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    # 'alive' | 'stopped' | 'dead'
+    status = db.Column(db.String(20), nullable=False, default="alive")
+
+
+class NuLookup(db.Model):
+    """Cached NU livesearch answers: series / group name -> NU id."""
+
+    __tablename__ = "nu_lookup"
+
+    # 'series' | 'group'
+    kind = db.Column(db.String(10), primary_key=True)
+    # Lowercased, whitespace-collapsed name (see _lookup_key)
+    name_key = db.Column(db.String(200), primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    nu_id = db.Column(db.String(32), nullable=False)
+    # 'livesearch' | 'page' | 'sync'
+    source = db.Column(db.String(20))
+    updated_at = db.Column(db.DateTime, default=_utcnow, onupdate=_utcnow)
+
+
+class Job(db.Model):
+    """Crawl job queue shared by the web process and worker.py processes."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    # 'refresh' | 'sync' | 'backfill'
+    kind = db.Column(db.String(20), nullable=False)
+    novel_id = db.Column(db.Integer)
+    payload = db.Column(db.Text)
+    # 'queued' | 'running' | 'done' | 'failed'
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.Text)
+    worker = db.Column(db.String(120))
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=_utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    # Bumped by every progress report; a running job that stops updating is stale.
+    updated_at = db.Column(db.DateTime, default=_utcnow, onupdate=_utcnow)
+
+    __table_args__ = (
+        db.Index("ix_job_status_id", "status", "id"),
+        # One pending job per (kind, novel); COALESCE so the novel-less kinds
+        # (sync, backfill) are deduplicated too. Repeated clicks get the same job.
+        db.Index(
+            "uq_job_pending",
+            "kind",
+            db.text("COALESCE(novel_id, '')"),
+            unique=True,
+            sqlite_where=db.text("status IN ('queued', 'running')"),
+        ),
+    )
+
+    def to_task(self):
+        """Same shape as the in-process TASKS entries the UI polls."""
+        status = {"queued": "running", "running": "running", "done": "completed"}.get(self.status, "error")
+        message = self.message or ("Waiting for a worker..." if self.status == "queued" else "")
+        return {"status": status, "progress": self.progress, "message": message, "worker": self.worker}
+
+
+# ------------------ MIGRATIONS ------------------
+# Schema changes are versioned with SQLite's PRAGMA user_version. Each migration
+# runs once, in order, inside one transaction; startup only reads the version.
+
+
+def _migrate_legacy_columns(conn):
+    cols = [r[1] for r in conn.exec_driver_sql("PRAGMA table_info(novel)").fetchall()]
+    if "nu_series_id" not in cols:
+        conn.exec_driver_sql("ALTER TABLE novel ADD COLUMN nu_series_id VARCHAR(32)")
+    if "nu_group_id" not in cols:
+        conn.exec_driver_sql("ALTER TABLE novel ADD COLUMN nu_group_id VARCHAR(32)")
+    if "fenrir_links" not in cols:
+        conn.exec_driver_sql("ALTER TABLE novel ADD COLUMN fenrir_links TEXT")
+    if "status" not in cols:
+        conn.exec_driver_sql("ALTER TABLE novel ADD COLUMN status VARCHAR(20) DEFAULT 'active'")
+
+
+def _migrate_unique_nu_url(conn):
+    # nu_url is the sync upsert key; fold duplicate rows into the oldest one before
+    # indexing. The survivor keeps its own values and takes any it lacks (ids, last
+    # crawl) from the duplicates; their submissions and jobs are re-pointed at it.
+    groups = conn.exec_driver_sql(
+        "SELECT nu_url, GROUP_CONCAT(id) FROM novel GROUP BY nu_url HAVING COUNT(*) > 1"
+    ).fetchall()
+    for nu_url, ids in groups:
+        ids = sorted(int(i) for i in ids.split(","))
+        keep, drop = ids[0], ids[1:]
+        marks = ",".join("?" * len(drop))
+        for col in ("nu_series_id", "nu_group_id", "fenrir_chapters", "fenrir_links", "nu_chapters"):
+            conn.exec_driver_sql(
+                f"UPDATE novel SET {col} = (SELECT {col} FROM novel WHERE id IN ({marks}) "
+                f"AND {col} IS NOT NULL ORDER BY last_checked DESC LIMIT 1) "
+                f"WHERE id = ? AND {col} IS NULL",
+                (*drop, keep),
+            )
+        conn.exec_driver_sql(
+            f"UPDATE novel SET last_checked = (SELECT MAX(last_checked) FROM novel WHERE id IN ({marks},?)) "
+            "WHERE id = ?",
+            (*drop, keep, keep),
+        )
+        # A pending release the survivor already has stays with the survivor.
+        conn.exec_driver_sql(
+            f"UPDATE OR IGNORE submission SET novel_id = ? WHERE novel_id IN ({marks})", (keep, *drop)
+        )
+        conn.exec_driver_sql(f"DELETE FROM submission WHERE novel_id IN ({marks})", tuple(drop))
+        conn.exec_driver_sql(f"UPDATE job SET novel_id = ? WHERE novel_id IN ({marks})", (keep, *drop))
+        conn.exec_driver_sql(f"DELETE FROM novel WHERE id IN ({marks})", tuple(drop))
+        logger.warning("🧹 Merged duplicate novels %s into #%d (nu_url %s)", drop, keep, nu_url)
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS ix_novel_nu_url ON novel (nu_url)")
+
+
+def _migrate_query_indexes(conn):
+    conn.exec_driver_sql("UPDATE novel SET status = 'active' WHERE status IS NULL")
+    # List endpoint: WHERE status ... ORDER BY name, and ?all=1 ORDER BY name
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_novel_status_name ON novel (status, name)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_novel_name ON novel (name)")
+    # Refresh scheduling: oldest-checked active novels first
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_novel_status_last_checked ON novel (status, last_checked)"
+    )
+    # Series-id lookups and "missing id" scans
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_novel_nu_series_id ON novel (nu_series_id)")
+
+
+def _migrate_list_columns(conn):
+    cols = [r[1] for r in conn.exec_driver_sql("PRAGMA table_info(novel)").fetchall()]
+    if "missing_count" not in cols:
+        conn.exec_driver_sql("ALTER TABLE novel ADD COLUMN missing_count INTEGER DEFAULT 0")
+    if "updated_at" not in cols:
+        conn.exec_driver_sql("ALTER TABLE novel ADD COLUMN updated_at DATETIME")
+    conn.exec_driver_sql(
+        "UPDATE novel SET updated_at = COALESCE(last_checked, CURRENT_TIMESTAMP) WHERE updated_at IS NULL"
+    )
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_novel_updated_at ON novel (updated_at)")
+
+    rows = conn.exec_driver_sql(
+        "SELECT id, fenrir_chapters, nu_chapters FROM novel WHERE fenrir_chapters IS NOT NULL"
+    ).fetchall()
+    counts = []
+    for novel_id, f_json, n_json in rows:
+        f = set(tuple(x) for x in json.loads(f_json or "[]"))
+        n = set(tuple(x) for x in json.loads(n_json or "[]"))
+        counts.append((len(f - n), novel_id))
+    if counts:
+        conn.exec_driver_sql("UPDATE novel SET missing_count = ? WHERE id = ?", counts)
+
+
+def _migrate_lease_columns(conn):
+    cols = [r[1] for r in conn.exec_driver_sql("PRAGMA table_info(novel)").fetchall()]
+    if "lease_owner" not in cols:
+        conn.exec_driver_sql("ALTER TABLE novel ADD COLUMN lease_owner VARCHAR(120)")
+    if "lease_expires" not in cols:
+        conn.exec_driver_sql("ALTER TABLE novel ADD COLUMN lease_expires DATETIME")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_novel_lease_owner ON novel (lease_owner)")
+
+
+def _migrate_job_pending_index(conn):
+    # The old index was on (kind, novel_id), and NULLs never conflict, so
+    # sync/backfill jobs could be queued twice. Retire such duplicates first.
+    dupes = conn.exec_driver_sql(
+        "UPDATE job SET status = 'failed', message = 'Duplicate of an earlier pending job' "
+        "WHERE status IN ('queued', 'running') AND id NOT IN ("
+        "SELECT MIN(id) FROM job WHERE status IN ('queued', 'running') "
+        "GROUP BY kind, COALESCE(novel_id, ''))"
+    ).rowcount
+    if dupes:
+        logger.warning("🧹 Retired %d duplicate pending jobs", dupes)
+    conn.exec_driver_sql("DROP INDEX IF EXISTS uq_job_pending")
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX uq_job_pending ON job (kind, COALESCE(novel_id, '')) "
+        "WHERE status IN ('queued', 'running')"
+    )
+
+
+MIGRATIONS = [
+    (1, "legacy novel columns", _migrate_legacy_columns),
+    (2, "unique nu_url", _migrate_unique_nu_url),
+    (3, "list/scheduler/lookup indexes", _migrate_query_indexes),
+    (4, "missing_count / updated_at", _migrate_list_columns),
+    (5, "refresh leases", _migrate_lease_columns),
+    (6, "pending job dedupe incl. novel-less kinds", _migrate_job_pending_index),
+]
+
+
+def run_migrations():
+    """Apply pending migrations. Returns the resulting schema version."""
+    with db.engine.begin() as conn:
+        current = conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+        for version, desc, fn in MIGRATIONS:
+            if version <= current:
+                continue
+            logger.info("🗄️ Migrating schema to v%d (%s)", version, desc)
+            fn(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+            current = version
+    return current
+
+
+with _DB_WRITE_LOCK, app.app_context():
     db.create_all()
+    run_migrations()
+
+# ------------------ BROWSER MANAGER ------------------
+
 
-    # Lightweight sqlite migration for new columns.
+# Launch options per workload. Crawls never need a window, so they run headless
+# with a small viewport and Chrome's memory-hungry extras switched off (CDP
+# blocking replaces the ad-block extension); submissions stay headed so a
+# human can watch or step in on the add-release form.
+BROWSER_PROFILES = {
+    "crawl": {
+        "uc": True,
+        "headless2": True,
+        "ad_block_on": False,
+        "page_load_strategy": "eager",
+        "chromium_arg": ",".join([
+            "--window-size=1024,768",
+            "--disable-gpu",
+            "--disable-extensions",
+            "--disable-dev-shm-usage",
+            "--disable-background-networking",
+            "--disable-component-update",
+            "--disable-sync",
+            "--mute-audio",
+            "--no-first-run",
+            "--renderer-process-limit=2",
+            "--disable-features=Translate,MediaRouter,OptimizationHints",
+            "--js-flags=--max-old-space-size=256",
+        ]),
+    },
+    "submit": {
+        "uc": True,
+        "headless": False,
+        "ad_block_on": True,
+        "page_load_strategy": "eager",
+    },
+}
+
+
+def _process_tree_rss(root_pids):
+    """Resident memory in bytes of ``root_pids`` and all their descendants."""
+    roots = {p for p in root_pids if p}
+    if not roots:
+        return 0
     try:
-        cols = [r[1] for r in db.session.execute(db.text("PRAGMA table_info(novel)")).fetchall()]
-        if "nu_series_id" not in cols:
-            db.session.execute(db.text("ALTER TABLE novel ADD COLUMN nu_series_id VARCHAR(32)"))
-        if "nu_group_id" not in cols:
-            db.session.execute(db.text("ALTER TABLE novel ADD COLUMN nu_group_id VARCHAR(32)"))
-        if "fenrir_links" not in cols:
-            db.session.execute(db.text("ALTER TABLE novel ADD COLUMN fenrir_links TEXT"))
-        if "status" not in cols:
-            db.session.execute(db.text("ALTER TABLE novel ADD COLUMN status VARCHAR(20) DEFAULT 'active'"))
-        db.session.commit()
-    except Exception:
-        db.session.rollback()
+        import psutil
+    except ImportError:
+        psutil = None
 
-# ------------------ BROWSER MANAGER ------------------
+    if psutil:
+        procs = {}
+        for pid in roots:
+            try:
+                proc = psutil.Process(pid)
+                procs[pid] = proc
+                for child in proc.children(recursive=True):
+                    procs[child.pid] = child
+            except psutil.Error:
+                pass
+        total = 0
+        for proc in procs.values():
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    # No psutil: walk /proc (Linux).
+    children = {}
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as fh:
+                ppid = int(fh.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    seen, stack, total = set(), list(roots), 0
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status", "r") as fh:
+                for line in fh:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except (OSError, ValueError):
+            pass
+    return total
 
 
 class BrowserManager:
-    def __init__(self):
+    def __init__(self, name="nu", profile="submit"):
+        self.name = name
+        self.profile = profile
         self.sb = None
         self.ctx = None
-        self.lock = threading.Lock()
+        # Re-entrant: get_sb closes a dead browser while holding the lock.
+        self.lock = threading.RLock()
 
     def get_sb(self):
         with self.lock:
@@ -119,73 +782,49 @@ class BrowserManager:
                     self.close()
 
             if not self.sb:
-                logger.info("🌐 Launching browser")
+                logger.info("🌐 Launching %s browser (%s profile)", self.name, self.profile)
+                launch_started = time.perf_counter()
                 self.ctx = SB(
-                    uc=True,
-                    headless=False,
-                    ad_block_on=True,
-                    page_load_strategy="eager",
+                    **BROWSER_PROFILES[self.profile],
+                    # Persistent profile so the NU login survives restarts.
+                    user_data_dir=nu_session.profile_dir(self.name),
                 )
                 self.sb = self.ctx.__enter__()
 
-                self.sb.execute_cdp_cmd(
-                    "Network.setBlockedURLs",
-                    {
-                        "urls": [
-                            "*.png",
-                            "*.jpg",
-                            "*.gif",
-                            "*.jpeg",
-                            "*.webp",
-                            "*.mp4",
-                            "*.svg",
-                            "*doubleclick.net/*",
-                            "*googlesyndication.com/*",
-                            "*googleadservices.com/*",
-                            "*googletagservices.com/*",
-                            "*googletagmanager.com/*",
-                            "*google-analytics.com/*",
-                            "*analytics.google.com/*",
-                            "*adsystem.com/*",
-                            "*adservice.google.com/*",
-                            "*amazon-adsystem.com/*",
-                            "*taboola.com/*",
-                            "*outbrain.com/*",
-                            "*scorecardresearch.com/*",
-                            "*quantserve.com/*",
-                            "*zedo.com/*",
-                            "*criteo.com/*",
-                            "*criteo.net/*",
-                            "*adsrvr.org/*",
-                            "*pubmatic.com/*",
-                            "*openx.net/*",
-                            "*rubiconproject.com/*",
-                            "*yieldmo.com/*",
-                            "*moatads.com/*",
-                            "*serving-sys.com/*",
-                            "*adnxs.com/*",
-                            "*facebook.net/*",
-                            "*connect.facebook.net/*",
-                            "*hotjar.com/*",
-                            "*datadoghq.com/*",
-                            "*clarity.ms/*",
-                        ]
-                    },
-                )
+                try:
+                    self.sb.execute_cdp_cmd("Network.enable", {})
+                except Exception:
+                    pass
+                apply_block_profile(self.sb, "default")
 
-                self._login()
+                BROWSER_LAUNCH_SECONDS.observe(time.perf_counter() - launch_started, browser=self.name)
+                logger.info("🌐 %s browser up, %.0f MB resident", self.name, self.memory_bytes() / 1e6)
+
+                login_started = time.perf_counter()
+                method = self._login()
+                BROWSER_LOGIN_SECONDS.observe(
+                    time.perf_counter() - login_started, browser=self.name, method=method
+                )
 
             return self.sb
 
     def _login(self):
+        """Log in if needed; returns how: 'resumed', 'form', 'skipped' or 'failed'."""
+        # Cheap path first: live profile session or cookies saved on disk.
+        try:
+            if nu_session.resume_session(self.sb):
+                return "resumed"
+        except Exception as e:
+            logger.warning("⚠️ Session restore failed: %s", e)
+
         user = os.getenv("NU_USER")
         pw = os.getenv("NU_PASS")
         if not user or not pw:
             logger.warning("⚠️ NU credentials missing, skipping login")
-            return
+            return "skipped"
 
         logger.info("🔑 Logging into NovelUpdates")
-        fast_open(self.sb, "https://www.novelupdates.com/login/", timeout_seconds=8)
+        fast_open(self.sb, f"{NU_BASE_URL}/login/", timeout_seconds=8)
         # Don't wait for full load; NU pages can hang on ads/tracker scripts.
         try:
             self.sb.wait_for_element_visible("#user_login", timeout=10)
@@ -196,7 +835,7 @@ class BrowserManager:
             self.sb.wait_for_element_visible("#user_login", timeout=10)
         except Exception:
             logger.error("❌ Login form not found (Cloudflare or layout change)")
-            return
+            return "failed"
 
         self.sb.type("#user_login", user)
         self.sb.type("#user_pass", pw)
@@ -210,12 +849,53 @@ class BrowserManager:
             pass
 
         try:
-            fast_open(self.sb, "https://www.novelupdates.com/add-release/", timeout_seconds=8)
+            fast_open(self.sb, f"{NU_BASE_URL}/add-release/", timeout_seconds=8)
             self.sb.wait_for_element("#arrelease", timeout=15)
         except Exception as e:
             logger.warning("⚠️ Post-login add-release not ready: %s", e)
 
+        if not nu_session.save_cookies(self.sb):
+            logger.warning("⚠️ No NU login cookie after login; session not saved")
+
         logger.info("✅ Login attempt finished")
+        return "form"
+
+    @staticmethod
+    def _pids(sb):
+        pids = []
+        driver = getattr(sb, "driver", None)
+        try:
+            pids.append(driver.service.process.pid)
+        except Exception:
+            pass
+        # uc mode starts Chrome itself rather than as a chromedriver child.
+        pids.append(getattr(driver, "browser_pid", None))
+        return pids
+
+    def memory_bytes(self):
+        """Resident memory of chromedriver + Chrome (all processes), 0 if not running."""
+        # Deliberately lock-free: get_sb() holds self.lock through launch and login,
+        # and /api/browsers or /metrics must not wait on that. Reading self.sb once
+        # is atomic; a browser closing meanwhile just reports stale or zero memory.
+        sb = self.sb
+        if not sb:
+            BROWSER_MEMORY_BYTES.set(0, browser=self.name)
+            return 0
+        pids = self._pids(sb)
+        try:
+            rss = _process_tree_rss(pids)
+        except Exception:
+            rss = 0
+        BROWSER_MEMORY_BYTES.set(rss, browser=self.name)
+        return rss
+
+    def status(self):
+        return {
+            "name": self.name,
+            "profile": self.profile,
+            "running": self.sb is not None,
+            "memory_bytes": self.memory_bytes(),
+        }
 
     def close(self):
         with self.lock:
@@ -223,6 +903,7 @@ class BrowserManager:
                 self.sb = None
                 return
 
+            record_page_weight(self.sb)
             try:
                 self.ctx.__exit__(None, None, None)
             except Exception as e:
@@ -232,14 +913,18 @@ class BrowserManager:
                 self.sb = None
 
 
-browser = BrowserManager()
+# Headed browser for NU submissions; headless low-memory one for refresh/sync.
+browser = BrowserManager(name="nu", profile="submit")
+crawl_browser = BrowserManager(name="crawl", profile="crawl")
+BROWSERS = (browser, crawl_browser)
 
 
 def _shutdown(*_args):
-    try:
-        browser.close()
-    except Exception as e:
-        logger.warning("⚠️ Shutdown cleanup error: %s", e)
+    for b in BROWSERS:
+        try:
+            b.close()
+        except Exception as e:
+            logger.warning("⚠️ Shutdown cleanup error: %s", e)
 
 
 atexit.register(_shutdown)
@@ -253,44 +938,12 @@ except Exception:
 # ------------------ HELPERS ------------------
 
 
-def parse_vol_ch(text):
-    if not text:
-        return None
-
-    t = (
-        str(text)
-        .lower()
-        .replace("volume", "v")
-        .replace("vol.", "v")
-        .replace("vol", "v")
-        .replace("chapter", "c")
-        .replace("ch.", "c")
-        .replace("ch", "c")
-    )
-
-    # Common patterns:
-    # - v3c91
-    # - v3 c91
-    # - v 3 c 91
-    # - c91
-    m = re.search(r"\bv\s*(\d+)\s*c\s*(\d+)\b", t, re.IGNORECASE)
-    if m:
-        try:
-            return (int(m.group(1)), int(m.group(2)))
-        except Exception:
-            return None
-
-    m = re.search(r"\bc\s*(\d+)\b", t, re.IGNORECASE)
-    if m:
-        try:
-            return (0, int(m.group(1)))
-        except Exception:
-            return None
-
-    return None
-
-
-def fast_open(sb, url, timeout_seconds=8):
+def fast_open(sb, url, timeout_seconds=8, profile=None):
+    site = _site_label(url)
+    # Account for the page we are leaving before its timing entries go away.
+    record_page_weight(sb)
+    apply_block_profile(sb, profile or block_profile_for(url))
+    started = time.perf_counter()
     try:
         sb.driver.set_page_load_timeout(timeout_seconds)
     except Exception:
@@ -299,6 +952,7 @@ def fast_open(sb, url, timeout_seconds=8):
     try:
         sb.open(url)
     except TimeoutException:
+        PAGE_OPEN_TIMEOUTS.inc(site=site)
         try:
             sb.execute_script("try { window.stop(); } catch (e) {}")
         except Exception:
@@ -310,6 +964,8 @@ def fast_open(sb, url, timeout_seconds=8):
         except Exception:
             pass
 
+    PAGE_OPEN_SECONDS.observe(time.perf_counter() - started, site=site)
+
     try:
         sb.driver.set_page_load_timeout(60)
     except Exception:
@@ -317,6 +973,8 @@ def fast_open(sb, url, timeout_seconds=8):
 
 
 def crawl_fenrir_chapters(sb, url):
+    url = rebase_url(url, "fenrir")
+    phase_started = time.perf_counter()
     fast_open(sb, url, timeout_seconds=8)
     try:
         sb.execute_script(
@@ -333,31 +991,6 @@ def crawl_fenrir_chapters(sb, url):
         pass
     time.sleep(2)
 
-    def _parse_from_href(href):
-        if not href:
-            return None
-        # Common patterns:
-        # - /vol-3/1
-        # - /<num>
-        # - /chapter-<num>
-        # - ?chapter=<num>
-        m = re.search(r"/vol-(\d{1,5})/(\d{1,5})(?:/|$)", href, re.IGNORECASE)
-        if m:
-            try:
-                return (int(m.group(1)), int(m.group(2)))
-            except Exception:
-                return None
-
-        m = re.search(r"(?:chapter[-_/]|/)(\d{1,5})(?:/|$)", href, re.IGNORECASE)
-        if not m:
-            m = re.search(r"[?&]chapter=(\d{1,5})\b", href, re.IGNORECASE)
-        if m:
-            try:
-                return (0, int(m.group(1)))
-            except Exception:
-                return None
-        return None
-
     chapters = set()
     links = {}
     selectors = [
@@ -370,6 +1003,8 @@ def crawl_fenrir_chapters(sb, url):
         sb.wait_for_element("a.btn-chapter", timeout=15)
     except Exception:
         pass
+    CRAWL_PHASE_SECONDS.observe(time.perf_counter() - phase_started, crawl="fenrir", phase="load")
+    phase_started = time.perf_counter()
 
     try:
         # Best-effort: remove common modal/backdrop overlays if they exist.
@@ -405,6 +1040,21 @@ def crawl_fenrir_chapters(sb, url):
             time.sleep(0.35)
     except Exception:
         pass
+    CRAWL_PHASE_SECONDS.observe(time.perf_counter() - phase_started, crawl="fenrir", phase="scroll")
+    phase_started = time.perf_counter()
+
+    if capture.enabled():
+        try:
+            grid_html = sb.execute_script(
+                """
+                var grids = document.querySelectorAll('div.grid-chapter');
+                if (!grids.length) return document.body ? document.body.outerHTML : '';
+                return Array.prototype.map.call(grids, function(g) { return g.outerHTML; }).join('\\n');
+                """
+            )
+            capture.record("fenrir_grid", grid_html, url=url)
+        except Exception:
+            pass
 
     for sel in selectors:
         try:
@@ -415,7 +1065,7 @@ def crawl_fenrir_chapters(sb, url):
                 title = (sb.execute_script("return arguments[0].innerText;", a) or "").strip()
                 parsed = parse_vol_ch(title)
                 if not parsed:
-                    parsed = _parse_from_href(href)
+                    parsed = parse_fenrir_href(href)
                 if parsed:
                     chapters.add(parsed)
                     try:
@@ -439,52 +1089,30 @@ def crawl_fenrir_chapters(sb, url):
         except Exception:
             pass
 
+    CRAWL_PHASE_SECONDS.observe(time.perf_counter() - phase_started, crawl="fenrir", phase="extract")
+    CRAWL_CHAPTERS.observe(len(chapters), crawl="fenrir")
     logger.info("📚 Fenrir chapters: %s", len(chapters))
     return chapters, links
 
 
-def crawl_nu_chapters(sb, url, group_id=None, series_id=None):
-    gid = str(group_id).strip() if group_id is not None else ""
-    sid = str(series_id).strip() if series_id is not None else ""
-
-    final_url = url
-    try:
-        if gid:
-            p = urlparse(url)
-            q = parse_qs(p.query)
-            q["pg"] = ["1"]
-            q["grp"] = [gid]
-            final_url = urlunparse((p.scheme, p.netloc, p.path, p.params, urlencode(q, doseq=True), p.fragment))
-    except Exception:
-        final_url = url
-
-    fast_open(sb, final_url, timeout_seconds=10)
-    time.sleep(2)
-
-    chapters = set()
-
-    def _parse_html_for_chapters(html):
-        """Extract vol/ch pairs from arbitrary HTML (popup or AJAX response)."""
-        found = set()
-        # span title="v1 c5" or span title="c5"
-        for m in re.finditer(r'title="([^"]*)"', html):
-            p = parse_vol_ch(m.group(1))
-            if p:
-                found.add(p)
-        # plain text patterns like v1c5 or c5
-        for m in re.finditer(r'\bv(\d+)\s*c(\d+)\b|\bc(\d+)\b', html, re.IGNORECASE):
-            if m.group(1):
-                found.add((int(m.group(1)), int(m.group(2))))
-            else:
-                found.add((0, int(m.group(3))))
-        return found
-
-    # ── Strategy 1: Call NU's nd_getchapters AJAX directly from the browser ──
-    # This is the most reliable because it uses the logged-in session and returns
-    # all chapters in one shot, bypassing popup timing issues.
-    if sid:
-        try:
-            _JS_AJAX = """
+def parse_nu_chapter_html(html):
+    """Extract vol/ch pairs from arbitrary HTML (popup or AJAX response)."""
+    found = set()
+    # span title="v1 c5" or span title="c5"
+    for m in re.finditer(r'title="([^"]*)"', html):
+        p = parse_vol_ch(m.group(1))
+        if p:
+            found.add(p)
+    # plain text patterns like v1c5 or c5
+    for m in re.finditer(r'\bv(\d+)\s*c(\d+)\b|\bc(\d+)\b', html, re.IGNORECASE):
+        if m.group(1):
+            found.add((int(m.group(1)), int(m.group(2))))
+        else:
+            found.add((0, int(m.group(3))))
+    return found
+
+
+_JS_ND_GETCHAPTERS = """
 var cb = arguments[arguments.length - 1];
 var fd = new FormData();
 fd.append('action', 'nd_getchapters');
@@ -495,120 +1123,289 @@ fetch('/wp-admin/admin-ajax.php', {method:'POST', credentials:'include', body:fd
     .then(function(h){cb(h);})
     .catch(function(){cb('');});
 """
-            sb.driver.set_script_timeout(30)
-            ajax_html = sb.driver.execute_async_script(_JS_AJAX, sid, gid)
-            if ajax_html:
-                chapters |= _parse_html_for_chapters(ajax_html)
-                logger.info("📚 NU chapters via AJAX: %s", len(chapters))
-        except Exception as e:
-            logger.warning("nd_getchapters AJAX failed: %s", e)
 
-    # ── Strategy 2: Open the "Show all chapters" popup, wait for list items ──
-    if not chapters:
-        try:
-            # Wait until the JS function is defined, then call it
-            sb.execute_script("""
-                var t = 0;
-                var iv = setInterval(function(){
-                    if (typeof list_allchpstwo === 'function') {
-                        clearInterval(iv);
-                        list_allchpstwo();
-                    }
-                    if (++t > 40) clearInterval(iv);
-                }, 250);
-            """)
-        except Exception:
-            pass
 
-        # Wait for actual list items to appear (not just the container)
-        popup_loaded = False
-        for selector in ["#my_popupreading ol.sp_chp li", "#my_popupreading li"]:
-            try:
-                sb.wait_for_element_visible(selector, timeout=15)
-                popup_loaded = True
-                break
-            except Exception:
-                pass
+def _nu_strategy_ajax(sb, sid, gid):
+    # Call NU's nd_getchapters AJAX directly from the browser. This is the most
+    # reliable because it uses the logged-in session and returns all chapters in
+    # one shot, bypassing popup timing issues.
+    sb.driver.set_script_timeout(30)
+    ajax_html = sb.driver.execute_async_script(_JS_ND_GETCHAPTERS, sid, gid)
+    if capture.enabled():
+        capture.record("nd_getchapters", ajax_html, url=sb.get_current_url())
+    return parse_nu_chapter_html(ajax_html) if ajax_html else set()
 
-        if not popup_loaded:
-            # Try clicking the button directly as fallback
-            try:
-                sb.click(".my_popupreading_open")
-                for selector in ["#my_popupreading ol.sp_chp li", "#my_popupreading li"]:
-                    try:
-                        sb.wait_for_element_visible(selector, timeout=12)
-                        popup_loaded = True
-                        break
-                    except Exception:
-                        pass
-            except Exception:
-                pass
 
-        if popup_loaded:
-            try:
-                popup_html = sb.execute_script("return document.getElementById('my_popupreading').innerHTML || '';")
-                chapters |= _parse_html_for_chapters(popup_html or "")
-            except Exception:
-                pass
+def _nu_strategy_popup(sb, sid, gid):
+    # Open the "Show all chapters" popup, wait for list items.
+    chapters = set()
+    try:
+        # Wait until the JS function is defined, then call it
+        sb.execute_script("""
+            var t = 0;
+            var iv = setInterval(function(){
+                if (typeof list_allchpstwo === 'function') {
+                    clearInterval(iv);
+                    list_allchpstwo();
+                }
+                if (++t > 40) clearInterval(iv);
+            }, 250);
+        """)
+    except Exception:
+        pass
+
+    # Wait for actual list items to appear (not just the container)
+    popup_loaded = False
+    for selector in ["#my_popupreading ol.sp_chp li", "#my_popupreading li"]:
+        try:
+            sb.wait_for_element_visible(selector, timeout=15)
+            popup_loaded = True
+            break
+        except Exception:
+            pass
 
-            # Also try direct element scraping
-            for sel in ["#my_popupreading ol.sp_chp span[title]", "#my_popupreading span[title]"]:
+    if not popup_loaded:
+        # Try clicking the button directly as fallback
+        try:
+            sb.click(".my_popupreading_open")
+            for selector in ["#my_popupreading ol.sp_chp li", "#my_popupreading li"]:
                 try:
-                    for s in sb.find_elements(sel):
-                        t = (s.get_attribute("title") or "").strip()
-                        p = parse_vol_ch(t)
-                        if p:
-                            chapters.add(p)
+                    sb.wait_for_element_visible(selector, timeout=12)
+                    popup_loaded = True
+                    break
                 except Exception:
                     pass
+        except Exception:
+            pass
 
-        logger.info("📚 NU chapters via popup: %s", len(chapters))
-
-    # ── Strategy 3: Releases table already on page (group-filtered URL) ──
-    if not chapters:
+    if popup_loaded:
         try:
-            # Only look inside the releases table, not all links on page
-            for a in sb.find_elements("table.tablesorter td a, #releases a, .releasesindex a"):
-                text = (a.text or "").strip()
-                p = parse_vol_ch(text)
-                if p:
-                    chapters.add(p)
+            popup_html = sb.execute_script("return document.getElementById('my_popupreading').innerHTML || '';")
+            if capture.enabled():
+                capture.record("popup", popup_html, url=sb.get_current_url())
+            chapters |= parse_nu_chapter_html(popup_html or "")
         except Exception:
             pass
-        logger.info("📚 NU chapters via table: %s", len(chapters))
 
-    logger.info("📚 NU chapters total: %s", len(chapters))
+        # Also try direct element scraping
+        for sel in ["#my_popupreading ol.sp_chp span[title]", "#my_popupreading span[title]"]:
+            try:
+                for s in sb.find_elements(sel):
+                    t = (s.get_attribute("title") or "").strip()
+                    p = parse_vol_ch(t)
+                    if p:
+                        chapters.add(p)
+            except Exception:
+                pass
     return chapters
 
 
-def title_to_fenrir_slug(title):
-    """Convert a novel title to the Fenrir Realm URL slug format."""
-    import unicodedata
-    # Normalize unicode (e.g. accented chars → ASCII equivalents where possible)
-    t = unicodedata.normalize("NFKD", title)
-    t = t.encode("ascii", "ignore").decode("ascii")
-    t = t.lower()
-    # Replace anything that's not alphanumeric or space with a space
-    t = re.sub(r"[^a-z0-9\s]", " ", t)
-    # Collapse whitespace to single hyphens
-    t = re.sub(r"\s+", "-", t.strip())
-    # Collapse multiple hyphens
-    t = re.sub(r"-{2,}", "-", t)
-    return t.strip("-")
+def _nu_strategy_table(sb, sid, gid):
+    # Releases table already on page (group-filtered URL). Only the first page of
+    # releases is visible, so this is a lossy last resort.
+    chapters = set()
+    # Only look inside the releases table, not all links on page
+    for a in sb.find_elements("table.tablesorter td a, #releases a, .releasesindex a"):
+        text = (a.text or "").strip()
+        p = parse_vol_ch(text)
+        if p:
+            chapters.add(p)
+    return chapters
 
 
-def extract_nu_series_id(sb):
-    """Extract the NovelUpdates numeric series ID from the current page."""
-    # 1. Try hidden #mypostid input
-    try:
-        val = sb.get_attribute("input#mypostid", "value")
-        if val and str(val).strip().isdigit():
-            return str(val).strip()
-    except Exception:
-        pass
+# name -> (function, needs_series_id, complete). Incomplete strategies only run
+# after every complete one has come back empty.
+NU_STRATEGIES = {
+    "ajax": (_nu_strategy_ajax, True, True),
+    "popup": (_nu_strategy_popup, False, True),
+    "table": (_nu_strategy_table, False, False),
+}
+
+
+class StrategyStats:
+    """
+    Tracks which NU chapter strategy produces chapters, and how fast, both
+    globally and per novel, and orders strategies by expected cost.
+
+    Expected cost is the smoothed duration divided by the smoothed hit rate, so
+    a fast strategy that rarely works ranks behind a slower reliable one.
+    Untried strategies cost nothing, so each one runs at least once before the
+    ranking settles. A strategy that failed ``skip_after`` times in a row (for
+    this novel, or globally) is skipped, except on every ``retry_every``-th
+    crawl so it can recover. Per-novel stats are kept for the ``max_keys`` most
+    recently crawled novels.
+    """
+
+    def __init__(self, skip_after=3, retry_every=10, alpha=0.3, max_keys=2000):
+        self.skip_after = skip_after
+        self.retry_every = retry_every
+        self.alpha = alpha
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        self.global_stats = {}
+        self.per_key = {}
+        self.crawls = 0
+
+    @staticmethod
+    def _new():
+        return {"attempts": 0, "hits": 0, "ewma_s": None, "fail_streak": 0}
+
+    def _bucket(self, key):
+        # dicts keep insertion order: re-inserting on use makes the first key the
+        # least recently crawled one.
+        bucket = self.per_key.pop(key, None)
+        if bucket is None:
+            bucket = {}
+            while len(self.per_key) >= self.max_keys:
+                self.per_key.pop(next(iter(self.per_key)))
+        self.per_key[key] = bucket
+        return bucket
+
+    def record(self, key, name, hit, seconds):
+        """
+        Record one strategy run. ``hit=None`` means inconclusive (every strategy
+        came back empty, so the series may simply have no chapters): only the
+        duration is kept, attempts and failure streaks are left alone.
+        """
+        with self.lock:
+            for bucket in (self.global_stats, self._bucket(key)):
+                st = bucket.setdefault(name, self._new())
+                prev = st["ewma_s"]
+                st["ewma_s"] = seconds if prev is None else prev + self.alpha * (seconds - prev)
+                if hit is None:
+                    continue
+                st["attempts"] += 1
+                st["hits"] += 1 if hit else 0
+                st["fail_streak"] = 0 if hit else st["fail_streak"] + 1
+
+    def _cost(self, st, default_rank):
+        if not st or not st["attempts"]:
+            # Untried: optimistic, in the historical order (ajax, popup, table).
+            return (0.0, default_rank)
+        hit_rate = (st["hits"] + 1) / (st["attempts"] + 2)
+        return ((st["ewma_s"] or 0) / hit_rate, default_rank)
+
+    def order(self, key, names):
+        """Return the strategies to try for ``key``, cheapest expected first."""
+        with self.lock:
+            self.crawls += 1
+            retry_round = self.crawls % self.retry_every == 0
+            mine = self.per_key.get(key, {})
+
+            def stats_for(name):
+                st = mine.get(name)
+                return st if st and st["attempts"] else self.global_stats.get(name)
+
+            ranked = sorted(names, key=lambda n: self._cost(stats_for(n), names.index(n)))
+            if retry_round:
+                return ranked
+
+            def failing(name):
+                return any(
+                    st and st["fail_streak"] >= self.skip_after
+                    for st in (mine.get(name), self.global_stats.get(name))
+                )
 
-    # 2. Fallback: body class postid-XXXXX
-    try:
+            kept = [n for n in ranked if not failing(n)]
+            return kept or ranked
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps({"global": self.global_stats, "crawls": self.crawls}))
+
+
+nu_strategy_stats = StrategyStats()
+
+
+def crawl_nu_chapters(sb, url, group_id=None, series_id=None):
+    url = rebase_url(url, "nu")
+    gid = str(group_id).strip() if group_id is not None else ""
+    sid = str(series_id).strip() if series_id is not None else ""
+
+    final_url = url
+    try:
+        if gid:
+            p = urlparse(url)
+            q = parse_qs(p.query)
+            q["pg"] = ["1"]
+            q["grp"] = [gid]
+            final_url = urlunparse((p.scheme, p.netloc, p.path, p.params, urlencode(q, doseq=True), p.fragment))
+    except Exception:
+        final_url = url
+
+    phase_started = time.perf_counter()
+    fast_open(sb, final_url, timeout_seconds=10)
+    time.sleep(2)
+    CRAWL_PHASE_SECONDS.observe(time.perf_counter() - phase_started, crawl="nu", phase="load")
+
+    key = sid or urlparse(url).path
+    available = [n for n, (_fn, needs_sid, _c) in NU_STRATEGIES.items() if sid or not needs_sid]
+    complete = [n for n in available if NU_STRATEGIES[n][2]]
+    lossy = [n for n in available if not NU_STRATEGIES[n][2]]
+    plan = nu_strategy_stats.order(key, complete) + lossy
+
+    chapters = set()
+    runs = []
+    for name in plan:
+        fn = NU_STRATEGIES[name][0]
+        started = time.perf_counter()
+        error = False
+        try:
+            chapters = fn(sb, sid, gid)
+        except Exception as e:
+            error = True
+            chapters = set()
+            logger.warning("NU %s strategy failed: %s", name, e)
+        elapsed = time.perf_counter() - started
+        runs.append((name, error, elapsed))
+        NU_STRATEGY_SECONDS.observe(elapsed, strategy=name)
+        NU_STRATEGY_ATTEMPTS.inc(strategy=name, result="error" if error else ("hit" if chapters else "miss"))
+        logger.info("📚 NU chapters via %s: %s (%.1fs)", name, len(chapters), elapsed)
+        if chapters:
+            break
+
+    # An empty result only counts against a strategy when another one found
+    # chapters (or it raised); a series with no releases is nobody's failure.
+    for name, error, elapsed in runs:
+        if chapters:
+            hit = name == runs[-1][0]
+        else:
+            hit = False if error else None
+        nu_strategy_stats.record(key, name, hit, elapsed)
+
+    CRAWL_CHAPTERS.observe(len(chapters), crawl="nu")
+    logger.info("📚 NU chapters total: %s", len(chapters))
+    return chapters
+
+
+def title_to_fenrir_slug(title):
+    """Convert a novel title to the Fenrir Realm URL slug format."""
+    import unicodedata
+    # Normalize unicode (e.g. accented chars → ASCII equivalents where possible)
+    t = unicodedata.normalize("NFKD", title)
+    t = t.encode("ascii", "ignore").decode("ascii")
+    t = t.lower()
+    # Replace anything that's not alphanumeric or space with a space
+    t = re.sub(r"[^a-z0-9\s]", " ", t)
+    # Collapse whitespace to single hyphens
+    t = re.sub(r"\s+", "-", t.strip())
+    # Collapse multiple hyphens
+    t = re.sub(r"-{2,}", "-", t)
+    return t.strip("-")
+
+
+def extract_nu_series_id(sb):
+    """Extract the NovelUpdates numeric series ID from the current page."""
+    # 1. Try hidden #mypostid input
+    try:
+        val = sb.get_attribute("input#mypostid", "value")
+        if val and str(val).strip().isdigit():
+            return str(val).strip()
+    except Exception:
+        pass
+
+    # 2. Fallback: body class postid-XXXXX
+    try:
         body_class = sb.execute_script("return document.body ? document.body.className : '';") or ""
         m = re.search(r"\bpostid-(\d+)\b", body_class)
         if m:
@@ -618,44 +1415,362 @@ def extract_nu_series_id(sb):
 
     # 3. Last resort: raw page source patterns
     try:
-        source = sb.get_page_source() or ""
-        patterns = [
-            r'id="mypostid"\s+value="(\d+)"',
-            r"\bpostid-(\d+)\b",
-            r"\bseries_id['\"]?\s*[:=]\s*['\"]?(\d+)",
-            r"\bpost_id['\"]?\s*[:=]\s*['\"]?(\d+)",
-        ]
-        for pattern in patterns:
-            m = re.search(pattern, source, re.IGNORECASE)
-            if m:
-                return m.group(1)
+        return nu_crawler.series_id_from_html(sb.get_page_source())
     except Exception:
         pass
 
     return None
 
 
+def upsert_synced_novels(records, group_name="Fenrir Realm", group_id="78568"):
+    """
+    Bulk upsert novels found by the group sync.
+
+    ``records`` is a list of dicts with ``name``, ``nu_url``, ``fenrir_url`` and
+    ``nu_series_id``. Existing rows are loaded in one query (to report counts),
+    then everything is written with a single ``INSERT ... ON CONFLICT(nu_url)``
+    batch. Must run inside an app context. Returns ``(added, updated)``.
+    """
+    if not records:
+        return 0, 0
+
+    existing = set(db.session.execute(db.select(Novel.nu_url)).scalars())
+
+    now = _utcnow()
+    rows = {}
+    for r in records:
+        rows[r["nu_url"]] = {
+            "updated_at": now,
+            "name": r["name"],
+            "fenrir_url": r["fenrir_url"],
+            "nu_url": r["nu_url"],
+            "group_name": group_name,
+            "nu_series_id": r.get("nu_series_id"),
+            "nu_group_id": group_id,
+            "status": "active",
+        }
+
+    table = Novel.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.nu_url],
+        set_={
+            # Keep an id we already have; otherwise take the freshly scraped one.
+            "nu_series_id": func.coalesce(table.c.nu_series_id, stmt.excluded.nu_series_id),
+            "fenrir_url": stmt.excluded.fenrir_url,
+            # onupdate= does not fire for ON CONFLICT, so bump it explicitly.
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    with db_write():
+        db.session.execute(stmt, list(rows.values()))
+
+    remember_nu_ids("series", {r["name"]: r["nu_series_id"] for r in records if r.get("nu_series_id")}, "sync")
+    if group_id:
+        remember_nu_ids("group", {group_name: group_id}, "sync")
+
+    added = sum(1 for url in rows if url not in existing)
+    return added, len(rows) - added
+
+
 def compute_missing(novel):
     f = set(tuple(x) for x in json.loads(novel.fenrir_chapters or "[]"))
     n = set(tuple(x) for x in json.loads(novel.nu_chapters or "[]"))
     return sorted(f - n, key=lambda x: (x[0] or 0, x[1]))
 
 
+def format_release(vol, ch):
+    """NU release label: 'v2c78' or 'c32'."""
+    return f"v{vol}c{ch}" if vol else f"c{ch}"
+
+
+def parse_release_label(text):
+    """Parse a bound typed in the UI ('v2c78', 'c32', 'V2 C78') into (vol, ch)."""
+    s = re.sub(r"\s+", "", str(text or "")).lower()
+    m = re.fullmatch(r"v(\d+)c(\d+)", s)
+    if m:
+        return (int(m.group(1)), int(m.group(2)))
+    m = re.fullmatch(r"c(\d+)", s)
+    if m:
+        return (0, int(m.group(1)))
+    return None
+
+
+def encode_missing_ranges(chapters):
+    """
+    Collapse sorted (vol, ch) pairs into runs of consecutive chapters in the
+    same volume: [{"vol", "from", "to", "count", "label"}], e.g. label "c101-c245".
+    """
+    ranges = []
+    for vol, ch in chapters:
+        vol = int(vol or 0)
+        last = ranges[-1] if ranges else None
+        if last and last["vol"] == vol and last["to"] == ch - 1:
+            last["to"] = ch
+            last["count"] += 1
+        else:
+            ranges.append({"vol": vol, "from": ch, "to": ch, "count": 1})
+    for r in ranges:
+        first = format_release(r["vol"], r["from"])
+        r["label"] = first if r["count"] == 1 else f"{first}-{format_release(r['vol'], r['to'])}"
+    return ranges
+
+
+# ------------------ NU LOOKUP CACHE ------------------
+
+# NovelUpdates ids for series and group names, learned from livesearch hits,
+# series pages and the group sync. A novel whose ids are known skips the
+# throttled livesearch and takes the id-injection path on submit.
+
+_NOVEL_NAME_COLUMN = {"series": "name", "group": "group_name"}
+_NOVEL_ID_COLUMN = {"series": "nu_series_id", "group": "nu_group_id"}
+
+
+def _lookup_key(name):
+    return " ".join(str(name or "").split()).lower()
+
+
+def lookup_nu_id(kind, name):
+    """Cached NU id for a series / group name, or None."""
+    key = _lookup_key(name)
+    if not key:
+        return None
+    with app.app_context():
+        row = db.session.get(NuLookup, (kind, key))
+        return row.nu_id if row else None
+
+
+def remember_nu_ids(kind, pairs, source, novel_id=None):
+    """
+    Cache ``pairs`` ({name: nu_id}) of ``kind`` ('series' / 'group') and copy
+    the ids onto every novel with a matching name that has none yet (and onto
+    ``novel_id`` whatever its name, for a single pair). Returns the number of
+    novels updated.
+    """
+    rows = {}
+    for name, nu_id in (pairs or {}).items():
+        key, nu_id = _lookup_key(name), str(nu_id or "").strip()
+        if key and nu_id.isdigit():
+            rows[key] = {"kind": kind, "name_key": key, "name": str(name).strip(), "nu_id": nu_id,
+                         "source": source, "updated_at": _utcnow()}
+    if not rows:
+        return 0
+
+    name_col = getattr(Novel, _NOVEL_NAME_COLUMN[kind])
+    id_col = getattr(Novel, _NOVEL_ID_COLUMN[kind])
+    with app.app_context(), db_write():
+        table = NuLookup.__table__
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.kind, table.c.name_key],
+            set_={c: stmt.excluded[c] for c in ("name", "nu_id", "source", "updated_at")},
+        )
+        db.session.execute(stmt, list(rows.values()))
+
+        # Names are matched in Python so the key normalisation is identical.
+        updates = []
+        for nid, name in db.session.execute(db.select(Novel.id, name_col).where(id_col.is_(None))):
+            row = rows.get(_lookup_key(name))
+            if row:
+                updates.append({"_id": nid, "_nu_id": row["nu_id"]})
+        if updates:
+            novels = Novel.__table__
+            db.session.execute(
+                novels.update().where(novels.c.id == bindparam("_id")).values({id_col.key: bindparam("_nu_id")}),
+                updates,
+            )
+    updated = len(updates)
+    if novel_id is not None and len(rows) == 1:
+        (row,) = rows.values()
+        updated += set_novel_nu_id(novel_id, kind, row["nu_id"])
+    return updated
+
+
+def set_novel_nu_id(novel_id, kind, nu_id):
+    """Store a series / group NU id on one novel. Returns 1 if it changed."""
+    id_col = getattr(Novel, _NOVEL_ID_COLUMN[kind])
+    with app.app_context(), db_write():
+        changed = db.session.execute(
+            db.update(Novel)
+            .where(Novel.id == novel_id, db.or_(id_col.is_(None), id_col != str(nu_id)))
+            .values({id_col: str(nu_id)})
+        ).rowcount
+    return changed
+
+
+def forget_nu_id(kind, name, nu_id, novel_id=None):
+    """
+    Evict a cached id that NU did not accept: the cache row for ``name`` if it
+    still holds ``nu_id``, and the copy on ``novel_id``. Ids that did not come
+    from the cache (set by hand, differing from it) are left alone. Returns
+    True if the cache row was evicted.
+    """
+    key, nu_id = _lookup_key(name), str(nu_id or "").strip()
+    if not key or not nu_id:
+        return False
+    id_col = getattr(Novel, _NOVEL_ID_COLUMN[kind])
+    with app.app_context(), db_write():
+        evicted = db.session.execute(
+            db.delete(NuLookup).where(NuLookup.kind == kind, NuLookup.name_key == key, NuLookup.nu_id == nu_id)
+        ).rowcount
+        if evicted and novel_id is not None:
+            db.session.execute(
+                db.update(Novel).where(Novel.id == novel_id, id_col == nu_id).values({id_col: None})
+            )
+    if evicted:
+        logger.warning("🗑️ Evicted cached NU %s id %s for %r", kind, nu_id, name)
+    return bool(evicted)
+
+
+# Returns [[nu_id, text], ...] for the livesearch results in arguments[0]; with
+# arguments[1] set, clicks the result at that index instead.
+_LIVESEARCH_HITS_JS = """
+var box = document.getElementById(arguments[0]);
+if (!box) return [];
+var links = box.querySelectorAll('[onclick*="changeitem"]');
+if (arguments[1] !== null && arguments[1] !== undefined) {
+    if (links[arguments[1]]) links[arguments[1]].click();
+    return [];
+}
+var hits = [];
+for (var i = 0; i < links.length; i++) {
+    var m = (links[i].getAttribute('onclick') || '').match(/changeitem\(\s*'[^']*'\s*,\s*'(\d+)'/);
+    hits.push([m ? m[1] : '', (links[i].textContent || '').trim()]);
+}
+return hits;
+"""
+
+
+def pick_livesearch_hit(sb, container_id, name, timeout_seconds=4.0):
+    """
+    Wait for NU's livesearch results in ``container_id`` and select the one
+    whose normalised text equals ``name``. Returns its NU id, or None when no
+    result matched exactly in time; a lone fuzzy hit is not trusted enough to
+    cache.
+    """
+    key = _lookup_key(name)
+    deadline = time.time() + timeout_seconds
+    while True:
+        hits = sb.execute_script(_LIVESEARCH_HITS_JS, container_id, None) or []
+        exact = [i for i, (nu_id, text) in enumerate(hits) if nu_id and _lookup_key(text) == key]
+        if exact:
+            sb.execute_script(_LIVESEARCH_HITS_JS, container_id, exact[0])
+            return hits[exact[0]][0]
+        if time.time() > deadline:
+            return None
+        time.sleep(0.25)
+
+
 # ------------------ WORKER ------------------
 
+# Claims per submission before a retryable browser failure marks it failed.
+SUBMIT_MAX_ATTEMPTS = int(os.getenv("SUBMIT_MAX_ATTEMPTS", "3"))
+
+
+def enqueue_submissions(novel_id, chapters):
+    """
+    Queue (vol, ch) releases for a novel in one transaction.
+
+    Releases already queued or in flight are skipped (read once up front, and the
+    partial unique index makes the insert race-safe). Must run inside an app
+    context. Returns the number of newly queued rows.
+    """
+    wanted = sorted({(int(v or 0), int(c)) for v, c in chapters})
+    if not wanted:
+        return 0
+
+    pending = set(
+        db.session.execute(
+            db.select(Submission.vol, Submission.ch).where(
+                Submission.novel_id == novel_id,
+                Submission.status.in_(("queued", "in_flight")),
+            )
+        ).tuples()
+    )
+    now = _utcnow()
+    rows = [
+        {"novel_id": novel_id, "vol": v, "ch": c, "status": "queued", "attempts": 0,
+         "created_at": now, "updated_at": now}
+        for v, c in wanted
+        if (v, c) not in pending
+    ]
+    if rows:
+        with db_write():
+            db.session.execute(sqlite_insert(Submission.__table__).on_conflict_do_nothing(), rows)
+        submission_wakeup.set()
+    return len(rows)
+
+
+def _claim_next_submission():
+    """Atomically move the oldest claimable queued row to in_flight."""
+    table = Submission.__table__
+    now = _utcnow()
+    next_id = (
+        db.select(table.c.id)
+        .where(
+            table.c.status == "queued",
+            db.or_(table.c.not_before.is_(None), table.c.not_before <= now),
+        )
+        .order_by(table.c.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    with _DB_WRITE_LOCK, app.app_context():
+        row = db.session.execute(
+            db.update(table)
+            .where(table.c.id == next_id)
+            .values(status="in_flight", attempts=table.c.attempts + 1, updated_at=now)
+            .returning(table.c.id, table.c.novel_id, table.c.vol, table.c.ch, table.c.attempts)
+        ).first()
+        db_commit()
+    return row
+
+
+def _finish_submission(sub_id, status, error=None, not_before=None):
+    with app.app_context():
+        sub = db.session.get(Submission, sub_id)
+        if not sub:
+            return
+        sub.status = status
+        sub.error = error
+        sub.not_before = not_before
+        db_commit()
+
+
+def _pending_submissions():
+    with app.app_context():
+        return db.session.execute(
+            db.select(func.count(Submission.id)).where(Submission.status.in_(("queued", "in_flight")))
+        ).scalar()
+
 
 def submission_worker():
     logger.info("🤖 Submission worker started (idle)")
 
+    # Rows left in flight by a previous process never finished; retry them.
+    with app.app_context(), db_write():
+        db.session.execute(
+            db.update(Submission).where(Submission.status == "in_flight").values(status="queued")
+        )
+
     while True:
         # Keep a single logged-in browser session alive while draining the queue.
         # Do not auto-close on idle because refresh and submit share the same browser.
-        try:
-            novel_id, vol, ch = submission_queue.get(timeout=20)
-        except Empty:
+        claimed = _claim_next_submission()
+        if not claimed:
+            submission_wakeup.wait(timeout=20)
+            submission_wakeup.clear()
             continue
+        sub_id, novel_id, vol, ch, attempts = claimed
 
         sb = None
+        outcome = ("failed", None, None)
+        step_started = [time.perf_counter()]
+
+        def _step_done(step):
+            now = time.perf_counter()
+            SUBMISSION_STEP_SECONDS.observe(now - step_started[0], step=step)
+            step_started[0] = now
 
         try:
             with app.app_context():
@@ -664,8 +1779,10 @@ def submission_worker():
                 raise Exception("Novel not found")
 
             sb = browser.get_sb()
-            fast_open(sb, "https://www.novelupdates.com/add-release/", timeout_seconds=8)
+            _step_done("browser")
+            fast_open(sb, f"{NU_BASE_URL}/add-release/", timeout_seconds=8)
             sb.wait_for_element("#arrelease", timeout=15)
+            _step_done("open_form")
 
             try:
                 page_text = sb.get_text("body")
@@ -681,98 +1798,30 @@ def submission_worker():
                 except Exception:
                     return ""
 
-            def _set_value(selector, value):
-                try:
-                    sb.clear(selector)
-                except Exception:
-                    pass
-                sb.type(selector, value)
-
-            def _type_slow(selector, value, delay_seconds=0.06):
-                try:
-                    el = sb.driver.find_element("css selector", selector)
-                    el.clear()
-                    el.click()
-                    for ch in value:
-                        el.send_keys(ch)
-                        time.sleep(delay_seconds)
-                except Exception:
-                    _set_value(selector, value)
-
-            def _wait_results_then_type(text_selector, container_kind, search_type, full_text):
-                # Trigger NU livesearch results, wait until results appear, then finish typing.
+            def _livesearch(text_selector, search_type, full_text):
+                # Set the whole value in one call; the keyup it fires is what NU's
+                # livesearch listens to. showResult is also called directly in case
+                # the handler is bound differently.
                 target = (full_text or "").strip()
-                if search_type == "series":
-                    # Paste-like: send everything except last char fast, then type last char.
-                    query = target[:-1] if len(target) > 1 else target
-                    last_char = target[-1:] if len(target) > 0 else ""
-                elif search_type == "group":
-                    query = target[:-1] if len(target) > 1 else target
-                    last_char = target[-1:] if len(target) > 0 else ""
-                else:
-                    if len(target) > 6:
-                        query = target[: max(3, len(target) // 2)].rstrip()
-                    else:
-                        query = target
-                    last_char = ""
-
-                if search_type in ("series", "group") and last_char:
-                    try:
-                        el = sb.driver.find_element("css selector", text_selector)
-                        el.clear()
-                        el.click()
-                        el.send_keys(query)
-                    except Exception:
-                        _type_slow(text_selector, query + last_char, delay_seconds=0.12)
-                else:
-                    _type_slow(text_selector, query, delay_seconds=0.12)
-                time.sleep(0.35)
-
-                try:
-                    sb.execute_script(
-                        """
-                        const sel = arguments[0];
-                        const el = document.querySelector(sel);
-                        if (!el) return;
-                        el.dispatchEvent(new KeyboardEvent('keyup', { bubbles: true }));
-                        """,
-                        text_selector,
-                    )
-                except Exception:
-                    pass
-
+                nu_crawler.fill_form(sb, {text_selector: target}, keyup=(text_selector,))
                 try:
                     _throttle_livesearch(2.0)
                     sb.execute_script(
                         "if (typeof showResult === 'function') { showResult(arguments[0], '100', arguments[1]); }",
-                        query,
+                        target,
                         search_type,
                     )
                 except Exception:
                     pass
 
-                # Per workflow: do not wait for dropdown; type final char immediately.
-                if search_type in ("series", "group") and last_char:
-                    try:
-                        el = sb.driver.find_element("css selector", text_selector)
-                        el.send_keys(last_char)
-                        try:
-                            sb.execute_script(
-                                """
-                                const sel = arguments[0];
-                                const el = document.querySelector(sel);
-                                if (!el) return;
-                                el.dispatchEvent(new KeyboardEvent('keyup', { bubbles: true }));
-                                """,
-                                text_selector,
-                            )
-                        except Exception:
-                            pass
-                    except Exception:
-                        pass
-
-                time.sleep(0.2)
-                return
+            # Ids learned earlier (livesearch, series pages, sync) skip the livesearch.
+            for kind, name_attr, id_attr in (("series", "name", "nu_series_id"), ("group", "group_name", "nu_group_id")):
+                if not getattr(novel, id_attr, None):
+                    cached = lookup_nu_id(kind, getattr(novel, name_attr, None))
+                    if cached:
+                        logger.info("🗂️ Cached NU %s id %s for %r", kind, cached, getattr(novel, name_attr))
+                        setattr(novel, id_attr, cached)
+                        set_novel_nu_id(novel_id, kind, cached)
 
             if getattr(novel, "nu_series_id", None):
                 logger.info(
@@ -820,13 +1869,18 @@ def submission_worker():
                     novel.name,
                 )
                 if not injected or str(injected.get("title_id", "")).strip() != str(novel.nu_series_id).strip():
+                    forget_nu_id("series", novel.name, novel.nu_series_id, novel_id)
                     raise Exception(
                         f"Series ID injection failed: expected={novel.nu_series_id!r} got={injected!r}"
                     )
             else:
-                _wait_results_then_type("#title_change_100", "livesearch", "series", novel.name)
+                _livesearch("#title_change_100", "series", novel.name)
+                found = pick_livesearch_hit(sb, "livesearch", novel.name)
+                if found:
+                    remember_nu_ids("series", {novel.name: found}, "livesearch", novel_id=novel_id)
+            _step_done("series")
 
-            release = f"v{vol}c{ch}" if vol else f"c{ch}"
+            release = format_release(vol, ch)
             link = ""
             try:
                 links_map = json.loads(novel.fenrir_links or "{}")
@@ -840,8 +1894,8 @@ def submission_worker():
                 else:
                     link = f"{novel.fenrir_url.rstrip('/')}/{ch}"
 
-            _set_value("#arrelease", release)
-            _set_value("#arlink", link)
+            nu_crawler.fill_form(sb, {"#arrelease": release, "#arlink": link})
+            _step_done("release")
 
             if getattr(novel, "nu_group_id", None):
                 logger.info(
@@ -889,11 +1943,16 @@ def submission_worker():
                     novel.group_name,
                 )
                 if not injected or str(injected.get("group_id", "")).strip() != str(novel.nu_group_id).strip():
+                    forget_nu_id("group", novel.group_name, novel.nu_group_id, novel_id)
                     raise Exception(
                         f"Group ID injection failed: expected={novel.nu_group_id!r} got={injected!r}"
                     )
             else:
-                _wait_results_then_type("#group_change_100", "livesearchgroup", "group", novel.group_name)
+                _livesearch("#group_change_100", "group", novel.group_name)
+                found = pick_livesearch_hit(sb, "livesearchgroup", novel.group_name)
+                if found:
+                    remember_nu_ids("group", {novel.group_name: found}, "livesearch", novel_id=novel_id)
+            _step_done("group")
 
             title_val = _get_value("#title_change_100").strip()
             group_val = _get_value("#group_change_100").strip()
@@ -960,28 +2019,34 @@ def submission_worker():
                 snippet = page_text_after[:600].replace("\n", " ")
                 raise Exception(f"NU submission not confirmed (still on form): {snippet}")
 
+            _step_done("submit")
             logger.info(f"✅ Submitted {novel.name} {release}")
+            outcome = ("done", None, None)
 
             time.sleep(random.uniform(2.0, 4.0))
 
         except Exception as e:
             if "rate limited (429)" in str(e).lower() or "too many requests" in str(e).lower():
                 # Back off and retry later by re-queueing the task.
-                try:
-                    submission_queue.put((novel, vol, ch))
-                except Exception:
-                    pass
                 sleep_s = random.randint(180, 300)
+                outcome = ("queued", str(e), datetime.now(timezone.utc) + timedelta(seconds=sleep_s))
+                _finish_submission(sub_id, *outcome)
                 logger.warning("⏳ NU rate limited. Backing off %ss", sleep_s)
                 time.sleep(sleep_s)
                 continue
             if "Active window was already closed" in str(e):
+                if attempts >= SUBMIT_MAX_ATTEMPTS:
+                    outcome = ("failed", f"{e} (gave up after {attempts} attempts)", None)
+                    logger.error("❌ Submission %s failed after %d attempts: %s", sub_id, attempts, e)
+                else:
+                    outcome = ("queued", str(e), None)
                 try:
                     browser.close()
                 except Exception:
                     pass
                 time.sleep(1)
                 continue
+            outcome = ("failed", str(e), None)
             try:
                 logger.error(
                     "❌ Submission failed: %s | title=%r group=%r release=%r link=%r",
@@ -994,15 +2059,626 @@ def submission_worker():
             except Exception:
                 logger.error(f"❌ Submission failed: {e}")
         finally:
+            SUBMISSIONS.inc(result=outcome[0])
             try:
-                submission_queue.task_done()
-            except Exception:
-                pass
+                _finish_submission(sub_id, *outcome)
+            except Exception as e:
+                logger.warning("⚠️ Could not record submission %s outcome: %s", sub_id, e)
             # Close Chrome once the queue is fully drained.
-            if submission_queue.empty():
+            if not _pending_submissions():
                 browser.close()
 
 
+# ------------------ HTTP CRAWL ENGINE ------------------
+
+# "http" tries the asyncio engine first and falls back to the browser when a
+# side comes back empty (Cloudflare challenge, client-rendered grid, ...).
+REFRESH_MODE = os.getenv("REFRESH_MODE", "browser")
+CRAWL_JOB_TIMEOUT = float(os.getenv("CRAWL_JOB_TIMEOUT", "600"))
+
+engine = crawl_engine.CrawlEngine()
+
+
+def store_refresh_result(novel_id, fenrir, links, nu, series_id=None):
+    """Write one refresh's chapter sets back to the novel row."""
+    with app.app_context():
+        nobj = db.session.get(Novel, novel_id)
+        if not nobj:
+            raise Exception("Novel not found")
+        nobj.fenrir_chapters = json.dumps(list(fenrir))
+        try:
+            nobj.fenrir_links = json.dumps(links)
+        except Exception:
+            nobj.fenrir_links = json.dumps({})
+        nobj.nu_chapters = json.dumps(list(nu))
+        nobj.last_checked = datetime.now(timezone.utc)
+        nobj.missing_count = len(compute_missing(nobj))
+        if series_id and not nobj.nu_series_id:
+            nobj.nu_series_id = series_id
+        name = nobj.name
+        # 0 Fenrir chapters = page gone (DMCA / removed). Flag as missing.
+        if fenrir:
+            nobj.status = "active"
+        else:
+            nobj.status = "missing"
+        db_commit()
+    if series_id:
+        remember_nu_ids("series", {name: series_id}, "page")
+
+
+def _load_engine_cookies():
+    """Reuse the saved browser login for NU requests made by the engine."""
+    cookies = nu_session.load_cookies() or []
+    engine.set_cookies(NU_BASE_URL, {c["name"]: c["value"] for c in cookies if "name" in c})
+
+
+async def http_nu_series_id(nu_url):
+    html = await engine.fetch(rebase_url(nu_url, "nu"))
+    return nu_crawler.series_id_from_html(html)
+
+
+async def http_nd_getchapters(sid, gid=None):
+    form = {"action": "nd_getchapters", "mypostid": str(sid)}
+    if gid:
+        form["mygrplist"] = str(gid)
+    html = await engine.fetch(
+        f"{NU_BASE_URL}/wp-admin/admin-ajax.php",
+        method="POST",
+        data=form,
+        headers={"X-Requested-With": "XMLHttpRequest", "Referer": f"{NU_BASE_URL}/"},
+    )
+    return parse_nu_chapter_html(html)
+
+
+async def http_fenrir_chapters(fenrir_url):
+    url = rebase_url(fenrir_url, "fenrir")
+    html = await engine.fetch(url)
+    return parse_fenrir_chapter_html(html, url)
+
+
+async def http_refresh_novel(fenrir_url, nu_url, series_id=None, group_id=None):
+    """Fenrir grid and NU chapter list fetched concurrently, without a browser."""
+
+    async def nu_side():
+        sid = series_id or await http_nu_series_id(nu_url)
+        if not sid:
+            return None, set()
+        return sid, await http_nd_getchapters(sid, group_id)
+
+    (fenrir, links), (sid, nu) = await asyncio.gather(http_fenrir_chapters(fenrir_url), nu_side())
+    return {"fenrir": fenrir, "links": links, "nu": nu, "series_id": sid}
+
+
+async def http_refresh_many(task_id, novels):
+    """
+    Refresh ``novels`` [(id, fenrir_url, nu_url, sid, gid)] concurrently.
+
+    Complete results are written through a thread executor (DB writes are
+    blocking); novels where either side came back empty are listed as
+    ``fallback`` for a browser refresh.
+    """
+    loop = asyncio.get_running_loop()
+    t = TASKS[task_id]
+    total = len(novels) or 1
+
+    async def one(novel_id, fenrir_url, nu_url, sid, gid):
+        try:
+            result = await http_refresh_novel(fenrir_url, nu_url, sid, gid)
+            if result["fenrir"] and result["nu"]:
+                await loop.run_in_executor(
+                    None, store_refresh_result,
+                    novel_id, result["fenrir"], result["links"], result["nu"], result["series_id"],
+                )
+                t["refreshed"].append(novel_id)
+            else:
+                t["fallback"].append(novel_id)
+        except Exception as e:
+            logger.warning("HTTP refresh of %s failed: %s", novel_id, e)
+            t["failed"].append(novel_id)
+        done = len(t["refreshed"]) + len(t["fallback"]) + len(t["failed"])
+        t["progress"] = int(done * 100 / total)
+        t["message"] = f"{done}/{len(novels)} novels fetched"
+
+    await asyncio.gather(*(one(*n) for n in novels))
+    t["status"] = "completed"
+    t["message"] = (
+        f"Refreshed {len(t['refreshed'])}, {len(t['fallback'])} need a browser refresh, {len(t['failed'])} failed"
+    )
+
+
+# ------------------ JOBS ------------------
+# Refresh and sync bodies, shared by the in-process task threads (JOB_MODE=thread)
+# and worker.py processes (JOB_MODE=worker). ``report(progress, message)`` is a
+# task-dict updater in the first case and a Job row update in the second.
+
+JOB_MODE = os.getenv("JOB_MODE", "thread")
+# A running job whose row has not been touched for this long lost its worker.
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "900"))
+
+
+def _task_reporter(task_id):
+    def report(progress, message):
+        TASKS[task_id]["progress"] = progress
+        TASKS[task_id]["message"] = message
+    return report
+
+
+def _no_report(progress, message):
+    pass
+
+
+def run_refresh_job(novel_id, mode="browser", report=None, close_browser=True):
+    """Crawl one novel (HTTP first when mode == 'http') and store the result."""
+    report = report or _no_report
+    with app.app_context():
+        novel = db.session.get(Novel, novel_id)
+        if not novel:
+            raise Exception("Novel not found")
+        fenrir_url, nu_url = novel.fenrir_url, novel.nu_url
+        series_id, group_id = novel.nu_series_id, novel.nu_group_id
+
+    if mode == "http":
+        report(10, "Fetching over HTTP...")
+        try:
+            _load_engine_cookies()
+            result = engine.run(http_refresh_novel(fenrir_url, nu_url, series_id, group_id), timeout=CRAWL_JOB_TIMEOUT)
+            if result["fenrir"] and result["nu"]:
+                store_refresh_result(novel_id, result["fenrir"], result["links"], result["nu"], result["series_id"])
+                return "Done"
+            logger.info("🌐 HTTP refresh of %s incomplete, falling back to the browser", novel_id)
+        except Exception as e:
+            logger.info("🌐 HTTP refresh of %s failed (%s), falling back to the browser", novel_id, e)
+
+    try:
+        report(10, "Loading Fenrir...")
+        sb = crawl_browser.get_sb()
+        with capture.session(f"novel-{novel_id}"):
+            f, flinks = crawl_fenrir_chapters(sb, fenrir_url)
+
+            report(55, "Loading NovelUpdates...")
+            n = crawl_nu_chapters(sb, nu_url, group_id=group_id, series_id=series_id)
+
+        # Extract series ID from the NU page we just visited (free — no extra request)
+        found_sid = None
+        if not series_id:
+            try:
+                found_sid = extract_nu_series_id(sb)
+            except Exception:
+                pass
+
+        store_refresh_result(novel_id, f, flinks, n, found_sid)
+        return "Done"
+    finally:
+        if close_browser:
+            crawl_browser.close()
+
+
+# Fetches NU series pages from inside the browser (login cookies and the
+# Cloudflare fingerprint come along), all URLs of a batch concurrently, and
+# returns {url, sid, fenrir_slug} for each. Used by the sync and the backfill.
+_NU_PAGE_BATCH_JS = """
+var urls = arguments[0];
+var fenrirRe = new RegExp(arguments[1], 'i');
+var sidPats = arguments[2].map(function(p) { return new RegExp(p, 'i'); });
+var callback = arguments[arguments.length - 1];
+Promise.all(urls.map(function(url) {
+    return fetch(url, {credentials: 'include'})
+        .then(function(r) { return r.text(); })
+        .then(function(html) {
+            var sid = null;
+            for (var i = 0; i < sidPats.length; i++) {
+                var m = sidPats[i].exec(html);
+                if (m) { sid = m[1]; break; }
+            }
+            var fenrirSlug = null;
+            var fm = fenrirRe.exec(html);
+            if (fm) { fenrirSlug = fm[1].toLowerCase(); }
+            return {url: url, sid: sid, fenrir_slug: fenrirSlug};
+        })
+        .catch(function() { return {url: url, sid: null, fenrir_slug: null}; });
+})).then(callback);
+"""
+
+
+def _fenrir_series_re():
+    """Fenrir series links embedded in NU pages, for whichever Fenrir host is configured."""
+    return (
+        r"https?://(?:www\.)?"
+        + re.escape(urlparse(FENRIR_BASE_URL).netloc.removeprefix("www."))
+        + r"/series/([a-z0-9][a-z0-9\-]*)"
+    )
+
+
+def run_sync_job(report=None, close_browser=True):
+    """Sync the Fenrir Realm group list from NU into the novel table."""
+    report = report or _no_report
+    try:
+        sb = crawl_browser.get_sb()
+
+        # ── Step 1: Load the Fenrir Realm group page on NU ──
+        report(3, "Loading Fenrir Realm group page...")
+        group_url = f"{NU_BASE_URL}/group/fenrir-realm/"
+        fast_open(sb, group_url, timeout_seconds=15)
+        time.sleep(3)
+
+        # ── Step 2: Extract novels from the hidden <select id="grouplst"> ──
+        records = []
+        try:
+            options = sb.find_elements("select#grouplst option")
+            for opt in options:
+                title = (sb.execute_script("return arguments[0].textContent;", opt) or "").strip()
+                nu_url = (opt.get_attribute("value") or "").strip()
+                if title and title != "---" and nu_url and nu_url != "---":
+                    records.append((title, nu_url))
+        except Exception as e:
+            logger.warning("grouplst parse failed: %s", e)
+
+        if not records:
+            raise RuntimeError("No novels found on group page (Cloudflare or layout change?)")
+
+        total = len(records)
+        logger.info("📋 Found %d novels on Fenrir Realm group page", total)
+
+        # Normalize URLs
+        normalized = []
+        for title, nu_url in records:
+            if nu_url.startswith("/"):
+                nu_url = NU_BASE_URL + nu_url
+            normalized.append((title, nu_url))
+
+        # ── Step 3: Batch-fetch all NU novel pages from inside the browser ──
+        # Running fetch() from within the browser carries login cookies + Cloudflare
+        # fingerprint automatically. Each batch fires up to BATCH_SIZE requests in
+        # parallel; we call execute_async_script once per batch and wait for all.
+        report(8, f"Found {total} novels. Fetching info in batches...")
+
+        BATCH_SIZE = 20
+        result_map = {}  # nu_url -> (series_id, fenrir_url)
+
+        try:
+            sb.driver.set_script_timeout(120)
+        except Exception:
+            pass
+
+        batches = [normalized[i:i + BATCH_SIZE] for i in range(0, total, BATCH_SIZE)]
+        done_count = 0
+
+        for batch in batches:
+            batch_urls = [nu_url for _, nu_url in batch]
+            try:
+                results = sb.driver.execute_async_script(
+                    _NU_PAGE_BATCH_JS, batch_urls, _fenrir_series_re(), nu_crawler.SERIES_ID_PATTERNS
+                )
+                for r in (results or []):
+                    slug = r.get("fenrir_slug")
+                    result_map[r["url"]] = (
+                        r.get("sid"),
+                        f"{FENRIR_BASE_URL}/series/{slug}" if slug else None,
+                    )
+            except Exception as e:
+                logger.warning("Batch fetch error: %s", e)
+                for _, nu_url in batch:
+                    result_map[nu_url] = (None, None)
+
+            done_count += len(batch)
+            report(8 + int(72 * (done_count / total)), f"Fetching info… {done_count}/{total}")
+            time.sleep(0.5)
+
+        # ── Step 4: Upsert all novels into DB ──
+        report(82, "Saving to database...")
+
+        records = []
+        for title, nu_url in normalized:
+            sid, fenrir_url = result_map.get(nu_url, (None, None))
+
+            # If no Fenrir URL was detected, generate a slug placeholder so the
+            # NOT NULL constraint is satisfied. Do NOT mark as missing here —
+            # novels haven't been checked yet. The refresh step sets missing when
+            # it actually gets 0 chapters back from Fenrir.
+            if not fenrir_url:
+                slug = title_to_fenrir_slug(title)
+                fenrir_url = f"{FENRIR_BASE_URL}/series/{slug}"
+
+            records.append(
+                {"name": title, "nu_url": nu_url, "fenrir_url": fenrir_url, "nu_series_id": sid}
+            )
+
+        with app.app_context():
+            added, skipped = upsert_synced_novels(records)
+
+        logger.info("📊 Sync: added=%d skipped=%d", added, skipped)
+
+        return f"Done! Added {added} new, skipped {skipped} existing."
+    finally:
+        if close_browser:
+            crawl_browser.close()
+
+
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "20"))
+
+
+def run_backfill_job(report=None, close_browser=True):
+    """
+    Fill in nu_series_id for every novel that lacks one.
+
+    NU pages are fetched from inside the crawl browser in concurrent batches
+    with _NU_PAGE_BATCH_JS, the script the sync uses; all ids found are written in one
+    transaction and added to the NU lookup cache.
+    """
+    report = report or _no_report
+    with app.app_context():
+        todo = db.session.execute(
+            db.select(Novel.id, Novel.name, Novel.nu_url).where(Novel.nu_series_id.is_(None)).order_by(Novel.id)
+        ).all()
+    if not todo:
+        return "Every novel already has a NU series id."
+
+    total = len(todo)
+    logger.info("🔎 Backfilling NU series ids for %d novels", total)
+    found = {}  # novel id -> (name, series id)
+    try:
+        sb = crawl_browser.get_sb()
+        # Same-origin fetches: start from a NU page so the session cookies apply.
+        report(3, "Opening NovelUpdates...")
+        fast_open(sb, f"{NU_BASE_URL}/", timeout_seconds=10)
+        try:
+            sb.driver.set_script_timeout(120)
+        except Exception:
+            pass
+
+        fenrir_re = _fenrir_series_re()
+        for start in range(0, total, BACKFILL_BATCH_SIZE):
+            batch = todo[start:start + BACKFILL_BATCH_SIZE]
+            urls = {rebase_url(nu_url, "nu"): (novel_id, name) for novel_id, name, nu_url in batch}
+            try:
+                results = sb.driver.execute_async_script(
+                    _NU_PAGE_BATCH_JS, list(urls), fenrir_re, nu_crawler.SERIES_ID_PATTERNS
+                ) or []
+            except Exception as e:
+                logger.warning("Backfill batch error: %s", e)
+                results = []
+            for r in results:
+                if r.get("sid") and r.get("url") in urls:
+                    novel_id, name = urls[r["url"]]
+                    found[novel_id] = (name, str(r["sid"]))
+
+            done = min(start + BACKFILL_BATCH_SIZE, total)
+            report(5 + int(85 * done / total), f"Fetched {done}/{total} NU pages, {len(found)} ids found")
+    finally:
+        if close_browser:
+            crawl_browser.close()
+
+    report(92, "Saving series ids...")
+    if found:
+        novels = Novel.__table__
+        with app.app_context(), db_write():
+            # One transaction for the whole library; a concurrent writer's id wins.
+            db.session.execute(
+                novels.update()
+                .where(novels.c.id == bindparam("_id"), novels.c.nu_series_id.is_(None))
+                .values(nu_series_id=bindparam("_sid")),
+                [{"_id": novel_id, "_sid": sid} for novel_id, (_name, sid) in found.items()],
+            )
+        remember_nu_ids("series", {name: sid for name, sid in found.values()}, "page")
+
+    logger.info("📊 Backfill: %d/%d series ids found", len(found), total)
+    return f"Done! Found series ids for {len(found)} of {total} novels."
+
+
+JOB_RUNNERS = {"refresh": run_refresh_job, "sync": run_sync_job, "backfill": run_backfill_job}
+
+
+def enqueue_job(kind, novel_id=None, payload=None):
+    """
+    Queue a crawl job, or return the id of the same job already pending.
+
+    Deduplication is the uq_job_pending index's job, so it holds across
+    processes: the insert is a no-op when a pending twin exists, and that
+    twin's id is returned instead.
+    """
+    table = Job.__table__
+    now = _utcnow()
+    with app.app_context(), db_write():
+        job_id = db.session.execute(
+            sqlite_insert(table)
+            .values(kind=kind, novel_id=novel_id, payload=json.dumps(payload or {}), status="queued",
+                    progress=0, attempts=0, created_at=now, updated_at=now)
+            .on_conflict_do_nothing()
+            .returning(table.c.id)
+        ).scalar()
+        if job_id is None:
+            job_id = db.session.execute(
+                db.select(table.c.id).where(
+                    table.c.kind == kind,
+                    table.c.novel_id.is_(None) if novel_id is None else table.c.novel_id == novel_id,
+                    table.c.status.in_(("queued", "running")),
+                )
+            ).scalar()
+    return job_id
+
+
+def claim_next_job(worker_id, kinds=None):
+    """Atomically move the oldest queued job (of ``kinds``) to running."""
+    table = Job.__table__
+    now = _utcnow()
+    cond = [table.c.status == "queued"]
+    if kinds:
+        cond.append(table.c.kind.in_(list(kinds)))
+    next_id = db.select(table.c.id).where(*cond).order_by(table.c.id).limit(1).scalar_subquery()
+    with _DB_WRITE_LOCK, app.app_context():
+        row = db.session.execute(
+            db.update(table)
+            .where(table.c.id == next_id)
+            .values(status="running", worker=worker_id, attempts=table.c.attempts + 1,
+                    progress=0, message="Starting...", started_at=now, updated_at=now)
+            .returning(table.c.id, table.c.kind, table.c.novel_id, table.c.payload)
+        ).first()
+        db_commit()
+    return row
+
+
+def update_job(job_id, **values):
+    values["updated_at"] = _utcnow()
+    with app.app_context(), db_write():
+        db.session.execute(db.update(Job).where(Job.id == job_id).values(**values))
+
+
+def requeue_stale_jobs(max_age_seconds=None):
+    """Put running jobs whose worker stopped reporting back in the queue."""
+    cutoff = _utcnow() - timedelta(seconds=max_age_seconds or JOB_STALE_SECONDS)
+    with app.app_context(), db_write():
+        res = db.session.execute(
+            db.update(Job)
+            .where(Job.status == "running", Job.updated_at < cutoff)
+            .values(status="queued", message="Requeued (worker lost)", updated_at=_utcnow())
+        )
+    return res.rowcount
+
+
+def run_claimed_job(job_row, close_browser=True):
+    """Run a claimed job to completion, recording progress and outcome on its row."""
+    job_id, kind, novel_id, payload = job_row
+    opts = json.loads(payload or "{}")
+
+    def report(progress, message):
+        update_job(job_id, progress=progress, message=message)
+
+    try:
+        if kind == "refresh":
+            message = run_refresh_job(novel_id, mode=opts.get("mode") or REFRESH_MODE,
+                                      report=report, close_browser=close_browser)
+        else:
+            message = JOB_RUNNERS[kind](report=report, close_browser=close_browser)
+        update_job(job_id, status="done", progress=100, message=message, finished_at=_utcnow())
+        return True
+    except Exception as e:
+        logger.error("❌ Job %s (%s) failed: %s", job_id, kind, e)
+        update_job(job_id, status="failed", message=str(e), finished_at=_utcnow())
+        return False
+
+
+# ------------------ NODES / LEASES ------------------
+# Scale-out refresh: every `worker.py node` process registers a WorkerNode row,
+# leases a batch of due novels, refreshes them with its own browser and renews
+# its leases with each heartbeat. Leases expire on their own; nodes that stop
+# heartbeating are marked dead and their leases freed immediately.
+
+LEASE_TTL_SECONDS = int(os.getenv("LEASE_TTL_SECONDS", "300"))
+NODE_DEAD_SECONDS = int(os.getenv("NODE_DEAD_SECONDS", "90"))
+# Failed novels stay unleasable this long so a bad page doesn't spin every node.
+LEASE_FAIL_BACKOFF_SECONDS = int(os.getenv("LEASE_FAIL_BACKOFF_SECONDS", "600"))
+
+
+def parse_shard(spec):
+    """'2/4' -> (2, 4): this node only takes novels with id % 4 == 2."""
+    if not spec:
+        return None
+    index, count = (int(x) for x in str(spec).split("/", 1))
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"bad shard {spec!r}, expected i/n with 0 <= i < n")
+    return index, count
+
+
+def node_heartbeat(node_id, shard=None, refreshed=0, failed=0, status="alive"):
+    """Upsert the node row and extend every lease it holds."""
+    now = _utcnow()
+    table = WorkerNode.__table__
+    # Always called from inside the node process itself.
+    stmt = sqlite_insert(table).values(
+        id=node_id, host=socket.gethostname(), pid=os.getpid(), shard=shard, started_at=now, heartbeat_at=now, refreshed=refreshed, failed=failed, status=status,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={"heartbeat_at": now, "refreshed": refreshed, "failed": failed, "status": status},
+    )
+    novel = Novel.__table__
+    with _DB_WRITE_LOCK, app.app_context():
+        db.session.execute(stmt)
+        if status == "alive":
+            db.session.execute(
+                db.update(novel)
+                .where(novel.c.lease_owner == node_id)
+                .values(lease_expires=now + timedelta(seconds=LEASE_TTL_SECONDS), updated_at=novel.c.updated_at)
+            )
+        db_commit()
+
+
+def lease_novels(node_id, limit, min_age_seconds=0, shard=None):
+    """
+    Atomically lease up to ``limit`` due active novels for ``node_id``.
+
+    Due = never checked or checked more than ``min_age_seconds`` ago, oldest
+    first, and not under a live lease. ``shard`` (index, count) restricts the
+    node to ``id % count == index``. Returns the leased novel ids.
+    """
+    table = Novel.__table__
+    now = _utcnow()
+    cond = [
+        table.c.status == "active",
+        db.or_(table.c.lease_expires.is_(None), table.c.lease_expires < now),
+    ]
+    if min_age_seconds:
+        cutoff = now - timedelta(seconds=min_age_seconds)
+        cond.append(db.or_(table.c.last_checked.is_(None), table.c.last_checked < cutoff))
+    if shard:
+        cond.append(table.c.id % shard[1] == shard[0])
+    due = (
+        db.select(table.c.id)
+        .where(*cond)
+        .order_by(table.c.last_checked.is_not(None), table.c.last_checked, table.c.id)
+        .limit(limit)
+    )
+    with _DB_WRITE_LOCK, app.app_context():
+        ids = db.session.execute(
+            db.update(table)
+            .where(table.c.id.in_(due.scalar_subquery()))
+            .values(
+                lease_owner=node_id,
+                lease_expires=now + timedelta(seconds=LEASE_TTL_SECONDS),
+                # Leasing is bookkeeping; don't invalidate list ETags.
+                updated_at=table.c.updated_at,
+            )
+            .returning(table.c.id)
+        ).scalars().all()
+        db_commit()
+    return sorted(ids)
+
+
+def release_lease(novel_id, node_id, backoff_seconds=0):
+    """Give a lease back; with ``backoff_seconds`` the novel stays unleasable that long."""
+    table = Novel.__table__
+    expires = _utcnow() + timedelta(seconds=backoff_seconds) if backoff_seconds else None
+    with _DB_WRITE_LOCK, app.app_context():
+        db.session.execute(
+            db.update(table)
+            .where(table.c.id == novel_id, table.c.lease_owner == node_id)
+            .values(lease_owner=None, lease_expires=expires, updated_at=table.c.updated_at)
+        )
+        db_commit()
+
+
+def reclaim_dead_leases():
+    """Mark nodes without a recent heartbeat dead and free their leases."""
+    cutoff = _utcnow() - timedelta(seconds=NODE_DEAD_SECONDS)
+    novel = Novel.__table__
+    with _DB_WRITE_LOCK, app.app_context():
+        dead = db.session.execute(
+            db.update(WorkerNode)
+            .where(WorkerNode.status == "alive", WorkerNode.heartbeat_at < cutoff)
+            .values(status="dead")
+            .returning(WorkerNode.id)
+        ).scalars().all()
+        freed = 0
+        if dead:
+            freed = db.session.execute(
+                db.update(novel)
+                .where(novel.c.lease_owner.in_(dead))
+                .values(lease_owner=None, lease_expires=None, updated_at=novel.c.updated_at)
+            ).rowcount
+        db_commit()
+    return dead, freed
+
+
 # ------------------ API ------------------
 
 
@@ -1011,6 +2687,34 @@ def index():
     return render_template("index.html")
 
 
+_NOVEL_SORTS = {
+    "name": Novel.name,
+    "last_checked": Novel.last_checked,
+    "updated": Novel.updated_at,
+    "missing": Novel.missing_count,
+}
+
+
+def _int_arg(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _parse_iso_datetime(value):
+    """Parse an ISO timestamp into the naive-UTC form SQLite DateTime columns hold."""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
 @app.route("/api/novels", methods=["GET", "POST"])
 def novels():
     if request.method == "POST":
@@ -1025,18 +2729,85 @@ def novels():
             status="active",
         )
         db.session.add(n)
-        db.session.commit()
+        try:
+            db_commit()
+        except IntegrityError:
+            return jsonify({"error": "A novel with this NU URL is already tracked"}), 409
         return jsonify(n.to_dict()), 201
 
+    args = request.args
+    # Cheap whole-library fingerprint: any insert, update or delete changes it.
+    count, max_updated, id_sum = db.session.execute(
+        db.select(func.count(Novel.id), func.max(Novel.updated_at), func.coalesce(func.sum(Novel.id), 0))
+    ).one()
+    cursor = max_updated.isoformat() if max_updated else None
+    etag = hashlib.sha1(
+        f"{count}:{cursor}:{id_sum}:{request.query_string.decode()}".encode()
+    ).hexdigest()
+    cached = _if_none_match(etag)
+    if cached:
+        resp = app.response_class(status=304)
+        resp.set_etag(cached)
+        resp.vary.add("Accept-Encoding")
+        return resp
+
     # ?all=1 returns every novel including missing/dmca ones
-    include_all = request.args.get("all", "0") == "1"
-    if include_all:
-        rows = Novel.query.order_by(Novel.name).all()
-    else:
-        rows = Novel.query.filter(
-            db.or_(Novel.status == "active", Novel.status == None)  # noqa: E711
-        ).order_by(Novel.name).all()
-    return jsonify([n.to_dict() for n in rows])
+    status = args.get("status") or ("all" if args.get("all", "0") == "1" else "active")
+    query = Novel.query
+    if status != "all":
+        # NULL statuses are normalized to 'active' by migration 3, so this stays
+        # a single range scan on ix_novel_status_name (no sort step).
+        query = query.filter(Novel.status == status)
+
+    q = (args.get("q") or "").strip()
+    if q:
+        # SQLite LIKE is case-insensitive for ASCII.
+        escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.filter(Novel.name.like(f"%{escaped}%", escape="\\"))
+    if args.get("has_missing") == "1":
+        query = query.filter(Novel.missing_count > 0)
+
+    since = _parse_iso_datetime(args.get("since"))
+    paginated = any(k in args for k in ("page", "per_page", "since"))
+
+    if not paginated:
+        # Legacy shape: a bare array ordered by name.
+        rows = query.order_by(Novel.name).all()
+        resp = jsonify([n.to_dict() for n in rows])
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
+
+    sort_col = _NOVEL_SORTS.get(args.get("sort", "name"), Novel.name)
+    sort_col = sort_col.desc() if args.get("order") == "desc" else sort_col.asc()
+
+    ids = None
+    if since is not None:
+        # Delta mode: rows changed at/after the cursor, plus the current id set
+        # (first page only) so the client can drop deleted rows.
+        if args.get("page", "1") == "1":
+            ids = [r for r, in query.with_entities(Novel.id).all()]
+        query = query.filter(Novel.updated_at >= since)
+
+    page = max(1, _int_arg(args.get("page"), 1))
+    per_page = min(500, max(1, _int_arg(args.get("per_page"), 100)))
+    total = query.order_by(None).count()
+    rows = query.order_by(sort_col, Novel.id).offset((page - 1) * per_page).limit(per_page).all()
+
+    body = {
+        "items": [n.to_dict() for n in rows],
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": max(1, -(-total // per_page)),
+        "cursor": cursor,
+    }
+    if ids is not None:
+        body["ids"] = ids
+    resp = jsonify(body)
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
 
 
 @app.route("/api/novels/<int:novel_id>", methods=["DELETE"])
@@ -1045,7 +2816,7 @@ def delete_novel(novel_id):
     if not novel:
         return jsonify({"error": "Novel not found"}), 404
     db.session.delete(novel)
-    db.session.commit()
+    db_commit()
     return jsonify({"deleted": True, "id": novel_id})
 
 
@@ -1056,7 +2827,7 @@ def reactivate_novel(novel_id):
     if not novel:
         return jsonify({"error": "Novel not found"}), 404
     novel.status = "active"
-    db.session.commit()
+    db_commit()
     return jsonify(novel.to_dict())
 
 
@@ -1067,7 +2838,7 @@ def mark_novel_missing(novel_id):
     if not novel:
         return jsonify({"error": "Novel not found"}), 404
     novel.status = "missing"
-    db.session.commit()
+    db_commit()
     return jsonify(novel.to_dict())
 
 
@@ -1084,6 +2855,11 @@ def refresh(novel_id):
             "error": "Novel is marked missing (no Fenrir page found). Use reactivate first or pass force:true."
         }), 409
 
+    mode = (request.get_json(silent=True) or {}).get("mode") or REFRESH_MODE
+    if JOB_MODE == "worker":
+        job_id = enqueue_job("refresh", novel_id, {"mode": mode})
+        return jsonify({"task_id": f"job-{job_id}"})
+
     task_id = uuid.uuid4().hex
     TASKS[task_id] = {
         "status": "running",
@@ -1093,51 +2869,12 @@ def refresh(novel_id):
 
     def task():
         try:
-            TASKS[task_id]["progress"] = 10
-            TASKS[task_id]["message"] = "Loading Fenrir..."
-            sb = browser.get_sb()
-            f, flinks = crawl_fenrir_chapters(sb, novel.fenrir_url)
-
-            TASKS[task_id]["progress"] = 55
-            TASKS[task_id]["message"] = "Loading NovelUpdates..."
-            n = crawl_nu_chapters(sb, novel.nu_url, group_id=getattr(novel, "nu_group_id", None), series_id=getattr(novel, "nu_series_id", None))
-
-            # Extract series ID from the NU page we just visited (free — no extra request)
-            series_id = None
-            if not getattr(novel, "nu_series_id", None):
-                try:
-                    series_id = extract_nu_series_id(sb)
-                except Exception:
-                    pass
-
-            with app.app_context():
-                nobj = db.session.get(Novel, novel_id)
-                if not nobj:
-                    raise Exception("Novel not found")
-                nobj.fenrir_chapters = json.dumps(list(f))
-                try:
-                    nobj.fenrir_links = json.dumps(flinks)
-                except Exception:
-                    nobj.fenrir_links = json.dumps({})
-                nobj.nu_chapters = json.dumps(list(n))
-                nobj.last_checked = datetime.now(timezone.utc)
-                if series_id:
-                    nobj.nu_series_id = series_id
-                # 0 Fenrir chapters = page gone (DMCA / removed). Flag as missing.
-                if f:
-                    nobj.status = "active"
-                else:
-                    nobj.status = "missing"
-                db.session.commit()
-
+            TASKS[task_id]["message"] = run_refresh_job(novel_id, mode=mode, report=_task_reporter(task_id))
             TASKS[task_id]["progress"] = 100
-            TASKS[task_id]["message"] = "Done"
             TASKS[task_id]["status"] = "completed"
         except Exception as e:
             TASKS[task_id]["status"] = "error"
             TASKS[task_id]["message"] = str(e)
-        finally:
-            browser.close()
 
     threading.Thread(target=task, daemon=True).start()
     return jsonify({"task_id": task_id})
@@ -1145,179 +2882,143 @@ def refresh(novel_id):
 
 @app.route("/api/tasks/<task_id>")
 def task_status(task_id):
+    if task_id.startswith("job-") and task_id[4:].isdigit():
+        job = db.session.get(Job, int(task_id[4:]))
+        if not job:
+            return jsonify({"status": "error", "message": "Task not found"}), 404
+        return jsonify(job.to_task())
     t = TASKS.get(task_id)
     if not t:
         return jsonify({"status": "error", "message": "Task not found"}), 404
     return jsonify(t)
 
 
+@app.route("/api/jobs")
+def jobs():
+    """Recent crawl jobs (worker mode) and counts per status."""
+    limit = min(max(_int_arg(request.args.get("limit"), 50), 1), 500)
+    rows = db.session.execute(db.select(Job).order_by(Job.id.desc()).limit(limit)).scalars()
+    counts = dict(db.session.execute(db.select(Job.status, func.count(Job.id)).group_by(Job.status)).all())
+    return jsonify({
+        "mode": JOB_MODE,
+        "counts": counts,
+        "jobs": [
+            {"id": j.id, "kind": j.kind, "novel_id": j.novel_id, "status": j.status, "progress": j.progress,
+             "message": j.message, "worker": j.worker, "attempts": j.attempts}
+            for j in rows
+        ],
+    })
+
+
+@app.route("/api/crawl-jobs", methods=["POST"])
+def crawl_jobs():
+    """
+    Refresh many novels over HTTP on the asyncio engine.
+
+    Body: {"novel_ids": [...]} or {"all": true} (active novels). Returns a task
+    id; the task lists refreshed, fallback (need a browser refresh) and failed
+    novel ids.
+    """
+    data = request.get_json(silent=True) or {}
+    query = db.select(Novel)
+    if data.get("all"):
+        query = query.where(Novel.status == "active")
+    else:
+        ids = [i for i in (data.get("novel_ids") or []) if isinstance(i, int)]
+        if not ids:
+            return jsonify({"error": "novel_ids or all required"}), 400
+        query = query.where(Novel.id.in_(ids))
+
+    novels = [
+        (n.id, n.fenrir_url, n.nu_url, n.nu_series_id, n.nu_group_id)
+        for n in db.session.execute(query).scalars()
+        if n.fenrir_url and n.nu_url
+    ]
+    task_id = uuid.uuid4().hex
+    TASKS[task_id] = {
+        "status": "running",
+        "progress": 0,
+        "message": f"Queued {len(novels)} novels",
+        "refreshed": [],
+        "fallback": [],
+        "failed": [],
+    }
+    _load_engine_cookies()
+
+    def _done(fut):
+        exc = fut.exception()
+        if exc:
+            TASKS[task_id]["status"] = "error"
+            TASKS[task_id]["message"] = str(exc)
+
+    engine.submit(http_refresh_many(task_id, novels)).add_done_callback(_done)
+    return jsonify({"task_id": task_id, "novels": len(novels)})
+
+
+@app.route("/api/nodes")
+def nodes():
+    """Refresh nodes with heartbeat age and the number of leases each holds."""
+    now = _utcnow()
+    held = dict(
+        db.session.execute(
+            db.select(Novel.lease_owner, func.count(Novel.id))
+            .where(Novel.lease_owner.is_not(None), Novel.lease_expires > now)
+            .group_by(Novel.lease_owner)
+        ).all()
+    )
+    rows = db.session.execute(db.select(WorkerNode).order_by(WorkerNode.started_at.desc())).scalars()
+    out = []
+    for n in rows:
+        age = (now - n.heartbeat_at.replace(tzinfo=timezone.utc)).total_seconds() if n.heartbeat_at else None
+        out.append({
+            "id": n.id, "host": n.host, "shard": n.shard, "status": n.status,
+            "heartbeat_age_s": round(age, 1) if age is not None else None,
+            "refreshed": n.refreshed, "failed": n.failed, "leases": held.get(n.id, 0),
+        })
+    return jsonify(out)
+
+
 @app.route("/api/sync-fenrir", methods=["POST"])
 def sync_fenrir():
     """Scrape NU's Fenrir Realm group page, build Fenrir URLs, extract series IDs, upsert novels."""
+    if JOB_MODE == "worker":
+        return jsonify({"task_id": f"job-{enqueue_job('sync')}"})
+
     task_id = uuid.uuid4().hex
     TASKS[task_id] = {"status": "running", "progress": 0, "message": "Starting sync..."}
 
     def task():
-        import requests as req_lib
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-
         try:
-            sb = browser.get_sb()
-
-            # ── Step 1: Load the Fenrir Realm group page on NU ──
-            TASKS[task_id]["message"] = "Loading Fenrir Realm group page..."
-            TASKS[task_id]["progress"] = 3
-            group_url = "https://www.novelupdates.com/group/fenrir-realm/"
-            fast_open(sb, group_url, timeout_seconds=15)
-            time.sleep(3)
-
-            # ── Step 2: Extract novels from the hidden <select id="grouplst"> ──
-            records = []
-            try:
-                options = sb.find_elements("select#grouplst option")
-                for opt in options:
-                    title = (sb.execute_script("return arguments[0].textContent;", opt) or "").strip()
-                    nu_url = (opt.get_attribute("value") or "").strip()
-                    if title and title != "---" and nu_url and nu_url != "---":
-                        records.append((title, nu_url))
-            except Exception as e:
-                logger.warning("grouplst parse failed: %s", e)
-
-            if not records:
-                TASKS[task_id]["status"] = "error"
-                TASKS[task_id]["message"] = "No novels found on group page (Cloudflare or layout change?)"
-                return
-
-            total = len(records)
-            logger.info("📋 Found %d novels on Fenrir Realm group page", total)
-
-            # Normalize URLs
-            normalized = []
-            for title, nu_url in records:
-                if nu_url.startswith("/"):
-                    nu_url = "https://www.novelupdates.com" + nu_url
-                normalized.append((title, nu_url))
+            TASKS[task_id]["message"] = run_sync_job(report=_task_reporter(task_id))
+            TASKS[task_id]["progress"] = 100
+            TASKS[task_id]["status"] = "completed"
+        except Exception as e:
+            logger.error("sync-fenrir task error: %s", e)
+            TASKS[task_id]["status"] = "error"
+            TASKS[task_id]["message"] = str(e)
 
-            # ── Step 3: Batch-fetch all NU novel pages from inside the browser ──
-            # Running fetch() from within the browser carries login cookies + Cloudflare
-            # fingerprint automatically. Each batch fires up to BATCH_SIZE requests in
-            # parallel; we call execute_async_script once per batch and wait for all.
-            TASKS[task_id]["message"] = f"Found {total} novels. Fetching info in batches..."
-            TASKS[task_id]["progress"] = 8
+    threading.Thread(target=task, daemon=True).start()
+    return jsonify({"task_id": task_id})
 
-            BATCH_SIZE = 20
-            result_map = {}  # nu_url -> (series_id, fenrir_url)
 
-            try:
-                sb.driver.set_script_timeout(120)
-            except Exception:
-                pass
+@app.route("/api/backfill-series-ids", methods=["POST"])
+def backfill_series_ids():
+    """Look up the NU series id of every novel that has none."""
+    if JOB_MODE == "worker":
+        return jsonify({"task_id": f"job-{enqueue_job('backfill')}"})
 
-            # JS that fires all URLs in the batch concurrently and returns results
-            _BATCH_JS = """
-var urls = arguments[0];
-var callback = arguments[arguments.length - 1];
-Promise.all(urls.map(function(url) {
-    return fetch(url, {credentials: 'include'})
-        .then(function(r) { return r.text(); })
-        .then(function(html) {
-            var sidPats = [
-                /id="mypostid"\\s+value="(\\d+)"/i,
-                /\\bpostid-(\\d+)\\b/,
-                /\\bseries_id['"]?\\s*[:=]\\s*['"]?(\\d+)/i,
-                /\\bpost_id['"]?\\s*[:=]\\s*['"]?(\\d+)/i
-            ];
-            var sid = null;
-            for (var i = 0; i < sidPats.length; i++) {
-                var m = sidPats[i].exec(html);
-                if (m) { sid = m[1]; break; }
-            }
-            var fenrirSlug = null;
-            var fm = /https?:\\/\\/(?:www\\.)?fenrirealm\\.com\\/series\\/([a-z0-9][a-z0-9\\-]*)/i.exec(html);
-            if (fm) { fenrirSlug = fm[1].toLowerCase(); }
-            return {url: url, sid: sid, fenrir_slug: fenrirSlug};
-        })
-        .catch(function() { return {url: url, sid: null, fenrir_slug: null}; });
-})).then(callback);
-"""
-
-            batches = [normalized[i:i + BATCH_SIZE] for i in range(0, total, BATCH_SIZE)]
-            done_count = 0
-
-            for batch in batches:
-                batch_urls = [nu_url for _, nu_url in batch]
-                try:
-                    results = sb.driver.execute_async_script(_BATCH_JS, batch_urls)
-                    for r in (results or []):
-                        slug = r.get("fenrir_slug")
-                        result_map[r["url"]] = (
-                            r.get("sid"),
-                            f"https://fenrirealm.com/series/{slug}" if slug else None,
-                        )
-                except Exception as e:
-                    logger.warning("Batch fetch error: %s", e)
-                    for _, nu_url in batch:
-                        result_map[nu_url] = (None, None)
-
-                done_count += len(batch)
-                pct = 8 + int(72 * (done_count / total))
-                TASKS[task_id]["progress"] = pct
-                TASKS[task_id]["message"] = f"Fetching info… {done_count}/{total}"
-                time.sleep(0.5)
-
-            # ── Step 5: Upsert all novels into DB ──
-            TASKS[task_id]["message"] = "Saving to database..."
-            TASKS[task_id]["progress"] = 82
-
-            added = 0
-            skipped = 0
-            with app.app_context():
-                for title, nu_url in normalized:
-                    sid, fenrir_url = result_map.get(nu_url, (None, None))
-
-                    # If no Fenrir URL was detected, generate a slug placeholder so the
-                    # NOT NULL constraint is satisfied. Do NOT mark as missing here —
-                    # novels haven't been checked yet. The refresh step sets missing when
-                    # it actually gets 0 chapters back from Fenrir.
-                    if not fenrir_url:
-                        slug = title_to_fenrir_slug(title)
-                        fenrir_url = f"https://fenrirealm.com/series/{slug}"
-
-                    existing = Novel.query.filter_by(nu_url=nu_url).first()
-                    if existing:
-                        if sid and not existing.nu_series_id:
-                            existing.nu_series_id = sid
-                        # Update Fenrir URL if we got a better (non-slug) one.
-                        if fenrir_url:
-                            existing.fenrir_url = fenrir_url
-                        skipped += 1
-                    else:
-                        n = Novel(
-                            name=title,
-                            fenrir_url=fenrir_url,
-                            nu_url=nu_url,
-                            group_name="Fenrir Realm",
-                            nu_series_id=sid,
-                            nu_group_id="78568",
-                            status="active",
-                        )
-                        db.session.add(n)
-                        added += 1
-
-                db.session.commit()
-
-            logger.info("📊 Sync: added=%d skipped=%d", added, skipped)
+    task_id = uuid.uuid4().hex
+    TASKS[task_id] = {"status": "running", "progress": 0, "message": "Starting backfill..."}
 
+    def task():
+        try:
+            TASKS[task_id]["message"] = run_backfill_job(report=_task_reporter(task_id))
             TASKS[task_id]["progress"] = 100
             TASKS[task_id]["status"] = "completed"
-            TASKS[task_id]["message"] = f"Done! Added {added} new, skipped {skipped} existing."
-
         except Exception as e:
-            logger.error("sync-fenrir task error: %s", e)
+            logger.error("backfill task error: %s", e)
             TASKS[task_id]["status"] = "error"
             TASKS[task_id]["message"] = str(e)
-        finally:
-            browser.close()
 
     threading.Thread(target=task, daemon=True).start()
     return jsonify({"task_id": task_id})
@@ -1325,31 +3026,256 @@ Promise.all(urls.map(function(url) {
 
 @app.route("/api/novels/<int:novel_id>/missing")
 def missing(novel_id):
+    """
+    Missing chapters, optionally bounded and paged.
+
+    ?from=v2c78 / ?to=c300   inclusive bounds
+    ?format=ranges           collapse into runs ("c101-c245") instead of single chapters
+    ?limit=N&cursor=<label>  page size (in returned items) and the exclusive start
+    """
     novel = db.session.get(Novel, novel_id)
     if not novel:
         return jsonify({"error": "Novel not found"}), 404
     missing = compute_missing(novel)
-    return jsonify(
-        {"count": len(missing), "missing": [{"vol": v, "ch": c} for v, c in missing]}
-    )
+    args = request.args
+    if not any(k in args for k in ("from", "to", "format", "limit", "cursor")):
+        return jsonify(
+            {"count": len(missing), "missing": [{"vol": v, "ch": c} for v, c in missing]}
+        )
+
+    for key in ("from", "to", "cursor"):
+        if args.get(key) and parse_release_label(args[key]) is None:
+            return jsonify({"error": f"Invalid {key!r}: use v2c78 or c32"}), 400
+
+    lo = parse_release_label(args.get("from"))
+    hi = parse_release_label(args.get("to"))
+    after = parse_release_label(args.get("cursor"))
+    selected = [
+        (int(v or 0), c) for v, c in missing
+        if (lo is None or (int(v or 0), c) >= lo)
+        and (hi is None or (int(v or 0), c) <= hi)
+        and (after is None or (int(v or 0), c) > after)
+    ]
+
+    as_ranges = args.get("format") == "ranges"
+    items = encode_missing_ranges(selected) if as_ranges else selected
+    limit = _int_arg(args.get("limit"), 0)
+    next_cursor = None
+    if limit > 0 and len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = format_release(last["vol"], last["to"]) if as_ranges else format_release(*last)
+
+    body = {"count": len(missing), "matched": len(selected), "next_cursor": next_cursor}
+    if as_ranges:
+        body["ranges"] = items
+    else:
+        body["missing"] = [{"vol": v, "ch": c} for v, c in items]
+    return jsonify(body)
+
+
+def _parse_submit_chapter(item):
+    """One explicit chapter as {"vol", "ch"}."""
+    if not isinstance(item, dict):
+        raise ValueError(f"bad chapter {item!r}")
+    return int(item.get("vol") or 0), int(item["ch"])
+
+
+def _parse_submit_range(item):
+    """A range as {"vol", "from", "to"} or a label like "v2c78-v2c90" / "c101-c245"."""
+    if isinstance(item, dict):
+        vol = int(item.get("vol") or 0)
+        lo, hi = int(item["from"]), int(item.get("to", item["from"]))
+        return (vol, lo), (vol, hi)
+    parts = str(item).split("-")
+    lo = parse_release_label(parts[0])
+    hi = parse_release_label(parts[-1])
+    if lo is None or hi is None or len(parts) > 2:
+        raise ValueError(f"bad range {item!r}")
+    if len(parts) == 2 and hi[0] == 0 and lo[0]:
+        hi = (lo[0], hi[1])  # "v2c78-c90" means v2c78-v2c90
+    return lo, hi
 
 
 @app.route("/api/novels/<int:novel_id>/submit", methods=["POST"])
 def submit(novel_id):
+    """
+    Queue missing chapters for submission. Accepts any combination of:
+
+      "chapters": [{"vol": 2, "ch": 78}, ...]
+      "ranges":   [{"vol": 2, "from": 78, "to": 90}, "c101-c245", ...]
+      "from":     "v2c78"   (every missing chapter from this release on)
+      "all":      true      (every missing chapter)
+
+    Ranges and "from"/"all" are expanded against the stored missing set;
+    explicit "chapters" must all be missing, otherwise the request is rejected
+    with the offending releases listed. The selection is deduped against
+    queued/in-flight rows and inserted in one transaction.
+    """
     novel = db.session.get(Novel, novel_id)
-    data = request.json
+    if not novel:
+        return jsonify({"error": "Novel not found"}), 404
+    data = request.get_json(silent=True) or {}
 
-    for c in data["chapters"]:
-        submission_queue.put((novel_id, c.get("vol"), c["ch"]))
+    missing_set = [(int(v or 0), c) for v, c in compute_missing(novel)]
+    wanted = set()
+    try:
+        explicit = {_parse_submit_chapter(c) for c in data.get("chapters") or []}
+        wanted.update(explicit)
+        for item in data.get("ranges") or []:
+            lo, hi = _parse_submit_range(item)
+            wanted.update(m for m in missing_set if lo <= m <= hi)
+        if data.get("all"):
+            wanted.update(missing_set)
+        elif data.get("from"):
+            start = parse_release_label(data["from"])
+            if start is None:
+                raise ValueError(f"bad 'from' {data['from']!r}")
+            wanted.update(m for m in missing_set if m >= start)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid submit request: {e}"}), 400
+
+    not_missing = sorted(explicit - set(missing_set))
+    if not_missing:
+        return jsonify({
+            "error": "Some chapters are not missing on NU",
+            "not_missing": [format_release(v, c) for v, c in not_missing],
+        }), 400
+
+    queued = enqueue_submissions(novel_id, wanted)
+    return jsonify({
+        "queued": queued,
+        "already_queued": len(wanted) - queued,
+    })
+
+
+@app.route("/api/nu-strategies")
+def nu_strategies():
+    """Global NU strategy stats (attempts, hits, smoothed seconds, failure streaks)."""
+    return jsonify(nu_strategy_stats.snapshot())
+
+
+@app.route("/api/browsers")
+def browsers():
+    """Running browsers with their launch profile and resident memory."""
+    return jsonify([b.status() for b in BROWSERS])
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus scrape endpoint (crawl timings, strategy hit rates, submissions)."""
+    for b in BROWSERS:
+        b.memory_bytes()
+    return Response(metrics.render_latest(), content_type=metrics.CONTENT_TYPE)
+
+
+# ------------------ COMPRESSION ------------------
+
+GZIP_MIN_BYTES = 1024
+# Gzipped bodies are a different representation, so they get their own strong
+# ETag: the uncompressed one plus this suffix.
+GZIP_ETAG_SUFFIX = "-gzip"
+_GZIP_TYPES = ("application/json", "text/html", "text/css", "text/plain", "application/javascript", "text/javascript")
 
-    return jsonify({"queued": len(data["chapters"])})
+
+def _if_none_match(etag):
+    """The variant of ``etag`` (plain or gzipped) the client already has, or None."""
+    for tag in (etag, etag + GZIP_ETAG_SUFFIX):
+        if tag in request.if_none_match:
+            return tag
+    return None
+
+
+@app.after_request
+def gzip_response(response):
+    """Gzip JSON/HTML/CSS/JS responses for clients that accept it."""
+    if (
+        response.status_code != 200
+        or "gzip" not in (request.headers.get("Accept-Encoding") or "").lower()
+        or response.headers.get("Content-Encoding")
+        or "Content-Range" in response.headers
+        or response.mimetype not in _GZIP_TYPES
+        or (response.is_streamed and not response.direct_passthrough)
+    ):
+        return response
+
+    # Static files are served as a passthrough file wrapper; read them in.
+    response.direct_passthrough = False
+    data = response.get_data()
+    if len(data) < GZIP_MIN_BYTES:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers["Content-Encoding"] = "gzip"
+    response.headers["Content-Length"] = str(len(response.get_data()))
+    response.vary.add("Accept-Encoding")
+    tag, weak = response.get_etag()
+    if tag:
+        response.set_etag(tag + GZIP_ETAG_SUFFIX, weak)
+        # Static files compared the client's tag against the plain one; redo it.
+        response.make_conditional(request)
+    return response
+
+
+# ------------------ BACKGROUND SERVICES ------------------
+
+_SERVICES_LOCK_FILE = os.getenv("SERVICES_LOCK_FILE", os.path.join(app.instance_path, "services.lock"))
+_services_lock_fh = None
+
+
+def start_background_services():
+    """
+    Start the singleton background threads (submission worker) and hold
+    SERVICES_LOCK_FILE for the life of the process. Returns True once started.
+
+    With JOB_MODE=thread the task registry, the browsers (and their shared
+    profile directories) and the metrics all live in this process, so a second
+    process importing the app is refused with a RuntimeError. Several WSGI
+    processes need JOB_MODE=worker, where tasks live in the database and
+    worker.py runs the browsers and the submission queue.
+    """
+    global _services_lock_fh
+    if _services_lock_fh is not None:
+        return True
+    if JOB_MODE == "worker":
+        # worker.py owns the submission queue too.
+        return False
+
+    os.makedirs(os.path.dirname(_SERVICES_LOCK_FILE) or ".", exist_ok=True)
+    fh = open(_SERVICES_LOCK_FILE, "a+")
+    try:
+        import fcntl
+
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except ImportError:
+        # No fcntl (Windows): single-process servers only.
+        pass
+    except OSError:
+        fh.close()
+        with open(_SERVICES_LOCK_FILE) as f:
+            owner = f.read().strip() or "?"
+        raise RuntimeError(
+            f"Tracker already running in pid {owner} ({_SERVICES_LOCK_FILE}). JOB_MODE=thread "
+            "keeps tasks, browsers and metrics in one process: serve it from a single "
+            "process, or set JOB_MODE=worker to run several web processes."
+        )
+
+    fh.seek(0)
+    fh.truncate()
+    fh.write(str(os.getpid()))
+    fh.flush()
+    _services_lock_fh = fh
+
+    threading.Thread(target=submission_worker, daemon=True).start()
+    logger.info("🤖 Background services started in pid %d", os.getpid())
+    return True
 
 
 # ------------------ MAIN ------------------
 
 if __name__ == "__main__":
-    logger.info("🚀 Starting Flask server")
-    threading.Thread(target=submission_worker, daemon=True).start()
+    logger.info("🚀 Starting Flask development server (use wsgi.py in production)")
+    start_background_services()
 
     app.run(
         host="0.0.0.0",
@@ -0,0 +1,428 @@
+"""
+Benchmark suite for the tracker's hot paths.
+
+Covers chapter parsing (both parse_vol_ch implementations and the NU chapter
+HTML parser on large nd_getchapters payloads), missing-chapter diffing on
+10k-chapter series, the sync upsert for 2,000 novels and, optionally, a full
+refresh and a multi-node refresh sweep against the local replay stand-in
+(replay_server.py).
+
+Results are written to bench_results.json. With a baseline file present each
+case is compared against it and the run fails (exit 1) when a case is slower
+than baseline * (1 + threshold).
+
+Usage:
+    python bench.py                      # micro benchmarks, compare to baseline
+    python bench.py --save-baseline      # record the current numbers as baseline
+    python bench.py --e2e                # also run a full refresh (needs Chrome)
+    python bench.py -k parse --threshold 0.3
+    python bench.py --nodes 1,2,4 -k scaleout   # refresh throughput vs worker nodes
+"""
+
+import argparse
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import replay_server
+
+RESULTS_FILE = "bench_results.json"
+BASELINE_FILE = "bench_baseline.json"
+DEFAULT_THRESHOLD = 0.25
+
+CASES = []
+
+
+def case(name, number=1, repeat=5):
+    """
+    Register a benchmark.
+
+    The decorated factory receives the context and returns either the function
+    to time or a (setup, fn) pair; setup runs untimed before every repeat.
+    """
+
+    def deco(factory):
+        CASES.append(
+            SimpleNamespace(name=name, factory=factory, number=number, repeat=repeat)
+        )
+        return factory
+
+    return deco
+
+
+# ================= FIXTURES =================
+def _labels(n, per_volume=100):
+    out = []
+    for i in range(1, n + 1):
+        if i % 3 == 0:
+            out.append(f"c{i}")
+        elif i % 3 == 1:
+            out.append(f"v{(i - 1) // per_volume + 1} c{i}")
+        else:
+            out.append(f"Volume {(i - 1) // per_volume + 1} Chapter {i}")
+    return out
+
+
+def _nd_getchapters_payload(chapters, per_volume=100):
+    catalog = replay_server.ReplayCatalog(
+        series=1, chapters=chapters, nu_lag=0, per_volume=per_volume
+    )
+    return replay_server.render_nd_getchapters(catalog, catalog.series[0])
+
+
+# ================= CASES =================
+@case("parse_vol_ch/app x3000", repeat=7)
+def _bench_parse_vol_ch_app(ctx):
+    labels = _labels(3000)
+    parse = ctx.app.parse_vol_ch
+    return lambda: [parse(t) for t in labels]
+
+
+@case("parse_vol_ch/nu_crawler x3000", repeat=7)
+def _bench_parse_vol_ch_nu_crawler(ctx):
+    import nu_crawler
+
+    labels = _labels(3000)
+    parse = nu_crawler.parse_vol_ch
+    return lambda: [parse(t) for t in labels]
+
+
+@case("parse_nu_chapter_html/1k chapters", repeat=7)
+def _bench_parse_html_1k(ctx):
+    html = _nd_getchapters_payload(1000)
+    return lambda: ctx.app.parse_nu_chapter_html(html)
+
+
+@case("parse_nu_chapter_html/10k chapters", repeat=5)
+def _bench_parse_html_10k(ctx):
+    html = _nd_getchapters_payload(10000)
+    return lambda: ctx.app.parse_nu_chapter_html(html)
+
+
+@case("compute_missing/10k chapters", repeat=7)
+def _bench_compute_missing(ctx):
+    fenrir = [[(i - 1) // 100 + 1, i] for i in range(1, 10001)]
+    nu = [c for c in fenrir if c[1] % 10]
+    novel = SimpleNamespace(
+        fenrir_chapters=json.dumps(fenrir), nu_chapters=json.dumps(nu)
+    )
+    return lambda: ctx.app.compute_missing(novel)
+
+
+def _sync_records(n, base="https://www.novelupdates.com"):
+    return [
+        {
+            "name": f"Bench Series {i}",
+            "nu_url": f"{base}/series/bench-series-{i}/",
+            "fenrir_url": f"https://fenrirealm.com/series/bench-series-{i}",
+            "nu_series_id": str(200000 + i),
+        }
+        for i in range(n)
+    ]
+
+
+@case("upsert_synced_novels/insert 2000", repeat=5)
+def _bench_upsert_insert(ctx):
+    app, records = ctx.app, _sync_records(2000)
+
+    def setup():
+        with app.app.app_context():
+            app.db.session.query(app.Novel).delete()
+            app.db_commit()
+
+    def fn():
+        with app.app.app_context():
+            app.upsert_synced_novels(records)
+
+    return setup, fn
+
+
+@case("upsert_synced_novels/update 2000", repeat=5)
+def _bench_upsert_update(ctx):
+    app, records = ctx.app, _sync_records(2000)
+
+    def setup():
+        with app.app.app_context():
+            if app.db.session.query(app.Novel).count() != len(records):
+                app.db.session.query(app.Novel).delete()
+                app.db_commit()
+                app.upsert_synced_novels(records)
+
+    def fn():
+        with app.app.app_context():
+            app.upsert_synced_novels(records)
+
+    return setup, fn
+
+
+@case("refresh/e2e replay", repeat=3)
+def _bench_refresh_e2e(ctx):
+    if not ctx.e2e:
+        return None
+    app, replay = ctx.app, ctx.replay
+    series = replay.state.catalog.series[0]
+    client = app.app.test_client()
+
+    with app.app.app_context():
+        app.db.session.query(app.Novel).delete()
+        app.db_commit()
+        novel = app.Novel(
+            name=series["title"],
+            nu_url=f"{replay.nu_base}/series/{series['slug']}/",
+            fenrir_url=f"{replay.fenrir_base}/series/{series['slug']}",
+        )
+        app.db.session.add(novel)
+        app.db_commit()
+        novel_id = novel.id
+
+    def fn():
+        task_id = client.post(
+            f"/api/novels/{novel_id}/refresh", json={"force": True}
+        ).get_json()["task_id"]
+        deadline = time.time() + 300
+        while time.time() < deadline:
+            t = client.get(f"/api/tasks/{task_id}").get_json()
+            if t["status"] != "running":
+                break
+            time.sleep(0.05)
+        if t["status"] != "completed":
+            raise RuntimeError(f"refresh did not complete: {t}")
+
+    return fn
+
+
+SCALEOUT_NOVELS = 60
+
+
+def _scaleout_case(nodes):
+    """Refresh SCALEOUT_NOVELS novels with `worker.py node -n <nodes>` (HTTP mode) against the replay server."""
+
+    def factory(ctx):
+        app, replay = ctx.app, ctx.replay
+        series = replay.state.catalog.series
+
+        def setup():
+            with app.app.app_context():
+                app.db.session.query(app.Novel).delete()
+                app.db.session.query(app.WorkerNode).delete()
+                for i in range(SCALEOUT_NOVELS):
+                    s = series[i % len(series)]
+                    app.db.session.add(
+                        app.Novel(
+                            name=f"{s['title']} #{i}",
+                            nu_url=f"{replay.nu_base}/series/{s['slug']}/?copy={i}",
+                            fenrir_url=f"{replay.fenrir_base}/series/{s['slug']}",
+                            status="active",
+                        )
+                    )
+                app.db_commit()
+
+        def fn():
+            env = dict(os.environ, REFRESH_MODE="http", **replay.env())
+            subprocess.run(
+                [
+                    sys.executable,
+                    "worker.py",
+                    "node",
+                    "-n",
+                    str(nodes),
+                    "--batch",
+                    "2",
+                    "--exit-when-idle",
+                ],
+                env=env,
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=600,
+            )
+            with app.app.app_context():
+                pending = (
+                    app.db.session.query(app.Novel)
+                    .filter(app.Novel.last_checked.is_(None))
+                    .count()
+                )
+            if pending:
+                raise RuntimeError(f"{pending} novels were not refreshed")
+
+        return setup, fn
+
+    return factory
+
+
+# ================= RUNNER =================
+def run_case(c, ctx):
+    made = c.factory(ctx)
+    if made is None:
+        return None
+    setup, fn = made if isinstance(made, tuple) else (None, made)
+
+    samples = []
+    for _ in range(c.repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        for _ in range(c.number):
+            fn()
+        samples.append((time.perf_counter() - started) / c.number)
+
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "repeat": c.repeat,
+        "number": c.number,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return (name, ratio) for every case slower than baseline * (1 + threshold)."""
+    regressions = []
+    for name, r in results.items():
+        base = (baseline.get("cases") or {}).get(name)
+        if not base or not base.get("min"):
+            continue
+        ratio = r["min"] / base["min"]
+        r["baseline_min"] = base["min"]
+        r["ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def _fmt_seconds(s):
+    if s < 1e-3:
+        return f"{s * 1e6:8.1f} µs"
+    if s < 1:
+        return f"{s * 1e3:8.2f} ms"
+    return f"{s:8.2f} s "
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tracker benchmark suite")
+    parser.add_argument(
+        "-k", dest="pattern", help="Only run cases whose name contains this"
+    )
+    parser.add_argument(
+        "--e2e",
+        action="store_true",
+        help="Include a full refresh against the replay server",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed slowdown vs baseline (0.25 = 25%%)",
+    )
+    parser.add_argument("--results", default=RESULTS_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Write these results as the new baseline",
+    )
+    parser.add_argument(
+        "--nodes", help="Scale-out run: comma-separated worker node counts, e.g. 1,2,4"
+    )
+    args = parser.parse_args()
+
+    for n in [int(x) for x in args.nodes.split(",")] if args.nodes else []:
+        CASES.append(
+            SimpleNamespace(
+                name=f"scaleout/nodes={n} x{SCALEOUT_NOVELS}",
+                factory=_scaleout_case(n),
+                number=1,
+                repeat=1,
+            )
+        )
+
+    # The app reads its database and site origins at import time, so point them
+    # at a scratch DB and the replay stand-in before importing it.
+    tmpdir = tempfile.mkdtemp(prefix="tracker-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ["NU_SESSION_FILE"] = os.path.join(tmpdir, "nu_session.json")
+    os.environ["NU_PROFILE_DIR"] = os.path.join(tmpdir, "profiles")
+    replay = None
+    if args.e2e or args.nodes:
+        # Latency makes the scale-out numbers reflect waiting on the sites, as in production.
+        replay = replay_server.start_replay(
+            series=5, chapters=300, nu_lag=20, latency=0.05 if args.nodes else 0
+        )
+        os.environ.update(replay.env())
+
+    import logging
+
+    logging.disable(logging.INFO)
+    import app
+
+    ctx = SimpleNamespace(app=app, replay=replay, e2e=args.e2e)
+    results = {}
+    failed = False
+    try:
+        for c in CASES:
+            if args.pattern and args.pattern not in c.name:
+                continue
+            try:
+                r = run_case(c, ctx)
+            except Exception as e:
+                print(f"[!] {c.name}: {e}")
+                failed = True
+                continue
+            if r is None:
+                continue
+            results[c.name] = r
+            print(
+                f"[*] {c.name:<40} min {_fmt_seconds(r['min'])}  median {_fmt_seconds(r['median'])}"
+            )
+    finally:
+        if replay:
+            for b in app.BROWSERS:
+                b.close()
+            replay.close()
+
+    baseline = {}
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    except (OSError, ValueError):
+        pass
+
+    regressions = compare(results, baseline, args.threshold)
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "threshold": args.threshold,
+        "cases": results,
+    }
+    with open(args.results, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"[*] Results written to {args.results}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"[*] Baseline saved to {args.baseline}")
+    elif not baseline:
+        print(
+            f"[*] No baseline at {args.baseline}; run with --save-baseline to create one"
+        )
+
+    for name, ratio in regressions:
+        print(
+            f"[!] REGRESSION {name}: {ratio:.2f}x baseline (threshold {1 + args.threshold:.2f}x)"
+        )
+
+    if regressions or failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Record-and-replay capture of raw crawl payloads.
+
+When CAPTURE_ENABLED is set, the crawlers save what they parsed (the Fenrir
+chapter grid HTML, nd_getchapters responses and the NU popup innerHTML) to a
+gzip-compressed on-disk store keyed by novel and timestamp, bounded by
+CAPTURE_MAX_MB (oldest captures are evicted first).
+
+The re-parse command rebuilds every chapter set from the captures without any
+network or browser, so parsing rule changes can be checked in seconds:
+
+    python capture.py list
+    python capture.py reparse                 # compare against the database
+    python capture.py reparse --novel novel-12 --apply
+"""
+
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# ================= CONFIG =================
+# Imported before app.py loads .env, so read it here too (no-op if already loaded).
+load_dotenv()
+CAPTURE_ENABLED = os.getenv("CAPTURE_ENABLED", "").lower() in ("1", "true", "yes")
+CAPTURE_DIR = os.getenv("CAPTURE_DIR", "captures")
+CAPTURE_MAX_BYTES = int(float(os.getenv("CAPTURE_MAX_MB", "200")) * 1024 * 1024)
+
+KINDS = ("fenrir_grid", "nd_getchapters", "popup")
+
+_local = threading.local()
+_lock = threading.Lock()
+_total_bytes = None
+
+
+def enabled():
+    return CAPTURE_ENABLED
+
+
+def _safe_key(key):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", str(key)).strip("-") or "unknown"
+
+
+@contextmanager
+def session(key):
+    """Attribute captures made on this thread to ``key`` (e.g. ``novel-12``)."""
+    prev = getattr(_local, "key", None)
+    _local.key = _safe_key(key)
+    try:
+        yield
+    finally:
+        _local.key = prev
+
+
+def _key_for(url):
+    key = getattr(_local, "key", None)
+    if key:
+        return key
+    path = urlparse(url or "").path.strip("/").replace("/", "-")
+    return _safe_key(path)
+
+
+def _store_size():
+    total = 0
+    for root, _dirs, files in os.walk(CAPTURE_DIR):
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(root, f))
+            except OSError:
+                pass
+    return total
+
+
+def _evict(limit):
+    """Delete the oldest captures until the store fits in ``limit`` bytes."""
+    global _total_bytes
+    entries = []
+    for root, _dirs, files in os.walk(CAPTURE_DIR):
+        for f in files:
+            path = os.path.join(root, f)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+    entries.sort()
+
+    total = sum(size for _m, size, _p in entries)
+    for _mtime, size, path in entries:
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+    _total_bytes = total
+
+
+def record(kind, payload, url=None):
+    """Save one raw payload. No-op unless capture is enabled; never raises."""
+    global _total_bytes
+    if not CAPTURE_ENABLED or not payload:
+        return None
+
+    key = _key_for(url)
+    now = datetime.now(timezone.utc)
+    doc = {
+        "key": key,
+        "kind": kind,
+        "url": url,
+        "captured_at": now.isoformat(),
+        "payload": payload,
+    }
+    folder = os.path.join(CAPTURE_DIR, key)
+    path = os.path.join(folder, f"{now.strftime('%Y%m%dT%H%M%S%f')}-{kind}.json.gz")
+    try:
+        os.makedirs(folder, exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as fh:
+            json.dump(doc, fh)
+        size = os.path.getsize(path)
+    except OSError as e:
+        logger.warning("⚠️ Could not write capture %s: %s", path, e)
+        return None
+
+    with _lock:
+        if _total_bytes is None:
+            _total_bytes = _store_size()
+        else:
+            _total_bytes += size
+        if _total_bytes > CAPTURE_MAX_BYTES:
+            # Evict down to 90% so we don't rescan on every write.
+            _evict(int(CAPTURE_MAX_BYTES * 0.9))
+    return path
+
+
+def iter_captures(key=None):
+    """Yield (path, key, kind, timestamp) for every stored capture, oldest first."""
+    if not os.path.isdir(CAPTURE_DIR):
+        return
+    keys = [_safe_key(key)] if key else sorted(os.listdir(CAPTURE_DIR))
+    for k in keys:
+        folder = os.path.join(CAPTURE_DIR, k)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            m = re.fullmatch(r"(\d{8}T\d{12})-(\w+)\.json\.gz", name)
+            if m:
+                yield os.path.join(folder, name), k, m.group(2), m.group(1)
+
+
+def load(path):
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def latest_by_kind(key=None):
+    """{key: {kind: path}} keeping only the newest capture of each kind."""
+    out = {}
+    for path, k, kind, _ts in iter_captures(key):
+        out.setdefault(k, {})[kind] = path
+    return out
+
+
+def reparse(key=None):
+    """
+    Rebuild chapter sets from the newest captures, with no network.
+
+    Returns {key: {"fenrir": set, "links": dict, "nu": set, "nu_kind": str,
+    "fenrir_at": datetime, "nu_at": datetime}} (``fenrir``/``nu`` and their
+    capture times are None when no capture of that side exists). NU uses
+    whichever of nd_getchapters / popup was captured last, like the crawl,
+    which stops at the first strategy that returns chapters.
+    """
+    import app
+
+    results = {}
+    for k, kinds in latest_by_kind(key).items():
+        entry = {
+            "fenrir": None,
+            "links": {},
+            "nu": None,
+            "nu_kind": None,
+            "fenrir_at": None,
+            "nu_at": None,
+        }
+        if "fenrir_grid" in kinds:
+            doc = load(kinds["fenrir_grid"])
+            entry["fenrir"], entry["links"] = app.parse_fenrir_chapter_html(
+                doc["payload"], doc.get("url")
+            )
+            entry["fenrir_at"] = datetime.fromisoformat(doc["captured_at"])
+        nu_paths = [kinds[n] for n in ("nd_getchapters", "popup") if n in kinds]
+        if nu_paths:
+            newest = max(nu_paths)
+            doc = load(newest)
+            entry["nu"] = app.parse_nu_chapter_html(doc["payload"])
+            entry["nu_kind"] = doc["kind"]
+            entry["nu_at"] = datetime.fromisoformat(doc["captured_at"])
+        results[k] = entry
+    return results
+
+
+# ================= STANDALONE MAIN =================
+def _cmd_list(args):
+    total = 0
+    for path, k, kind, ts in iter_captures(args.novel):
+        size = os.path.getsize(path)
+        total += size
+        print(f"{k:<30} {ts} {kind:<15} {size / 1024:8.1f} KB")
+    print(
+        f"[*] Store size: {total / (1024 * 1024):.1f} MB (limit {CAPTURE_MAX_BYTES / (1024 * 1024):.0f} MB)"
+    )
+
+
+def _is_stale(captured_at, last_checked, slack_seconds):
+    """True if a capture predates the novel's last crawl (minus ``slack_seconds``)."""
+    if captured_at is None or last_checked is None:
+        return False
+    if last_checked.tzinfo is None:
+        # SQLite hands DateTime columns back naive; they are stored in UTC.
+        last_checked = last_checked.replace(tzinfo=timezone.utc)
+    return captured_at < last_checked - timedelta(seconds=slack_seconds)
+
+
+def _cmd_reparse(args):
+    import app
+
+    started = time.perf_counter()
+    results = reparse(args.novel)
+    changed = 0
+    with app.app.app_context():
+        for k, entry in results.items():
+            m = re.fullmatch(r"novel-(\d+)", k)
+            novel = app.db.session.get(app.Novel, int(m.group(1))) if m else None
+
+            line = f"{k:<30}"
+            if entry["fenrir"] is not None:
+                line += f" fenrir={len(entry['fenrir'])}"
+            if entry["nu"] is not None:
+                line += f" nu={len(entry['nu'])} ({entry['nu_kind']})"
+
+            if novel:
+                # A capture taken before the crawl that produced the stored sets
+                # is older data; never let it overwrite them. Captures from that
+                # crawl itself precede last_checked by at most the crawl timeout.
+                stale_f = _is_stale(
+                    entry["fenrir_at"], novel.last_checked, app.CRAWL_JOB_TIMEOUT
+                )
+                stale_n = _is_stale(
+                    entry["nu_at"], novel.last_checked, app.CRAWL_JOB_TIMEOUT
+                )
+                if stale_f or stale_n:
+                    line += "  STALE " + "+".join(
+                        n for n, st in (("fenrir", stale_f), ("nu", stale_n)) if st
+                    )
+                old_f = {tuple(x) for x in json.loads(novel.fenrir_chapters or "[]")}
+                old_n = {tuple(x) for x in json.loads(novel.nu_chapters or "[]")}
+                diff_f = (
+                    entry["fenrir"] is not None
+                    and not stale_f
+                    and entry["fenrir"] != old_f
+                )
+                diff_n = (
+                    entry["nu"] is not None and not stale_n and entry["nu"] != old_n
+                )
+                if diff_f or diff_n:
+                    changed += 1
+                    line += f"  CHANGED (db fenrir={len(old_f)} nu={len(old_n)})"
+                    if args.apply:
+                        if diff_f:
+                            novel.fenrir_chapters = json.dumps(list(entry["fenrir"]))
+                            novel.fenrir_links = json.dumps(entry["links"])
+                        if diff_n:
+                            novel.nu_chapters = json.dumps(list(entry["nu"]))
+                        novel.missing_count = len(app.compute_missing(novel))
+            print(line)
+        if args.apply and changed:
+            app.db_commit()
+
+    verb = "updated" if args.apply else "differ from the database"
+    print(
+        f"[*] Re-parsed {len(results)} novels in {time.perf_counter() - started:.2f}s; {changed} {verb}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Inspect and re-parse captured crawl payloads"
+    )
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_list = sub.add_parser("list", help="List stored captures")
+    p_list.add_argument("--novel", help="Capture key, e.g. novel-12")
+    p_list.set_defaults(func=_cmd_list)
+
+    p_re = sub.add_parser(
+        "reparse", help="Rebuild chapter sets from captures (no network)"
+    )
+    p_re.add_argument("--novel", help="Capture key, e.g. novel-12")
+    p_re.add_argument(
+        "--apply",
+        action="store_true",
+        help="Write changed chapter sets back to the database",
+    )
+    p_re.set_defaults(func=_cmd_reparse)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
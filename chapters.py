@@ -0,0 +1,114 @@
+"""
+Chapter parsing shared by app.py, search.py and capture.py.
+
+Chapters are ``(vol, ch)`` int pairs with ``vol`` 0 for releases without a
+volume, the keys the tracker stores and diffs, so every crawler that parses
+Fenrir pages produces the same keys.
+"""
+
+from html import unescape
+import re
+from urllib.parse import urljoin
+
+
+def parse_vol_ch(text):
+    if not text:
+        return None
+
+    t = (
+        str(text)
+        .lower()
+        .replace("volume", "v")
+        .replace("vol.", "v")
+        .replace("vol", "v")
+        .replace("chapter", "c")
+        .replace("ch.", "c")
+        .replace("ch", "c")
+    )
+
+    # Common patterns:
+    # - v3c91
+    # - v3 c91
+    # - v 3 c 91
+    # - c91
+    m = re.search(r"\bv\s*(\d+)\s*c\s*(\d+)\b", t, re.IGNORECASE)
+    if m:
+        try:
+            return (int(m.group(1)), int(m.group(2)))
+        except Exception:
+            return None
+
+    m = re.search(r"\bc\s*(\d+)\b", t, re.IGNORECASE)
+    if m:
+        try:
+            return (0, int(m.group(1)))
+        except Exception:
+            return None
+
+    return None
+
+
+def parse_fenrir_href(href):
+    if not href:
+        return None
+    # Common patterns:
+    # - /vol-3/1
+    # - /<num>
+    # - /chapter-<num>
+    # - ?chapter=<num>
+    m = re.search(r"/vol-(\d{1,5})/(\d{1,5})(?:/|$)", href, re.IGNORECASE)
+    if m:
+        try:
+            return (int(m.group(1)), int(m.group(2)))
+        except Exception:
+            return None
+
+    m = re.search(r"(?:chapter[-_/]|/)(\d{1,5})(?:/|$)", href, re.IGNORECASE)
+    if not m:
+        m = re.search(r"[?&]chapter=(\d{1,5})\b", href, re.IGNORECASE)
+    if m:
+        try:
+            return (0, int(m.group(1)))
+        except Exception:
+            return None
+    return None
+
+
+_ANCHOR_RE = re.compile(r"<a\b([^>]*)>(.*?)</a>", re.IGNORECASE | re.DOTALL)
+_ATTR_RE = re.compile(r'([\w-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+
+def parse_fenrir_chapter_html(html, base_url=None):
+    """
+    Offline twin of the element scrape in app.crawl_fenrir_chapters: parse the
+    captured chapter-grid HTML into (chapters, links) with the same rules.
+    """
+    chapters = set()
+    links = {}
+    for m in _ANCHOR_RE.finditer(html or ""):
+        attrs = {
+            a.group(1).lower(): unescape(
+                a.group(2) if a.group(2) is not None else a.group(3)
+            )
+            for a in _ATTR_RE.finditer(m.group(1))
+        }
+        if "btn-chapter" not in attrs.get("class", "").split():
+            continue
+        href = attrs.get("href", "")
+        if base_url and href:
+            href = urljoin(base_url, href)
+        if "/auth/login" in href:
+            continue
+        title = unescape(re.sub(r"<[^>]+>", " ", m.group(2))).strip()
+        parsed = parse_vol_ch(title) or parse_fenrir_href(href)
+        if parsed:
+            chapters.add(parsed)
+            key = f"{int(parsed[0] or 0)}:{int(parsed[1])}"
+            if href and key not in links:
+                links[key] = href
+
+    if not chapters:
+        text = unescape(re.sub(r"<[^>]+>", " ", html or ""))
+        for m in re.finditer(r"\b(?:v(\d+)\s*)?c(\d+)\b", text, re.IGNORECASE):
+            chapters.add((int(m.group(1)) if m.group(1) else 0, int(m.group(2))))
+    return chapters, links
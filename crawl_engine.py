@@ -0,0 +1,193 @@
+"""
+Asyncio crawl engine for the HTTP-reachable parts of a crawl.
+
+One event loop runs on a background thread with a shared aiohttp session.
+Requests are bounded by a global limit and a per-host semaphore, every request
+has a timeout, and 429 / 5xx responses are retried with backoff. Flask handlers
+and worker threads hand coroutines over with ``submit()`` and get a
+``concurrent.futures.Future`` back, so one process can keep hundreds of
+requests in flight instead of blocking a thread (and a browser) per task.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# ================= CONFIG =================
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "64"))
+CRAWL_PER_HOST = int(os.getenv("CRAWL_PER_HOST", "4"))
+CRAWL_TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", "20"))
+CRAWL_RETRIES = int(os.getenv("CRAWL_RETRIES", "2"))
+USER_AGENT = os.getenv(
+    "CRAWL_USER_AGENT",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+)
+
+ENGINE_REQUEST_SECONDS = metrics.Histogram(
+    "tracker_engine_request_seconds",
+    "Crawl engine HTTP request time",
+    ["host", "status"],
+)
+ENGINE_IN_FLIGHT = metrics.Gauge(
+    "tracker_engine_in_flight", "Crawl engine requests currently in flight", []
+)
+
+
+class FetchError(Exception):
+    def __init__(self, url, status, message=""):
+        super().__init__(f"{status} for {url}{': ' + message if message else ''}")
+        self.url = url
+        self.status = status
+
+
+class CrawlEngine:
+    def __init__(
+        self,
+        concurrency=CRAWL_CONCURRENCY,
+        per_host=CRAWL_PER_HOST,
+        timeout=CRAWL_TIMEOUT,
+        retries=CRAWL_RETRIES,
+        user_agent=USER_AGENT,
+    ):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.user_agent = user_agent
+        self.cookies = {}  # host -> {name: value}
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._global_sem = None
+        self._host_sems = {}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    # -- lifecycle --
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return self
+            self._ready.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="crawl-engine", daemon=True
+            )
+            self._thread.start()
+        self._ready.wait()
+        return self
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._global_sem = asyncio.Semaphore(self.concurrency)
+        self._host_sems = {}
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            if self._session is not None:
+                loop.run_until_complete(self._session.close())
+                self._session = None
+            loop.close()
+
+    def stop(self):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if not loop or not thread:
+                return
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=10)
+            self._loop = self._thread = None
+
+    def submit(self, coro):
+        """Schedule ``coro`` on the engine loop; returns a concurrent.futures.Future."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro, timeout=None):
+        """Blocking helper for sync callers."""
+        return self.submit(coro).result(timeout)
+
+    def set_cookies(self, url, cookies):
+        """Send ``cookies`` ({name: value}) with every request to ``url``'s host."""
+        self.cookies[(urlparse(url).hostname or "").lower()] = dict(cookies or {})
+
+    # -- requests --
+    def _session_for_loop(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    "User-Agent": self.user_agent,
+                    "Accept-Language": "en-US,en;q=0.9",
+                },
+                connector=aiohttp.TCPConnector(
+                    limit=self.concurrency, limit_per_host=self.per_host
+                ),
+                cookie_jar=aiohttp.DummyCookieJar(),
+            )
+        return self._session
+
+    def _host_sem(self, host):
+        sem = self._host_sems.get(host)
+        if sem is None:
+            sem = self._host_sems[host] = asyncio.Semaphore(self.per_host)
+        return sem
+
+    async def fetch(self, url, method="GET", data=None, headers=None):
+        """Return the response body as text; raises FetchError after retries."""
+        host = (urlparse(url).hostname or "").lower()
+        session = self._session_for_loop()
+        cookies = self.cookies.get(host)
+        last_error = None
+
+        for attempt in range(self.retries + 1):
+            status = "error"
+            started = time.perf_counter()
+            async with self._global_sem, self._host_sem(host):
+                self._in_flight += 1
+                ENGINE_IN_FLIGHT.set(self._in_flight)
+                try:
+                    async with session.request(
+                        method, url, data=data, headers=headers, cookies=cookies
+                    ) as resp:
+                        status = resp.status
+                        body = await resp.text(errors="replace")
+                        retry_after = resp.headers.get("Retry-After")
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    last_error = FetchError(url, "error", str(e) or type(e).__name__)
+                    retry_after = None
+                finally:
+                    self._in_flight -= 1
+                    ENGINE_IN_FLIGHT.set(self._in_flight)
+                    ENGINE_REQUEST_SECONDS.observe(
+                        time.perf_counter() - started, host=host, status=str(status)
+                    )
+
+            if status != "error":
+                if status < 400:
+                    return body
+                last_error = FetchError(url, status)
+                if status != 429 and status < 500:
+                    raise last_error
+
+            if attempt < self.retries:
+                try:
+                    delay = float(retry_after)
+                except (TypeError, ValueError):
+                    delay = (2**attempt) + random.random()
+                await asyncio.sleep(min(delay, 30))
+
+        raise last_error
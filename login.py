@@ -7,6 +7,8 @@ import time
 
 from seleniumbase import SB
 
+from nu_crawler import fill_form
+
 # ================= CONFIG =================
 USERNAME = os.getenv("NU_USER")
 PASSWORD = os.getenv("NU_PASS")
@@ -25,14 +27,6 @@ def human_sleep(a=0.6, b=1.4):
     time.sleep(random.uniform(a, b))
 
 
-def human_type(sb, selector, text):
-    sb.click(selector)
-    sb.clear(selector)
-    for ch in text:
-        sb.send_keys(selector, ch)
-        time.sleep(random.uniform(0.05, 0.12))
-
-
 # ================= LOGIN =================
 def login(sb):
     print("Opening NovelUpdates login page...")
@@ -49,12 +43,8 @@ def login(sb):
         pass  # Captcha handling may not be available
     sb.sleep(4)
 
-    print("Typing username...")
-    human_type(sb, "#user_login", USERNAME)
-    human_sleep()
-
-    print("Typing password...")
-    human_type(sb, "#user_pass", PASSWORD)
+    print("Filling username and password...")
+    fill_form(sb, {"#user_login": USERNAME, "#user_pass": PASSWORD})
     human_sleep()
 
     print("Clicking login...")
@@ -98,23 +88,19 @@ def open_add_release(sb):
 def fill_add_release(
     sb, series_name, release_name, release_link, group_name, release_date=None
 ):
-    print("Filling Add Release form (plain typing only)...")
-
-    print("→ Series")
-    human_type(sb, "#title_change_100", series_name)
-
-    print("→ Release")
-    human_type(sb, "#arrelease", release_name)
-
-    print("→ Link")
-    human_type(sb, "#arlink", release_link)
-
-    print("→ Group")
-    human_type(sb, "#group_change_100", group_name)
-
+    print("Filling Add Release form...")
+
+    fields = {
+        "#title_change_100": series_name,
+        "#arrelease": release_name,
+        "#arlink": release_link,
+        "#group_change_100": group_name,
+    }
     if release_date:
-        print("→ Release Date")
-        human_type(sb, "#ardate", release_date)
+        fields["#ardate"] = release_date
+    filled = fill_form(sb, fields, keyup=("#title_change_100", "#group_change_100"))
+    for sel, value in filled.items():
+        print(f"→ {sel}: {value!r}")
 
     print("✅ Form filled (NOT submitted)")
 
@@ -0,0 +1,133 @@
+"""
+Minimal in-process metrics (counters, gauges, histograms) with Prometheus text
+exposition, so the tracker can serve /metrics without extra dependencies.
+"""
+
+import threading
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+_REGISTRY = []
+_LOCK = threading.Lock()
+
+
+def _label_key(labelnames, labels):
+    missing = set(labelnames) - set(labels)
+    extra = set(labels) - set(labelnames)
+    if missing or extra:
+        raise ValueError(f"labels must be exactly {labelnames}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _fmt_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key)) + list(extra or [])
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(
+            k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+def _fmt_value(v):
+    if v == float("inf"):
+        return "+Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        with _LOCK:
+            _REGISTRY.append(self)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with _LOCK:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = self._header()
+        for key, v in sorted(self._values.items()):
+            lines.append(
+                f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(v)}"
+            )
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with _LOCK:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with _LOCK:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {
+                    "counts": [0] * len(self.buckets),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def render(self):
+        lines = self._header()
+        for key, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, state["counts"]):
+                cumulative += n
+                le = _fmt_labels(self.labelnames, key, [("le", _fmt_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _fmt_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_fmt_value(state['sum'])}")
+            lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+def render_latest():
+    """All registered metrics in the Prometheus text format (version 0.0.4)."""
+    with _LOCK:
+        metrics = list(_REGISTRY)
+    lines = []
+    for m in metrics:
+        with _LOCK:
+            lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
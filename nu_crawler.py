@@ -6,14 +6,19 @@ When run standalone, it crawls chapters from a NovelUpdates series URL.
 """
 
 import argparse
+from contextlib import redirect_stdout
+from html import unescape
+import json
 import os
-import random
 import re
 import sys
 import time
+from urllib.parse import urlparse
 
 from seleniumbase import SB
 
+import nu_session
+
 # ================= CONFIG =================
 USERNAME = os.getenv("NU_USER")
 PASSWORD = os.getenv("NU_PASS")
@@ -29,9 +34,32 @@ CHAPTER_RE = re.compile(
     """,
     re.IGNORECASE | re.VERBOSE,
 )
+SPAN_RE = re.compile(r"<span\b([^>]*)>(.*?)</span>", re.IGNORECASE | re.DOTALL)
+TITLE_ATTR_RE = re.compile(
+    r"""\b(?:data-)?title\s*=\s*(["'])(.*?)\1""", re.IGNORECASE | re.DOTALL
+)
+TAG_RE = re.compile(r"<[^>]+>")
+# Where a series page exposes its numeric id (the nd_getchapters "mypostid").
+# Also passed to the in-page batch scripts, so keep them valid JS regexes too
+# (matched case-insensitively on both sides).
+SERIES_ID_PATTERNS = [
+    r'id="mypostid"\s+value="(\d+)"',
+    r"\bpostid-(\d+)\b",
+    r"\bseries_id['\"]?\s*[:=]\s*['\"]?(\d+)",
+    r"\bpost_id['\"]?\s*[:=]\s*['\"]?(\d+)",
+]
 
 
 # ================= UTILITIES =================
+def series_id_from_html(source):
+    """NU numeric series id from a series page's HTML, or None."""
+    for pattern in SERIES_ID_PATTERNS:
+        m = re.search(pattern, source or "", re.IGNORECASE)
+        if m:
+            return m.group(1)
+    return None
+
+
 def parse_vol_ch(text):
     """Parse volume and chapter number from text."""
     if not text:
@@ -69,24 +97,81 @@ def parse_vol_ch(text):
     return (vol, ch)
 
 
-def human_type(sb, selector, text):
-    """Type text character by character to mimic human behavior."""
-    sb.click(selector)
-    sb.clear(selector)
-    for ch in text:
-        sb.send_keys(selector, ch)
-        time.sleep(random.uniform(0.05, 0.12))
+def parse_chapter_html(html):
+    """
+    Parse chapters from popup or nd_getchapters HTML.
+
+    Each chapter is a span whose title/data-title (or, failing that, text)
+    holds the label.
+    """
+    chapters = set()
+    for attrs, inner in SPAN_RE.findall(html or ""):
+        m = TITLE_ATTR_RE.search(attrs)
+        title = unescape(m.group(2) if m else TAG_RE.sub("", inner)).strip()
+        parsed = parse_vol_ch(title)
+        if parsed:
+            chapters.add(parsed)
+    return chapters
+
+
+# Sets every field in one round-trip through the native value setter (so
+# framework-bound inputs notice), then fires input/change, plus keyup where
+# a keyup handler (NU's livesearch) has to run.
+_JS_FILL_FORM = """
+var fields = arguments[0], keyup = arguments[1], out = {};
+for (var sel in fields) {
+    var el = document.querySelector(sel);
+    if (!el) { out[sel] = null; continue; }
+    var proto = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype
+        : el.tagName === 'SELECT' ? HTMLSelectElement.prototype : HTMLInputElement.prototype;
+    var value = String(fields[sel]);
+    el.focus();
+    Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, value);
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    if (keyup.indexOf(sel) >= 0) {
+        el.dispatchEvent(new KeyboardEvent('keyup', {bubbles: true, key: value.slice(-1)}));
+    }
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    out[sel] = el.value;
+}
+return out;
+"""
+
+
+def fill_form(sb, fields, keyup=()):
+    """
+    Fill several form fields at once instead of typing them key by key.
+
+    Args:
+        sb: SeleniumBase instance
+        fields: {css selector: value}
+        keyup: Selectors that also get a keyup event (e.g. livesearch inputs)
+
+    Returns:
+        dict: {selector: value now in the field, or None if it wasn't found}
+
+    Raises:
+        ValueError: if a value is None (it would be typed in as "null")
+    """
+    empty = [sel for sel, value in fields.items() if value is None]
+    if empty:
+        raise ValueError(f"fill_form: no value for {', '.join(empty)}")
+    return sb.execute_script(_JS_FILL_FORM, dict(fields), list(keyup)) or {}
 
 
 # ================= LOGIN =================
-def login(sb, username=None, password=None):
+def login(sb, username=None, password=None, reuse_session=True):
     """
     Log into NovelUpdates.
 
+    A session saved by a previous run (see nu_session) is restored and probed
+    first; the login form is only used when that fails.
+
     Args:
         sb: SeleniumBase instance
         username: Optional username (defaults to NU_USER env var)
         password: Optional password (defaults to NU_PASS env var)
+        reuse_session: Try the saved session before a full login (default: True)
 
     Returns:
         bool: True if login successful, False otherwise
@@ -94,12 +179,20 @@ def login(sb, username=None, password=None):
     username = username or USERNAME
     password = password or PASSWORD
 
+    if reuse_session:
+        try:
+            if nu_session.resume_session(sb):
+                print("✅ LOGIN RESTORED (saved session)")
+                return True
+        except Exception as e:
+            print(f"[*] Saved session not usable: {e}")
+
     if not username or not password:
         print("❌ ERROR: Username and password required for login")
         return False
 
     print("[*] Logging into NovelUpdates...")
-    sb.open("https://www.novelupdates.com/login/")
+    sb.open(f"{nu_session.NU_BASE_URL}/login/")
     sb.sleep(6)
     # Try to handle captcha if present (if method exists)
     try:
@@ -109,18 +202,123 @@ def login(sb, username=None, password=None):
         pass  # Captcha handling may not be available
     sb.sleep(4)
 
-    human_type(sb, "#user_login", username)
-    human_type(sb, "#user_pass", password)
+    fill_form(sb, {"#user_login": username, "#user_pass": password})
     sb.click('input[name="wp-submit"]')
     sb.sleep(8)
 
+    nu_session.save_cookies(sb)
     print("✅ LOGIN CONFIRMED")
     return True
 
 
 # ================= NU CRAWLER =================
+_POPUP_SELECTORS = [
+    "#my_popupreading ol.sp_chp li span",
+    "#my_popupreading ol li span",
+    "#my_popupreading .sp_chp li span",
+    ".sp_chp li span",
+    "#my_popupreading li span",
+    "#my_popupreading ol.sp_chp li a",
+    "#my_popupreading ol li a",
+    "#my_popupreading .sp_chp li a",
+    ".sp_chp li a",
+]
+_NEXT_PAGE = "#my_popupreading a.next.page-numbers"
+
+# Reads every chapter title on the current popup page in one round-trip,
+# using the first selector that matches.
+_JS_POPUP_TITLES = """
+var sels = arguments[0];
+for (var i = 0; i < sels.length; i++) {
+    var els = document.querySelectorAll(sels[i]);
+    if (!els.length) continue;
+    var titles = [];
+    for (var j = 0; j < els.length; j++) {
+        var e = els[j];
+        var t = (e.getAttribute('title') || e.getAttribute('data-title') || e.textContent || '').trim();
+        if (!t && e.parentElement) {
+            t = (e.parentElement.getAttribute('title') || e.parentElement.textContent || '').trim();
+        }
+        titles.push(t);
+    }
+    return {selector: sels[i], titles: titles, next: !!document.querySelector(arguments[1])};
+}
+return {selector: '', titles: [], next: false};
+"""
+
+
+def _read_popup_page(sb, previous=None, timeout=10):
+    """
+    Poll the popup until it shows chapter titles different from ``previous``
+    (the last page read), instead of sleeping a fixed time after each click.
+    Returns ``None`` on timeout.
+    """
+    deadline = time.time() + timeout
+    while True:
+        page = sb.execute_script(_JS_POPUP_TITLES, _POPUP_SELECTORS, _NEXT_PAGE) or {}
+        if page.get("titles") and page["titles"] != previous:
+            return page
+        if time.time() > deadline:
+            return None
+        time.sleep(0.2)
+
+
+def _crawl_popup_pages(sb, debug=False):
+    """
+    Walk the open popup's pages, reading each page with one script call.
+
+    Raises RuntimeError when a page after the first never loads: the chapters
+    read so far are an incomplete list, and diffing it would report every
+    chapter on the missing pages as unreleased.
+    """
+    chapters = set()
+    page_num = 1
+    previous = None
+    while True:
+        page = _read_popup_page(sb, previous)
+        if page is None:
+            if page_num == 1:
+                print("❌ Could not find chapter elements")
+                break
+            print(
+                f"❌ Popup page {page_num} did not load ({len(chapters)} chapters read so far)"
+            )
+            raise RuntimeError(
+                f"NU popup page {page_num} timed out; chapter list incomplete"
+            )
+        titles = page["titles"]
+
+        found_on_page = 0
+        for title in titles:
+            parsed = parse_vol_ch(title)
+            if parsed:
+                chapters.add(parsed)
+                found_on_page += 1
+            elif debug:
+                print(f"  [DEBUG] Could not parse: '{title[:80]}'")
+        print(
+            f"[*] Page {page_num}: {found_on_page}/{len(titles)} parseable via "
+            f"'{page['selector']}' (total: {len(chapters)})"
+        )
+
+        if not page["next"]:
+            break
+        previous = titles
+        page_num += 1
+        sb.click(_NEXT_PAGE)
+    return chapters
+
+
 def crawl_nu_chapters(
-    sb, nu_url, require_login=True, username=None, password=None, debug=False
+    sb,
+    nu_url,
+    require_login=True,
+    username=None,
+    password=None,
+    debug=False,
+    series_id=None,
+    fast=True,
+    use_ajax=True,
 ):
     """
     Crawl chapters from a NovelUpdates series page.
@@ -132,6 +330,12 @@ def crawl_nu_chapters(
         username: Optional username for login
         password: Optional password for login
         debug: If True, print debug information
+        series_id: Optional NU series id; read from the page when omitted
+        fast: Read each popup page with one script call (default: True).
+            False uses the element-by-element popup crawl.
+        use_ajax: Try nd_getchapters before the popup (default: True; only
+            with fast). Fallbacks whose nd_getchapters call already came back
+            empty pass False to go straight to the popup.
 
     Returns:
         set: Set of tuples (vol, ch) where vol can be None
@@ -145,6 +349,21 @@ def crawl_nu_chapters(
     sb.open(nu_url)
     sb.sleep(3)
 
+    if fast and use_ajax:
+        # nd_getchapters returns every chapter in one response: no popup, no pages.
+        sid = series_id or series_id_from_html(sb.get_page_source())
+        if sid:
+            try:
+                result = fetch_chapters_batch(sb, [{"sid": str(sid)}])[0]
+                if result["chapters"]:
+                    print(
+                        f"✅ NU chapters found: {len(result['chapters'])} (nd_getchapters)"
+                    )
+                    return result["chapters"]
+                print(f"[*] nd_getchapters failed ({result['error']}), using the popup")
+            except Exception as e:
+                print(f"[*] nd_getchapters failed ({e}), using the popup")
+
     # Try to open the reading popup
     try:
         sb.wait_for_element("span.my_popupreading_open", timeout=10)
@@ -175,6 +394,11 @@ def crawl_nu_chapters(
             print("❌ Could not open reading popup")
             return set()
 
+    if fast:
+        chapters = _crawl_popup_pages(sb, debug)
+        print(f"✅ NU chapters found: {len(chapters)}")
+        return chapters
+
     chapters = set()
     page_num = 1
 
@@ -280,6 +504,180 @@ def crawl_nu_chapters(
     return chapters
 
 
+# ================= BATCH CRAWL =================
+# Runs inside the logged-in NU tab: for each item, fetch the series page only
+# when its id is unknown, then POST nd_getchapters, which returns every
+# chapter in one response. Items run concurrently and nothing navigates.
+_JS_FETCH_CHAPTERS = """
+var cb = arguments[arguments.length - 1];
+var items = arguments[0], patterns = arguments[1], grp = arguments[2];
+function seriesId(it) {
+    if (it.sid) return Promise.resolve(it.sid);
+    return fetch(it.url, {credentials: 'include'})
+        .then(function(r) { return r.text(); })
+        .then(function(h) {
+            for (var i = 0; i < patterns.length; i++) {
+                var m = h.match(new RegExp(patterns[i], 'i'));
+                if (m) return m[1];
+            }
+            return '';
+        });
+}
+function chapters(it) {
+    return seriesId(it).then(function(sid) {
+        if (!sid) return {sid: '', html: '', error: 'series id not found'};
+        var fd = new FormData();
+        fd.append('action', 'nd_getchapters');
+        fd.append('mypostid', sid);
+        if (it.grp || grp) fd.append('mygrplist', it.grp || grp);
+        return fetch('/wp-admin/admin-ajax.php', {method: 'POST', credentials: 'include', body: fd})
+            .then(function(r) { return r.text().then(function(h) {
+                return {sid: sid, html: h, error: r.ok ? '' : 'HTTP ' + r.status};
+            }); });
+    }).catch(function(e) { return {sid: it.sid || '', html: '', error: String(e)}; });
+}
+Promise.all(items.map(chapters)).then(cb);
+"""
+
+
+def ensure_nu_page(sb):
+    """Make sure the tab is on the NU origin, where the batch script's relative fetches go."""
+    nu_host = urlparse(nu_session.NU_BASE_URL).netloc
+    if urlparse(sb.get_current_url() or "").netloc != nu_host:
+        sb.open(f"{nu_session.NU_BASE_URL}/")
+
+
+def read_batch_file(path):
+    """
+    Read series to crawl from ``path`` ("-" for stdin), one per line.
+
+    A line is a series URL, a numeric series id or a series slug; blank lines
+    and lines starting with "#" are skipped. Returns a list of
+    {"input", "url", "sid"} dicts.
+    """
+    fh = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    items = []
+    try:
+        for line in fh:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.isdigit():
+                items.append({"input": line, "url": None, "sid": line})
+            elif line.startswith(("http://", "https://")):
+                items.append({"input": line, "url": line, "sid": None})
+            else:
+                url = f"{nu_session.NU_BASE_URL}/series/{line.strip('/')}/"
+                items.append({"input": line, "url": url, "sid": None})
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+    return items
+
+
+def fetch_chapters_batch(sb, items, group_id=None, timeout=120):
+    """
+    Fetch the chapter lists of ``items`` ({"url", "sid"} dicts, optionally a
+    per-item "grp" overriding ``group_id``) concurrently from the current NU
+    page with a single script call.
+
+    Returns one {"sid", "chapters", "error"} dict per item, in order.
+    """
+    ensure_nu_page(sb)
+    sb.driver.set_script_timeout(timeout)
+    payload = [
+        {
+            "url": it.get("url") or "",
+            "sid": it.get("sid") or "",
+            "grp": it.get("grp") or "",
+        }
+        for it in items
+    ]
+    raw = (
+        sb.driver.execute_async_script(
+            _JS_FETCH_CHAPTERS, payload, SERIES_ID_PATTERNS, str(group_id or "")
+        )
+        or []
+    )
+    results = []
+    for r in raw:
+        chapters = parse_chapter_html(r.get("html"))
+        error = r.get("error") or (
+            "" if chapters else "no chapters in nd_getchapters response"
+        )
+        results.append(
+            {"sid": r.get("sid") or None, "chapters": chapters, "error": error or None}
+        )
+    return results
+
+
+def _ndjson_record(item, sid, chapters, strategy, seconds, error=None):
+    return {
+        "input": item["input"],
+        "url": item["url"],
+        "series_id": sid,
+        "strategy": strategy,
+        "count": len(chapters),
+        "chapters": [
+            [vol, ch] for vol, ch in sorted(chapters, key=lambda c: (c[0] or 0, c[1]))
+        ],
+        "seconds": round(seconds, 3),
+        "error": error,
+    }
+
+
+def crawl_batch(sb, items, out, concurrency=4, group_id=None, fallback=True):
+    """
+    Crawl every item and write one NDJSON line to ``out`` per series as soon
+    as its chunk finishes. Items nd_getchapters cannot answer fall back to the
+    popup crawl when they have a URL.
+
+    Returns (ok, failed) counts.
+    """
+    ok = failed = 0
+    for start in range(0, len(items), max(1, concurrency)):
+        chunk = items[start : start + max(1, concurrency)]
+        started = time.perf_counter()
+        try:
+            results = fetch_chapters_batch(sb, chunk, group_id)
+        except Exception as e:
+            results = [
+                {"sid": it["sid"], "chapters": set(), "error": str(e)} for it in chunk
+            ]
+        elapsed = time.perf_counter() - started
+
+        for item, r in zip(chunk, results):
+            record = _ndjson_record(
+                item, r["sid"], r["chapters"], "nd_getchapters", elapsed, r["error"]
+            )
+            if not r["chapters"] and fallback and item["url"]:
+                popup_started = time.perf_counter()
+                try:
+                    # nd_getchapters already came back empty; go straight to the popup.
+                    chapters = crawl_nu_chapters(
+                        sb, item["url"], require_login=False, use_ajax=False
+                    )
+                    error = None if chapters else "no chapters found"
+                except Exception as e:
+                    chapters, error = set(), str(e)
+                record = _ndjson_record(
+                    item,
+                    r["sid"],
+                    chapters,
+                    "popup",
+                    time.perf_counter() - popup_started,
+                    error,
+                )
+
+            if record["error"]:
+                failed += 1
+            else:
+                ok += 1
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    return ok, failed
+
+
 # ================= STANDALONE MAIN =================
 def main():
     """Standalone entry point for running the NU crawler independently."""
@@ -307,27 +705,64 @@ def main():
         "--headless", action="store_true", help="Run browser in headless mode"
     )
     parser.add_argument("--debug", action="store_true", help="Enable debug output")
+    parser.add_argument(
+        "--series-id", help="NU series id (skips reading it from the page)"
+    )
+    parser.add_argument(
+        "--slow",
+        action="store_true",
+        help="Element-by-element popup crawl (no nd_getchapters, no script reads)",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Crawl every series URL / id / slug in FILE (- for stdin) and print NDJSON",
+    )
+    parser.add_argument(
+        "--output", "-o", help="Batch mode: write NDJSON here instead of stdout"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Batch mode: series fetched at once (default: 4)",
+    )
+    parser.add_argument(
+        "--no-fallback",
+        action="store_true",
+        help="Batch mode: don't fall back to the popup crawl when nd_getchapters fails",
+    )
 
     args = parser.parse_args()
 
     # Validate credentials if login is required
     username = args.username or USERNAME
     password = args.password or PASSWORD
-    if not args.no_login and (not username or not password):
+    has_session = nu_session.load_cookies() is not None
+    if not args.no_login and (not username or not password) and not has_session:
         print("❌ ERROR: NU_USER or NU_PASS not set (or provide --username/--password)")
         print("   Use --no-login to skip authentication (may not work)")
         sys.exit(1)
 
+    if args.batch:
+        sys.exit(run_batch(args, username, password))
+
     # Run crawler
     with SB(uc=True, headless=args.headless) as sb:
-        chapters = crawl_nu_chapters(
-            sb,
-            args.url,
-            require_login=not args.no_login,
-            username=username,
-            password=password,
-            debug=args.debug,
-        )
+        try:
+            chapters = crawl_nu_chapters(
+                sb,
+                args.url,
+                require_login=not args.no_login,
+                username=username,
+                password=password,
+                debug=args.debug,
+                series_id=args.series_id,
+                fast=not args.slow,
+            )
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
 
         # Print results
         print("\n" + "=" * 60)
@@ -342,5 +777,34 @@ def main():
                 print(f"Ch {ch}")
 
 
+def run_batch(args, username, password):
+    """Batch mode: log in once, crawl every series, stream NDJSON. Returns an exit code."""
+    items = read_batch_file(args.batch)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    started = time.perf_counter()
+    try:
+        # Progress goes to stderr so stdout carries nothing but NDJSON.
+        with redirect_stdout(sys.stderr), SB(uc=True, headless=args.headless) as sb:
+            print(f"[*] Batch: {len(items)} series")
+            if not args.no_login and not login(sb, username, password):
+                print("❌ Login failed, cannot crawl chapters")
+                return 1
+            ok, failed = crawl_batch(
+                sb,
+                items,
+                out,
+                concurrency=args.concurrency,
+                fallback=not args.no_fallback,
+            )
+            print(
+                f"[*] Batch done: {ok} ok, {failed} failed "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0 if not failed else 2
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,222 @@
+"""
+NovelUpdates session persistence.
+
+Keeps the authenticated NU cookies on disk (with an expiry check) and a
+persistent Chrome user-data-dir, so a freshly launched browser can restore the
+login instead of typing credentials into the login form again.
+"""
+
+import json
+import logging
+import os
+import time
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# ================= CONFIG =================
+# Imported before app.py loads .env, so read it here too (no-op if already loaded).
+load_dotenv()
+DEFAULT_NU_BASE_URL = "https://www.novelupdates.com"
+DEFAULT_FENRIR_BASE_URL = "https://fenrirealm.com"
+NU_BASE_URL = os.getenv("NU_BASE_URL", DEFAULT_NU_BASE_URL).rstrip("/")
+# Either site pointed at a stand-in (replay_server.py): default to a separate
+# cookie file, Chrome profile root and database so replay runs never touch the
+# real login or library. Explicit NU_SESSION_FILE / NU_PROFILE_DIR /
+# DATABASE_URL still win.
+REPLAY = (
+    NU_BASE_URL != DEFAULT_NU_BASE_URL
+    or os.getenv("FENRIR_BASE_URL", DEFAULT_FENRIR_BASE_URL).rstrip("/")
+    != DEFAULT_FENRIR_BASE_URL
+)
+SESSION_FILE = os.getenv(
+    "NU_SESSION_FILE", "nu_session.replay.json" if REPLAY else "nu_session.json"
+)
+# How long a saved session is trusted before we force a fresh login.
+SESSION_TTL_SECONDS = int(os.getenv("NU_SESSION_TTL", str(7 * 24 * 3600)))
+# Root directory for persistent Chrome profiles (one subdirectory per browser).
+PROFILE_ROOT = os.getenv(
+    "NU_PROFILE_DIR", ".browser_profiles-replay" if REPLAY else ".browser_profiles"
+)
+
+LOGIN_COOKIE_PREFIX = "wordpress_logged_in_"
+
+_PROBE_JS = """
+var cb = arguments[arguments.length - 1];
+fetch(arguments[0], {credentials: 'include'})
+    .then(function(r) {
+        return r.text().then(function(h) {
+            cb({url: r.url || '', status: r.status, form: h.indexOf('arrelease') !== -1});
+        });
+    })
+    .catch(function() { cb(null); });
+"""
+
+
+def profile_dir(name):
+    """Return (and create) the persistent user-data-dir for a named browser."""
+    path = os.path.abspath(os.path.join(PROFILE_ROOT, name))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _login_cookie_valid(cookies, now=None):
+    now = now or time.time()
+    for c in cookies or []:
+        if not str(c.get("name", "")).startswith(LOGIN_COOKIE_PREFIX):
+            continue
+        expiry = c.get("expiry")
+        if expiry is None or float(expiry) > now:
+            return True
+    return False
+
+
+def load_cookies(path=None):
+    """Load saved cookies, or None if the file is missing, stale or expired."""
+    path = path or SESSION_FILE
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+    saved_at = float(data.get("saved_at") or 0)
+    if saved_at + SESSION_TTL_SECONDS < time.time():
+        logger.info(
+            "🔑 Saved NU session is older than %ss, ignoring", SESSION_TTL_SECONDS
+        )
+        return None
+
+    cookies = data.get("cookies") or []
+    if not _login_cookie_valid(cookies):
+        logger.info("🔑 Saved NU session has no valid login cookie, ignoring")
+        return None
+    return cookies
+
+
+def save_cookies(sb, path=None):
+    """Persist the browser's NU cookies. Returns True if a login cookie was saved."""
+    path = path or SESSION_FILE
+    host = (urlparse(NU_BASE_URL).hostname or "").removeprefix("www.")
+    try:
+        cookies = [
+            c
+            for c in (sb.driver.get_cookies() or [])
+            if host in str(c.get("domain", ""))
+        ]
+    except Exception as e:
+        logger.warning("⚠️ Could not read browser cookies: %s", e)
+        return False
+
+    if not _login_cookie_valid(cookies):
+        return False
+
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"saved_at": time.time(), "cookies": cookies}, fh)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("⚠️ Could not save NU session: %s", e)
+        return False
+
+    logger.info("💾 Saved NU session (%d cookies)", len(cookies))
+    return True
+
+
+def clear_session(path=None):
+    try:
+        os.remove(path or SESSION_FILE)
+    except OSError:
+        pass
+
+
+def restore_cookies(sb, path=None):
+    """Inject saved cookies into the browser. The browser must be on the NU origin."""
+    cookies = load_cookies(path)
+    if not cookies:
+        return False
+
+    restored = 0
+    for c in cookies:
+        cookie = {
+            k: c[k]
+            for k in ("name", "value", "path", "domain", "secure", "httpOnly")
+            if k in c
+        }
+        if c.get("expiry") is not None:
+            cookie["expiry"] = int(c["expiry"])
+        if c.get("sameSite") in ("Strict", "Lax", "None"):
+            cookie["sameSite"] = c["sameSite"]
+        try:
+            sb.driver.add_cookie(cookie)
+            restored += 1
+        except Exception:
+            pass
+
+    logger.info("🔑 Restored %d NU cookies from disk", restored)
+    return restored > 0
+
+
+def is_logged_in(sb, base_url=None, timeout_seconds=15):
+    """
+    Cheap logged-in probe.
+
+    Checks for a live login cookie first (free), then fetches the add-release
+    page HTML from inside the browser (no sub-resources) and confirms we were
+    not bounced to the login form.
+    """
+    base_url = (base_url or NU_BASE_URL).rstrip("/")
+    try:
+        if not _login_cookie_valid(sb.driver.get_cookies()):
+            return False
+    except Exception:
+        return False
+
+    try:
+        sb.driver.set_script_timeout(timeout_seconds)
+        res = sb.driver.execute_async_script(_PROBE_JS, f"{base_url}/add-release/")
+    except Exception:
+        return False
+
+    if not res:
+        return False
+    return "/login" not in str(res.get("url", "")) and bool(res.get("form"))
+
+
+def open_origin(sb, base_url=None):
+    """Navigate to a tiny same-origin page so cookies can be read/written."""
+    base_url = (base_url or NU_BASE_URL).rstrip("/")
+    try:
+        sb.driver.set_page_load_timeout(10)
+        sb.driver.get(f"{base_url}/robots.txt")
+    except Exception:
+        try:
+            sb.execute_script("try { window.stop(); } catch (e) {}")
+        except Exception:
+            pass
+    finally:
+        try:
+            sb.driver.set_page_load_timeout(60)
+        except Exception:
+            pass
+
+
+def resume_session(sb, path=None, base_url=None):
+    """
+    Try to reuse an existing login without touching the login form.
+
+    The persistent profile may already carry a live session; otherwise the
+    saved cookies are injected and probed. Returns True when logged in.
+    """
+    open_origin(sb, base_url)
+    if is_logged_in(sb, base_url):
+        logger.info("✅ NU session still valid (profile)")
+        return True
+
+    if restore_cookies(sb, path) and is_logged_in(sb, base_url):
+        logger.info("✅ NU session restored from disk")
+        return True
+    return False
@@ -0,0 +1,602 @@
+"""
+Local stand-in for Fenrir Realm and NovelUpdates.
+
+Serves recorded fixtures (or deterministic synthetic pages when no fixture is
+recorded) for everything the tracker touches: Fenrir series pages, NU series
+pages, the nd_getchapters admin-ajax response, the group page with
+select#grouplst, the login form and the add-release form. Latency and HTTP 429
+responses can be injected, so crawl speed work can be measured reproducibly
+without hitting the real sites.
+
+Usage:
+    python replay_server.py --series 50 --chapters 300 --latency 0.05 --rate-429 0.02
+
+Then point the app (or nu_crawler.py / search.py) at it:
+    NU_BASE_URL=http://127.0.0.1:8801 FENRIR_BASE_URL=http://127.0.0.1:8802 python app.py
+
+Recorded fixtures override the synthetic pages when present under --fixtures:
+    nu/series/<slug>.html          NU series page
+    nu/nd_getchapters/<sid>.html   admin-ajax nd_getchapters response
+    nu/group/<slug>.html           group page (select#grouplst)
+    nu/add-release.html            add-release form
+    nu/login.html                  login form
+    fenrir/series/<slug>.html      Fenrir series page
+"""
+
+import argparse
+import html
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import re
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+LOGIN_COOKIE = "wordpress_logged_in_replay"
+
+
+# ================= CATALOG =================
+class ReplayCatalog:
+    """
+    Deterministic synthetic library.
+
+    Each series has ``chapters`` (+ a per-series offset) chapters on Fenrir, of
+    which the first ``chapters - nu_lag`` are already listed on NU. With
+    ``per_volume`` > 0, chapters are grouped into volumes (v1c1..., v2c1...).
+    """
+
+    def __init__(
+        self,
+        series=20,
+        chapters=200,
+        nu_lag=10,
+        per_volume=0,
+        group_slug="fenrir-realm",
+    ):
+        self.group_slug = group_slug
+        self.per_volume = per_volume
+        self.series = []
+        for i in range(series):
+            total = chapters + (i * 7) % 50
+            self.series.append(
+                {
+                    "slug": f"replay-series-{i:04d}",
+                    "title": f"Replay Series {i}",
+                    "sid": str(100000 + i),
+                    "fenrir": total,
+                    "nu": max(0, total - nu_lag),
+                }
+            )
+        self._by_slug = {s["slug"]: s for s in self.series}
+        self._by_sid = {s["sid"]: s for s in self.series}
+
+    def by_slug(self, slug):
+        return self._by_slug.get(slug)
+
+    def by_sid(self, sid):
+        return self._by_sid.get(str(sid))
+
+    def vol_ch(self, n):
+        """1-based chapter index -> (vol, ch)."""
+        if self.per_volume <= 0:
+            return 0, n
+        return (n - 1) // self.per_volume + 1, (n - 1) % self.per_volume + 1
+
+    def label(self, n):
+        vol, ch = self.vol_ch(n)
+        return f"v{vol} c{ch}" if vol else f"c{ch}"
+
+    def fenrir_chapters(self, slug):
+        s = self.by_slug(slug)
+        return {self.vol_ch(n) for n in range(1, s["fenrir"] + 1)} if s else set()
+
+    def nu_chapters(self, slug):
+        s = self.by_slug(slug)
+        return {self.vol_ch(n) for n in range(1, s["nu"] + 1)} if s else set()
+
+
+# ================= PAGES =================
+def _page(title, body, body_class=""):
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>{html.escape(title)}</title></head>"
+        f"<body class='{body_class}'>{body}</body></html>"
+    )
+
+
+def render_nu_series(catalog, s, fenrir_base):
+    rows = "".join(
+        f"<tr><td><a href='/extnu/{s['sid']}{n}/'>{catalog.label(n).replace(' ', '')}</a></td></tr>"
+        for n in range(s["nu"], max(0, s["nu"] - 15), -1)
+    )
+    body = f"""
+<input type="hidden" id="mypostid" value="{s['sid']}">
+<div class="seriestitlenu">{html.escape(s['title'])}</div>
+<div id="showlinks"><a href="{fenrir_base}/series/{s['slug']}">Fenrir Realm</a></div>
+<span class="my_popupreading_open">Show all chapters</span>
+<div id="my_popupreading"></div>
+<table class="tablesorter" id="myTable"><tbody>{rows}</tbody></table>
+<script>
+function list_allchpstwo() {{
+    var fd = new FormData();
+    fd.append('action', 'nd_getchapters');
+    fd.append('mypostid', '{s['sid']}');
+    fetch('/wp-admin/admin-ajax.php', {{method: 'POST', body: fd, credentials: 'include'}})
+        .then(function(r) {{ return r.text(); }})
+        .then(function(h) {{ document.getElementById('my_popupreading').innerHTML = h; }});
+}}
+document.querySelector('.my_popupreading_open').addEventListener('click', list_allchpstwo);
+</script>"""
+    return _page(
+        f"{s['title']} - Novel Updates", body, f"single single-series postid-{s['sid']}"
+    )
+
+
+def render_nd_getchapters(catalog, s):
+    items = "".join(
+        f'<li class="sp_li_chp"><a href="/extnu/{s["sid"]}{n}/">'
+        f'<span title="{catalog.label(n)}">{catalog.label(n)}</span></a></li>'
+        for n in range(1, s["nu"] + 1)
+    )
+    return f'<div class="sp_chp_wrap"><ol class="sp_chp">{items}</ol></div>'
+
+
+def render_group(catalog, nu_base):
+    options = "".join(
+        f"<option value='{nu_base}/series/{s['slug']}/'>{html.escape(s['title'])}</option>"
+        for s in catalog.series
+    )
+    body = f"<h1>Fenrir Realm</h1><select id='grouplst' style='display:none'><option value='---'>---</option>{options}</select>"
+    return _page("Fenrir Realm - Novel Updates", body)
+
+
+def render_fenrir_series(catalog, s):
+    links = []
+    for n in range(1, s["fenrir"] + 1):
+        vol, ch = catalog.vol_ch(n)
+        href = (
+            f"/series/{s['slug']}/vol-{vol}/{ch}"
+            if vol
+            else f"/series/{s['slug']}/{ch}"
+        )
+        text = f"Volume {vol} Chapter {ch}" if vol else f"Chapter {ch}"
+        links.append(f"<a class='btn-chapter' href='{href}'>{text}</a>")
+    body = (
+        f"<h1>{html.escape(s['title'])}</h1><div id='list-chapter'>"
+        f"<div role='tabpanel' data-value='free'><div class='grid-chapter'>{''.join(links)}</div></div>"
+        "</div>"
+    )
+    return _page(s["title"], body)
+
+
+LOGIN_PAGE = _page(
+    "Login - Novel Updates",
+    """
+<form method="post" action="/login/">
+<input type="text" id="user_login" name="log">
+<input type="password" id="user_pass" name="pwd">
+<input type="submit" id="wp-submit" name="wp-submit" value="Log In">
+</form>""",
+)
+
+ADD_RELEASE_PAGE = _page(
+    "Add Release - Novel Updates",
+    """
+<h2>Add Release</h2>
+<form method="post" action="/add-release/">
+<input type="text" id="title_change_100" name="title_change_100" autocomplete="off">
+<input type="hidden" id="title100" name="title100">
+<div id="livesearch"></div>
+<input type="text" id="arrelease" name="arrelease">
+<input type="text" id="arlink" name="arlink">
+<input type="text" id="group_change_100" name="group_change_100" autocomplete="off">
+<input type="hidden" id="group100" name="group100">
+<div id="livesearchgroup"></div>
+<input type="text" id="ardate" name="ardate">
+<button type="submit" id="submit">Submit</button>
+</form>
+<script>
+function changeitem(num, id, name, type) {
+    var key = type === 'group' ? 'group' : 'title';
+    document.getElementById(key + num).value = id;
+    document.getElementById(key + '_change_' + num).value = name;
+}
+function showResult(str, num, type) {
+    fetch('/livesearch/?type=' + encodeURIComponent(type) + '&q=' + encodeURIComponent(str))
+        .then(function(r) { return r.text(); })
+        .then(function(h) {
+            document.getElementById(type === 'group' ? 'livesearchgroup' : 'livesearch').innerHTML = h;
+        });
+}
+</script>""",
+)
+
+
+# ================= SERVER =================
+class ReplayState:
+    """Shared config and counters for both stand-in sites."""
+
+    def __init__(
+        self, catalog, latency=0.0, jitter=0.0, rate_429=0.0, fixtures_dir=None, seed=0
+    ):
+        self.catalog = catalog
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.fixtures_dir = fixtures_dir
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.nu_base = ""
+        self.fenrir_base = ""
+        self.stats = {"requests": 0, "bytes": 0, "429": 0, "by_route": {}}
+        self.submissions = []
+
+    def fixture(self, *parts):
+        if not self.fixtures_dir:
+            return None
+        path = os.path.join(self.fixtures_dir, *parts)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                return fh.read()
+        except OSError:
+            return None
+
+    def should_429(self):
+        with self.lock:
+            return self.rate_429 > 0 and self.rng.random() < self.rate_429
+
+    def count(self, route, nbytes, status):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += nbytes
+            if status == 429:
+                self.stats["429"] += 1
+            self.stats["by_route"][route] = self.stats["by_route"].get(route, 0) + 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    site = ""
+    state = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    # -- plumbing --
+    def _send(
+        self, status, body, route, content_type="text/html; charset=utf-8", headers=None
+    ):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+        self.state.count(f"{self.site}:{route}", len(data), status)
+
+    def _redirect(self, location, route, cookie=None):
+        headers = {"Location": location}
+        if cookie:
+            headers["Set-Cookie"] = cookie
+        self._send(302 if self.command == "GET" else 303, "", route, headers=headers)
+
+    def _form(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        ctype = self.headers.get("Content-Type", "")
+        if "multipart/form-data" in ctype:
+            fields = {}
+            for m in re.finditer(rb'name="([^"]+)"\r\n\r\n(.*?)\r\n--', raw, re.S):
+                fields[m.group(1).decode()] = m.group(2).decode("utf-8", "replace")
+            return fields
+        return {k: v[-1] for k, v in parse_qs(raw.decode("utf-8", "replace")).items()}
+
+    def _logged_in(self):
+        return LOGIN_COOKIE in (self.headers.get("Cookie") or "")
+
+    def _delay(self):
+        latency = self.state.latency
+        if self.state.jitter:
+            latency += self.state.rng.uniform(0, self.state.jitter)
+        if latency > 0:
+            time.sleep(latency)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        path = urlparse(self.path).path
+        if path == "/__stats":
+            return self._send(
+                200, json.dumps(self.state.stats), "stats", "application/json"
+            )
+        if path == "/robots.txt":
+            return self._send(200, "User-agent: *\n", "robots", "text/plain")
+
+        self._delay()
+        if path not in ("/login/",) and self.state.should_429():
+            return self._send(
+                429,
+                _page("429 Too Many Requests", "<h1>429 Too Many Requests</h1>"),
+                "429",
+            )
+
+        if self.site == "nu":
+            self._nu(path)
+        else:
+            self._fenrir(path)
+
+    # -- NovelUpdates --
+    def _nu(self, path):
+        st = self.state
+        cat = st.catalog
+
+        if path == "/login/":
+            if self.command == "POST":
+                self._form()
+                cookie = f"{LOGIN_COOKIE}=1; Path=/; Max-Age=2592000"
+                return self._redirect("/", "login", cookie=cookie)
+            return self._send(
+                200, st.fixture("nu", "login.html") or LOGIN_PAGE, "login"
+            )
+
+        if path == "/":
+            return self._send(
+                200,
+                _page("Novel Updates", "<h1>Home</h1><a href='/logout/'>logout</a>"),
+                "home",
+            )
+
+        if path == "/wp-admin/admin-ajax.php" and self.command == "POST":
+            form = self._form()
+            if form.get("action") != "nd_getchapters":
+                return self._send(400, "0", "ajax")
+            sid = form.get("mypostid", "")
+            s = cat.by_sid(sid)
+            body = st.fixture("nu", "nd_getchapters", f"{sid}.html") or (
+                render_nd_getchapters(cat, s) if s else ""
+            )
+            return self._send(200, body, "nd_getchapters")
+
+        m = re.fullmatch(r"/series/([^/]+)/?", path)
+        if m:
+            slug = m.group(1)
+            body = st.fixture("nu", "series", f"{slug}.html")
+            if body is None:
+                s = cat.by_slug(slug)
+                if not s:
+                    return self._send(404, _page("Not found", "<h1>404</h1>"), "series")
+                body = render_nu_series(cat, s, st.fenrir_base)
+            return self._send(200, body, "series")
+
+        m = re.fullmatch(r"/group/([^/]+)/?", path)
+        if m:
+            body = st.fixture("nu", "group", f"{m.group(1)}.html") or render_group(
+                cat, st.nu_base
+            )
+            return self._send(200, body, "group")
+
+        if path == "/livesearch/":
+            q = parse_qs(urlparse(self.path).query)
+            term = (q.get("q") or [""])[0].lower()
+            kind = (q.get("type") or ["series"])[0]
+            if kind == "group":
+                hits = (
+                    [("78568", "Fenrir Realm")]
+                    if term and term in "fenrir realm"
+                    else []
+                )
+            else:
+                hits = [
+                    (s["sid"], s["title"])
+                    for s in cat.series
+                    if term and term in s["title"].lower()
+                ][:10]
+            body = "".join(
+                f"<a onclick=\"changeitem('100','{i}','{html.escape(t)}','{kind}')\">{html.escape(t)}</a><br>"
+                for i, t in hits
+            )
+            return self._send(200, body, "livesearch")
+
+        if path == "/add-release/":
+            if not self._logged_in():
+                return self._redirect("/login/", "add-release")
+            if self.command == "POST":
+                form = self._form()
+                title_ok = form.get("title100") or any(
+                    s["title"].lower()
+                    == form.get("title_change_100", "").strip().lower()
+                    for s in cat.series
+                )
+                group_ok = (
+                    form.get("group100") or form.get("group_change_100", "").strip()
+                )
+                if not (
+                    title_ok
+                    and group_ok
+                    and form.get("arrelease")
+                    and form.get("arlink")
+                ):
+                    page = (
+                        st.fixture("nu", "add-release.html") or ADD_RELEASE_PAGE
+                    ).replace(
+                        "<h2>Add Release</h2>",
+                        "<h2>Add Release</h2><p>Please select a series and group.</p>",
+                    )
+                    return self._send(200, page, "add-release")
+                with st.lock:
+                    st.submissions.append(form)
+                return self._redirect("/release-submitted/", "add-release")
+            return self._send(
+                200,
+                st.fixture("nu", "add-release.html") or ADD_RELEASE_PAGE,
+                "add-release",
+            )
+
+        if path == "/release-submitted/":
+            return self._send(
+                200,
+                _page("Thank you", "<h1>Thank you for your submission</h1>"),
+                "submitted",
+            )
+
+        return self._send(404, _page("Not found", "<h1>404</h1>"), "other")
+
+    # -- Fenrir Realm --
+    def _fenrir(self, path):
+        st = self.state
+        m = re.fullmatch(r"/series/([^/]+)/?", path)
+        if m:
+            slug = m.group(1)
+            body = st.fixture("fenrir", "series", f"{slug}.html")
+            if body is None:
+                s = st.catalog.by_slug(slug)
+                if not s:
+                    return self._send(404, _page("Not found", "<h1>404</h1>"), "series")
+                body = render_fenrir_series(st.catalog, s)
+            return self._send(200, body, "series")
+        if re.fullmatch(r"/series/[^/]+/.+", path):
+            return self._send(
+                200, _page("Chapter", "<article>Chapter text</article>"), "chapter"
+            )
+        return self._send(404, _page("Not found", "<h1>404</h1>"), "other")
+
+
+class ReplayServers:
+    """Both stand-in sites running on background threads."""
+
+    def __init__(self, state, host="127.0.0.1", nu_port=8801, fenrir_port=8802):
+        self.state = state
+        self._servers = []
+        for site, port in (("nu", nu_port), ("fenrir", fenrir_port)):
+            handler = type(
+                f"{site.title()}Handler", (_Handler,), {"site": site, "state": state}
+            )
+            server = ThreadingHTTPServer((host, port), handler)
+            server.daemon_threads = True
+            self._servers.append(server)
+        self.nu_base = f"http://{host}:{self._servers[0].server_address[1]}"
+        self.fenrir_base = f"http://{host}:{self._servers[1].server_address[1]}"
+        state.nu_base = self.nu_base
+        state.fenrir_base = self.fenrir_base
+
+    def start(self):
+        for server in self._servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        return self
+
+    def close(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+    def env(self):
+        """Environment overrides that point the tracker at this stand-in."""
+        return {"NU_BASE_URL": self.nu_base, "FENRIR_BASE_URL": self.fenrir_base}
+
+
+def start_replay(
+    series=20,
+    chapters=200,
+    nu_lag=10,
+    per_volume=0,
+    latency=0.0,
+    jitter=0.0,
+    rate_429=0.0,
+    fixtures_dir=None,
+    host="127.0.0.1",
+    nu_port=0,
+    fenrir_port=0,
+    seed=0,
+):
+    """Start both sites (ephemeral ports by default) and return the ReplayServers."""
+    catalog = ReplayCatalog(
+        series=series, chapters=chapters, nu_lag=nu_lag, per_volume=per_volume
+    )
+    state = ReplayState(
+        catalog,
+        latency=latency,
+        jitter=jitter,
+        rate_429=rate_429,
+        fixtures_dir=fixtures_dir,
+        seed=seed,
+    )
+    return ReplayServers(
+        state, host=host, nu_port=nu_port, fenrir_port=fenrir_port
+    ).start()
+
+
+# ================= STANDALONE MAIN =================
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for Fenrir Realm and NovelUpdates"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--nu-port", type=int, default=8801)
+    parser.add_argument("--fenrir-port", type=int, default=8802)
+    parser.add_argument("--series", type=int, default=20, help="Synthetic series count")
+    parser.add_argument(
+        "--chapters", type=int, default=200, help="Base Fenrir chapters per series"
+    )
+    parser.add_argument(
+        "--nu-lag", type=int, default=10, help="Chapters per series missing on NU"
+    )
+    parser.add_argument(
+        "--per-volume", type=int, default=0, help="Chapters per volume (0 = no volumes)"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds added to every response"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Extra random latency, 0..N seconds"
+    )
+    parser.add_argument(
+        "--rate-429",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with 429",
+    )
+    parser.add_argument(
+        "--fixtures", help="Directory of recorded fixtures overriding synthetic pages"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    servers = start_replay(
+        series=args.series,
+        chapters=args.chapters,
+        nu_lag=args.nu_lag,
+        per_volume=args.per_volume,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_429=args.rate_429,
+        fixtures_dir=args.fixtures,
+        host=args.host,
+        nu_port=args.nu_port,
+        fenrir_port=args.fenrir_port,
+        seed=args.seed,
+    )
+    print("[*] Replay servers running")
+    for k, v in servers.env().items():
+        print(f"    {k}={v}")
+    print(f"[*] Stats: {servers.nu_base}/__stats")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servers.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,46 @@
+"""
+Fenrir Realm -> NovelUpdates pipeline.
+
+Crawls the Fenrir chapter list and the NU chapter list of one or many series,
+diffs them and fills the NU Add Release form for every missing chapter (the
+forms are NOT submitted).
+
+    python search.py                                # the built-in example series
+    python search.py --series series.txt            # "<fenrir_url> <nu_url> [name]" per line
+    python search.py --db instance/novels.db        # every active novel tracked by app.py
+    python search.py --series - --no-forms -o missing.ndjson
+
+Stages overlap: Fenrir pages are fetched over plain HTTP on the crawl engine
+while the browser reads NU chapter lists (nd_getchapters, several series per
+script call), each series is diffed as soon as both sides are in, and its
+missing chapters go to the form stage straight away. Each stage reports its
+throughput at the end.
+"""
+
+import argparse
+from collections import deque
+import json
 import os
+import queue
 import random
-import re
+import sqlite3
 import sys
 import time
+from urllib.parse import parse_qs, urlparse
 
 from seleniumbase import SB
 
+from chapters import parse_fenrir_chapter_html, parse_vol_ch
+import crawl_engine
+
 # Import NU crawler functions
-from nu_crawler import crawl_nu_chapters, human_type, login, parse_vol_ch
+from nu_crawler import (
+    crawl_nu_chapters,
+    fetch_chapters_batch,
+    fill_form,
+    login,
+)
+import nu_session
 
 
 # ================= HELPERS =================
@@ -24,29 +57,34 @@ FENRI_URL = (
 )
 NU_URL = "https://www.novelupdates.com/series/how-could-the-villainous-young-master-be-a-saintess/?pg=1&grp=78568"
 GROUP_NAME = "Fenrir Realm"  # Translation group name for submissions
-
-if not USERNAME or not PASSWORD:
-    print("❌ ERROR: NU_USER or NU_PASS not set")
-    sys.exit(1)
+# app.py's default database (its replay one when a base URL is overridden)
+DB_PATH = os.path.join("instance", "replay.db" if nu_session.REPLAY else "novels.db")
 
 
 # ================= FENRIR =================
-def crawl_fenrir_chapters(sb):
+# Chapters are (vol, ch) with vol 0 when there is no volume, as in app.py
+# (chapters.parse_vol_ch); NU chapter sets are normalised to match.
+def crawl_fenrir_chapters(sb, url=FENRI_URL):
     print("[*] Crawling Fenrir chapters...")
-    sb.open(FENRI_URL)
+    sb.open(url)
     sb.wait_for_element("#list-chapter", timeout=15)
 
     # Only look for chapters in the "Free Chapters" tab panel
     # Free chapters are in: [role="tabpanel"][data-value="free"]
     free_tab_selector = '[role="tabpanel"][data-value="free"]'
+    count_js = (
+        f"return document.querySelectorAll('{free_tab_selector} a.btn-chapter').length;"
+    )
 
-    # Scroll to load all chapters in the free tab
+    # Scroll to load all chapters in the free tab; stop once a scroll loads nothing new
     last = 0
     for _ in range(20):
         sb.execute_script("window.scrollBy(0, 6000);")
-        sb.sleep(1.2)
-        # Count only free chapter links
-        cur = len(sb.find_elements(f"{free_tab_selector} a.btn-chapter"))
+        deadline = time.time() + 1.2
+        cur = sb.execute_script(count_js)
+        while cur == last and time.time() < deadline:
+            time.sleep(0.2)
+            cur = sb.execute_script(count_js)
         if cur == last and cur > 0:
             break
         last = cur
@@ -75,11 +113,22 @@ def crawl_fenrir_chapters(sb):
     return chapters
 
 
+async def fetch_fenrir_chapters(engine, url):
+    """Fenrir chapters over HTTP; an empty set means the page needs the browser."""
+    html = await engine.fetch(url)
+    return parse_fenrir_chapter_html(html, url)
+
+
+def normalize_chapters(chapters):
+    """NU (vol, ch) pairs from nu_crawler (vol None without a volume) -> app keys."""
+    return {(int(vol or 0), int(ch)) for vol, ch in chapters}
+
+
 # ================= ADD RELEASE =================
 def open_add_release(sb):
     """Open the Add Release page on NovelUpdates."""
     print("[*] Opening Add Release page...")
-    sb.open("https://www.novelupdates.com/add-release/")
+    sb.open(f"{nu_session.NU_BASE_URL}/add-release/")
     sb.sleep(5)
 
     if sb.is_text_visible("Add Release"):
@@ -92,7 +141,7 @@ def open_add_release(sb):
 
 def format_chapter_name(vol, ch):
     """Format chapter as 'v2c77' or 'c16'."""
-    if vol is not None:
+    if vol:
         return f"v{vol}c{ch}"
     else:
         return f"c{ch}"
@@ -103,9 +152,10 @@ def build_fenrir_chapter_url(chapter_num, fenrir_base_url):
     # Extract series slug from base URL
     # e.g., "https://fenrirealm.com/series/series-name" -> "series-name"
     series_slug = fenrir_base_url.split("/series/")[-1].rstrip("/")
+    origin = "{0.scheme}://{0.netloc}".format(urlparse(fenrir_base_url))
 
     # Fenrir chapter URLs are typically: /series/series-name/chapter-number
-    return f"https://fenrirealm.com/series/{series_slug}/{chapter_num}"
+    return f"{origin}/series/{series_slug}/{chapter_num}"
 
 
 def fill_add_release(
@@ -114,109 +164,392 @@ def fill_add_release(
     """Fill the Add Release form (does NOT submit)."""
     print(f"[*] Filling form for: {release_name}")
 
-    print("  → Series")
-    human_type(sb, "#title_change_100", series_name)
-
-    print("  → Release")
-    human_type(sb, "#arrelease", release_name)
-
-    print("  → Link")
-    human_type(sb, "#arlink", release_link)
-
-    print("  → Group")
-    human_type(sb, "#group_change_100", group_name)
-
+    fields = {
+        "#title_change_100": series_name,
+        "#arrelease": release_name,
+        "#arlink": release_link,
+        "#group_change_100": group_name,
+    }
     if release_date:
-        print("  → Release Date")
-        human_type(sb, "#ardate", release_date)
-
+        fields["#ardate"] = release_date
+    # Series and group are livesearch inputs: they need the keyup to look up ids.
+    filled = fill_form(sb, fields, keyup=("#title_change_100", "#group_change_100"))
+
+    missing = [sel for sel in fields if filled.get(sel) is None]
+    if missing:
+        print(f"  ❌ Form fields not found: {', '.join(missing)}")
+        return False
     print("  ✅ Form filled (NOT submitted)")
+    return True
 
 
-def prepare_submissions(sb, missing_chapters, series_name, fenrir_base_url, group_name):
-    """Prepare submissions for missing chapters (fills forms but doesn't submit)."""
+def prepare_submissions(
+    sb, missing_chapters, series_name, fenrir_base_url, group_name, links=None
+):
+    """
+    Prepare submissions for missing chapters (fills forms but doesn't submit).
+
+    Returns the number of forms filled.
+    """
     if not missing_chapters:
         print("[*] No missing chapters to submit")
-        return
+        return 0
 
     print(f"\n[*] Preparing to submit {len(missing_chapters)} missing chapters...")
 
     if not open_add_release(sb):
         print("❌ Could not open Add Release page")
-        return
+        return 0
 
     print("\n🟡 SUBMISSIONS PREPARED BUT NOT SUBMITTED")
     print("=" * 60)
 
     for idx, (vol, ch) in enumerate(missing_chapters, 1):
         release_name = format_chapter_name(vol, ch)
-        release_link = build_fenrir_chapter_url(ch, fenrir_base_url)
+        release_link = (links or {}).get(f"{vol}:{ch}") or build_fenrir_chapter_url(
+            ch, fenrir_base_url
+        )
 
         print(f"\n[{idx}/{len(missing_chapters)}] Chapter: {release_name}")
         print(f"  Link: {release_link}")
 
         # Fill the form
-        fill_add_release(
+        if not fill_add_release(
             sb,
             series_name=series_name,
             release_name=release_name,
             release_link=release_link,
             group_name=group_name,
             release_date=None,
-        )
+        ):
+            return idx - 1
 
-        # Don't submit - just wait a bit between chapters
-        human_sleep(1, 2)
+        # Don't submit - just give the livesearch a moment between chapters
+        human_sleep(0.3, 0.6)
         print("  ⚠️  NOT SUBMITTED (preview only)")
 
     print("\n" + "=" * 60)
     print("🟡 All forms filled but NOT submitted")
     print("   To enable submission, uncomment the submit button click in the code")
+    return len(missing_chapters)
+
+
+# ================= SERIES LIST =================
+def _series(
+    fenrir_url, nu_url, name=None, series_id=None, group_id=None, group_name=None
+):
+    if not name:
+        # Extract series name from URL (last part of path), hyphens -> spaces, title case
+        slug = nu_url.split("/series/")[-1].split("/")[0].split("?")[0]
+        name = slug.replace("-", " ").title()
+    if not group_id:
+        group_id = (parse_qs(urlparse(nu_url).query).get("grp") or [None])[0]
+    return {
+        "name": name,
+        "fenrir_url": fenrir_url,
+        "nu_url": nu_url,
+        "series_id": series_id,
+        "group_id": group_id,
+        "group_name": group_name or GROUP_NAME,
+    }
+
+
+def load_series_file(path):
+    """
+    Read series from ``path`` ("-" for stdin): "<fenrir_url> <nu_url> [name]"
+    per line; blank lines and "#" comments are skipped.
+    """
+    fh = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    series = []
+    try:
+        for n, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split(None, 2)
+            if len(parts) < 2:
+                print(
+                    f"[!] {path}:{n}: expected '<fenrir_url> <nu_url> [name]', skipped"
+                )
+                continue
+            series.append(
+                _series(parts[0], parts[1], parts[2] if len(parts) > 2 else None)
+            )
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+    return series
+
+
+def load_series_db(path=DB_PATH):
+    """Read every active novel from app.py's SQLite database."""
+    con = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = con.execute(
+            "SELECT name, fenrir_url, nu_url, nu_series_id, nu_group_id, group_name "
+            "FROM novel WHERE status = 'active' ORDER BY id"
+        ).fetchall()
+    finally:
+        con.close()
+    return [
+        _series(f, u, name, sid, gid, group) for name, f, u, sid, gid, group in rows
+    ]
+
+
+# ================= PIPELINE =================
+class StageStats:
+    """Items through one pipeline stage and the wall time it took."""
+
+    def __init__(self, name, started):
+        self.name = name
+        self.started = started
+        self.items = 0
+        self.failed = 0
+        self.finished = None
+
+    def done(self, ok=True, n=1):
+        self.items += n
+        self.failed += 0 if ok else n
+        self.finished = time.perf_counter()
+
+    @property
+    def seconds(self):
+        return (self.finished or self.started) - self.started
+
+    @property
+    def rate(self):
+        return self.items / self.seconds if self.seconds > 0 else 0.0
+
+
+def run_pipeline(sb, series, concurrency=4, forms=True, out=None):
+    """
+    Crawl, diff and prepare submissions for every series in ``series``.
+
+    Fenrir pages are fetched concurrently on the crawl engine (falling back to
+    the browser when a page has no chapters in its HTML) while the browser
+    reads NU chapter lists ``concurrency`` series at a time. Series are diffed
+    as soon as both sides are in and their missing chapters are filled into
+    the form between NU batches. One JSON line per series goes to ``out``.
+
+    Returns the {stage: StageStats} report.
+    """
+    started = time.perf_counter()
+    stats = {
+        name: StageStats(name, started) for name in ("fenrir", "nu", "diff", "forms")
+    }
+    fenrir, nu = {}, {}
+    diffed = set()
+    to_fill = deque()
+    fenrir_done = queue.Queue()
+
+    engine = crawl_engine.CrawlEngine().start()
+    for idx, s in enumerate(series):
+        future = engine.submit(fetch_fenrir_chapters(engine, s["fenrir_url"]))
+        future.add_done_callback(lambda f, idx=idx: fenrir_done.put((idx, f)))
+
+    def collect_fenrir(block=False):
+        while len(fenrir) < len(series):
+            try:
+                idx, future = fenrir_done.get(block=block, timeout=None if block else 0)
+            except queue.Empty:
+                return
+            try:
+                fenrir[idx] = future.result()
+            except Exception as e:
+                print(f"[!] Fenrir HTTP fetch failed for {series[idx]['name']}: {e}")
+                fenrir[idx] = (set(), {})
+            if not fenrir[idx][0]:
+                # Nothing in the raw HTML (client-rendered list): scroll it in the browser.
+                try:
+                    fenrir[idx] = (
+                        crawl_fenrir_chapters(sb, series[idx]["fenrir_url"]),
+                        {},
+                    )
+                except Exception as e:
+                    print(
+                        f"[!] Fenrir browser crawl failed for {series[idx]['name']}: {e}"
+                    )
+            stats["fenrir"].done(ok=bool(fenrir[idx][0]))
+
+    def diff_ready():
+        for idx in sorted(set(fenrir) & set(nu) - diffed):
+            diffed.add(idx)
+            s = series[idx]
+            f_chapters, links = fenrir[idx]
+            missing = sorted(f_chapters - nu[idx]["chapters"])
+            ok = bool(f_chapters) and not nu[idx]["error"]
+            stats["diff"].done(ok=ok)
+            print(
+                f"[*] {s['name']}: fenrir {len(f_chapters)}, nu {len(nu[idx]['chapters'])}, missing {len(missing)}"
+            )
+            if out:
+                out.write(
+                    json.dumps(
+                        {
+                            "name": s["name"],
+                            "fenrir_url": s["fenrir_url"],
+                            "nu_url": s["nu_url"],
+                            "series_id": nu[idx]["sid"],
+                            "fenrir": len(f_chapters),
+                            "nu": len(nu[idx]["chapters"]),
+                            "missing": [[vol, ch] for vol, ch in missing],
+                            "error": (
+                                None
+                                if ok
+                                else (nu[idx]["error"] or "no Fenrir chapters")
+                            ),
+                        }
+                    )
+                    + "\n"
+                )
+                out.flush()
+            if ok and missing and forms:
+                to_fill.append((s, missing, links))
+
+    def fill_ready():
+        while to_fill:
+            s, missing, links = to_fill.popleft()
+            filled = prepare_submissions(
+                sb, missing, s["name"], s["fenrir_url"], s["group_name"], links=links
+            )
+            stats["forms"].done(ok=filled == len(missing), n=len(missing))
+
+    def progress():
+        print(
+            f"[*] Progress: fenrir {stats['fenrir'].items}/{len(series)}, "
+            f"nu {stats['nu'].items}/{len(series)}, diffed {stats['diff'].items}, "
+            f"forms {stats['forms'].items}"
+        )
+
+    try:
+        step = max(1, concurrency)
+        for start in range(0, len(series), step):
+            chunk = list(enumerate(series))[start : start + step]
+            items = [
+                {"url": s["nu_url"], "sid": s["series_id"], "grp": s["group_id"]}
+                for _idx, s in chunk
+            ]
+            try:
+                results = fetch_chapters_batch(sb, items)
+            except Exception as e:
+                results = [
+                    {"sid": None, "chapters": set(), "error": str(e)} for _ in chunk
+                ]
+
+            for (idx, s), r in zip(chunk, results):
+                if not r["chapters"]:
+                    # nd_getchapters failed: open the page and walk the popup.
+                    try:
+                        chapters = crawl_nu_chapters(
+                            sb,
+                            s["nu_url"],
+                            require_login=False,
+                            series_id=r["sid"],
+                            use_ajax=False,
+                        )
+                        r = {
+                            "sid": r["sid"],
+                            "chapters": chapters,
+                            "error": None if chapters else r["error"],
+                        }
+                    except Exception as e:
+                        r = {"sid": r["sid"], "chapters": set(), "error": str(e)}
+                r["chapters"] = normalize_chapters(r["chapters"])
+                nu[idx] = r
+                stats["nu"].done(ok=not r["error"])
+
+            collect_fenrir()
+            diff_ready()
+            fill_ready()
+            progress()
+
+        # NU is done; finish whatever Fenrir pages are still in flight.
+        collect_fenrir(block=True)
+        diff_ready()
+        fill_ready()
+    finally:
+        engine.stop()
+    return stats
+
+
+def print_report(stats):
+    print("\n" + "=" * 60)
+    print(f"{'Stage':<8} {'items':>7} {'failed':>7} {'seconds':>9} {'items/s':>9}")
+    for st in stats.values():
+        print(
+            f"{st.name:<8} {st.items:>7} {st.failed:>7} {st.seconds:>9.1f} {st.rate:>9.2f}"
+        )
+    print("=" * 60)
 
 
 # ================= MAIN =================
 def main():
-    with SB(uc=True, headless=True) as sb:
-        fenrir = crawl_fenrir_chapters(sb)
-        # Login once and let NU crawler use the session
-        login(sb, USERNAME, PASSWORD)
-        nu = crawl_nu_chapters(
-            sb, NU_URL, require_login=False, username=USERNAME, password=PASSWORD
-        )
+    parser = argparse.ArgumentParser(
+        description="Find Fenrir Realm chapters missing on NovelUpdates and prepare their releases"
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--series",
+        metavar="FILE",
+        help="'<fenrir_url> <nu_url> [name]' per line (- for stdin)",
+    )
+    source.add_argument(
+        "--db",
+        nargs="?",
+        const=DB_PATH,
+        metavar="PATH",
+        help=f"Take every active novel from app.py's database (default: {DB_PATH})",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="NU series read per script call (default: 4)",
+    )
+    parser.add_argument(
+        "--no-forms",
+        action="store_true",
+        help="Only report missing chapters, don't fill forms",
+    )
+    parser.add_argument("--output", "-o", help="Write one JSON line per series here")
+    parser.add_argument(
+        "--headed", action="store_true", help="Show the browser (default: headless)"
+    )
+    args = parser.parse_args()
 
-        missing = sorted(fenrir - nu)
-
-        print("\n" + "=" * 60)
-        print(f"Missing chapters on NovelUpdates: {len(missing)}")
-        print("=" * 60)
-        for vol, ch in missing:
-            if vol is not None:
-                print(f"Vol {vol} Ch {ch}")
-            else:
-                print(f"Ch {ch}")
-
-        # Prepare submissions (but don't submit)
-        if missing:
-            # Extract series name from URL (last part of path)
-            series_name = NU_URL.split("/series/")[-1].split("/")[0].split("?")[0]
-            # Replace hyphens with spaces and title case for display
-            series_display_name = series_name.replace("-", " ").title()
-
-            print("\n" + "=" * 60)
-            print("Preparing submissions...")
-            print("=" * 60)
-
-            # Note: This will fill forms but NOT submit
-            # Set headless=False if you want to see the browser
-            prepare_submissions(
+    if args.series:
+        series = load_series_file(args.series)
+    elif args.db:
+        series = load_series_db(args.db)
+    else:
+        series = [_series(FENRI_URL, NU_URL)]
+    if not series:
+        print("[*] No series to process")
+        return
+
+    if (not USERNAME or not PASSWORD) and nu_session.load_cookies() is None:
+        print("❌ ERROR: NU_USER or NU_PASS not set")
+        sys.exit(1)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        with SB(uc=True, headless=not args.headed) as sb:
+            # Login once and let every NU stage use the session
+            if not login(sb, USERNAME, PASSWORD):
+                sys.exit(1)
+            print(f"[*] Pipeline: {len(series)} series")
+            stats = run_pipeline(
                 sb,
-                missing,
-                series_name=series_display_name,
-                fenrir_base_url=FENRI_URL,
-                group_name=GROUP_NAME,
+                series,
+                concurrency=args.concurrency,
+                forms=not args.no_forms,
+                out=out,
             )
+            print_report(stats)
+    finally:
+        if out:
+            out.close()
 
 
 if __name__ == "__main__":
-
     main()
@@ -3,6 +3,9 @@ const API_BASE = '/api';
 
 // State
 let novels = [];
+const novelsById = new Map();
+let _novelsCursor = null;   // server "cursor" (max updated_at) for ?since= deltas
+let _novelsEtag = null;
 let refreshIntervals = {};
 window.currentMissingChapters = null;
 
@@ -56,11 +59,54 @@ document.addEventListener('DOMContentLoaded', () => {
    NOVELS
 ========================= */
 
-// Load novels from API — fetch all including missing so we can show both sections
+// Load novels from API — fetch all including missing so we can show both sections.
+// After the first load only rows changed since the last cursor are fetched, and an
+// unchanged library answers 304 via If-None-Match.
 async function loadNovels() {
     try {
-        const response = await fetch(`${API_BASE}/novels?all=1`);
-        novels = await response.json();
+        const changed = [];
+        let page = 1;
+        let pages = 1;
+        let ids = null;
+        let cursor = null;
+        let etag = null;
+
+        do {
+            const params = new URLSearchParams({ status: 'all', per_page: '500', page: String(page) });
+            if (_novelsCursor) params.set('since', _novelsCursor);
+            const headers = (page === 1 && _novelsEtag) ? { 'If-None-Match': _novelsEtag } : {};
+            const response = await fetch(`${API_BASE}/novels?${params}`, { cache: 'no-store', headers });
+            if (response.status === 304) return;
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+
+            const data = await response.json();
+            if (page === 1) {
+                etag = response.headers.get('ETag');
+                cursor = data.cursor;
+                if (Array.isArray(data.ids)) ids = data.ids;
+            }
+            changed.push(...data.items);
+            pages = data.pages || 1;
+            page++;
+        } while (page <= pages);
+
+        if (ids) {
+            const keep = new Set(ids);
+            for (const id of novelsById.keys()) {
+                if (!keep.has(id)) _forgetNovel(id);
+            }
+        } else if (!_novelsCursor) {
+            for (const id of Array.from(novelsById.keys())) _forgetNovel(id);
+        }
+        for (const n of changed) {
+            novelsById.set(n.id, n);
+            _nameIndex.set(n.id, String(n.name || '').toLowerCase());
+        }
+
+        _novelsCursor = cursor;
+        _novelsEtag = etag;
+        novels = Array.from(novelsById.values())
+            .sort((a, b) => (a.name > b.name) - (a.name < b.name));
         renderNovels();
     } catch (error) {
         showToast('Error loading novels: ' + error.message, 'error');
@@ -105,41 +151,167 @@ function _novelCard(novel, isMissing) {
     </div>`;
 }
 
+function _forgetNovel(id) {
+    novelsById.delete(id);
+    _nameIndex.delete(id);
+    _cardCache.delete(id);
+}
+
+/* =========================
+   VIRTUAL LIST
+========================= */
+
+// Only the cards near the viewport are in the DOM; spacer divs stand in for the
+// rest. Cards are keyed by novel id and reused, so a card is rebuilt only when
+// its novel object changed (loadNovels replaces just the changed rows).
+const VLIST_OVERSCAN = 8;
+const _cardCache = new Map();   // id -> { novel, isMissing, el }
+const _nameIndex = new Map();   // id -> lowercase name, precomputed for search
+let _listSkeleton = null;
+
+function _cardElement(novel, isMissing) {
+    const cached = _cardCache.get(novel.id);
+    if (cached && cached.novel === novel && cached.isMissing === isMissing) return cached.el;
+
+    const tpl = document.createElement('template');
+    tpl.innerHTML = _novelCard(novel, isMissing).trim();
+    const el = tpl.content.firstElementChild;
+    _cardCache.set(novel.id, { novel, isMissing, el });
+    return el;
+}
+
+// Find an element inside a card even when the card is scrolled out of the DOM.
+function _cardPart(prefix, id) {
+    return document.getElementById(`${prefix}-${id}`)
+        || _cardCache.get(id)?.el.querySelector(`#${prefix}-${id}`)
+        || null;
+}
+
+class VirtualList {
+    constructor(root, isMissing) {
+        this.root = root;
+        this.isMissing = isMissing;
+        this.rows = [];
+        this.rowHeight = 64;
+        this.top = document.createElement('div');
+        this.items = document.createElement('div');
+        this.bottom = document.createElement('div');
+        root.append(this.top, this.items, this.bottom);
+    }
+
+    setRows(rows) {
+        this.rows = rows;
+        this.update();
+    }
+
+    update(remeasure = true) {
+        const n = this.rows.length;
+        let start = 0;
+        let end = 0;
+
+        // Hidden (collapsed missing section): keep nothing mounted.
+        if (n && this.root.offsetParent !== null) {
+            const h = this.rowHeight;
+            const first = Math.floor(Math.max(0, -this.root.getBoundingClientRect().top) / h);
+            const visible = Math.ceil(window.innerHeight / h);
+            start = Math.min(n, Math.max(0, first - VLIST_OVERSCAN));
+            end = Math.min(n, first + visible + VLIST_OVERSCAN);
+        }
+
+        const nodes = this.rows.slice(start, end).map(row => _cardElement(row, this.isMissing));
+        let cur = this.items.firstChild;
+        for (const node of nodes) {
+            if (node !== cur) this.items.insertBefore(node, cur);
+            else cur = cur.nextSibling;
+        }
+        while (cur) {
+            const next = cur.nextSibling;
+            this.items.removeChild(cur);
+            cur = next;
+        }
+
+        this.top.style.height = `${start * this.rowHeight}px`;
+        this.bottom.style.height = `${(n - end) * this.rowHeight}px`;
+
+        // Cards are near-uniform; correct the estimate from what is mounted.
+        if (remeasure && end > start) {
+            const measured = this.items.offsetHeight / (end - start);
+            if (measured > 0 && Math.abs(measured - this.rowHeight) > 1) {
+                this.rowHeight = measured;
+                this.update(false);
+            }
+        }
+    }
+}
+
+let _vlistFrame = 0;
+function _scheduleVirtualUpdate() {
+    if (_vlistFrame || !_listSkeleton) return;
+    _vlistFrame = requestAnimationFrame(() => {
+        _vlistFrame = 0;
+        if (!_listSkeleton) return;
+        _listSkeleton.active.update();
+        _listSkeleton.missing.update();
+    });
+}
+window.addEventListener('scroll', _scheduleVirtualUpdate, { passive: true });
+window.addEventListener('resize', _scheduleVirtualUpdate);
+
+function _ensureListSkeleton(listEl) {
+    if (_listSkeleton && listEl.contains(_listSkeleton.activeRoot)) return _listSkeleton;
+
+    listEl.innerHTML = `
+        <div class="vlist"></div>
+        <div class="loading" style="display:none;">No active novels.</div>
+        <div class="missing-section">
+            <button class="missing-toggle" onclick="toggleMissingSection(this)"></button>
+            <div class="missing-list"><div class="vlist"></div></div>
+        </div>`;
+
+    const roots = listEl.querySelectorAll('.vlist');
+    _listSkeleton = {
+        activeRoot: roots[0],
+        activeEmpty: listEl.querySelector(':scope > .loading'),
+        missingSection: listEl.querySelector('.missing-section'),
+        missingToggle: listEl.querySelector('.missing-toggle'),
+        active: new VirtualList(roots[0], false),
+        missing: new VirtualList(roots[1], true),
+    };
+    return _listSkeleton;
+}
+
+function toggleMissingSection(btn) {
+    btn.parentElement.classList.toggle('open');
+    _scheduleVirtualUpdate();
+}
+
 // Render novels list — active novels then a collapsible missing section
 function renderNovels() {
     const listEl = document.getElementById('novelsList');
     const q = (document.getElementById('novelSearch')?.value || '').toLowerCase().trim();
 
-    const match  = n => !q || n.name.toLowerCase().includes(q);
+    const match  = n => !q || (_nameIndex.get(n.id) ?? String(n.name || '').toLowerCase()).includes(q);
     const active  = novels.filter(n => (n.status || 'active') === 'active' && match(n));
     const missing = novels.filter(n => n.status === 'missing' && match(n));
 
-    let html = '';
-
     if (active.length === 0 && missing.length === 0) {
         listEl.innerHTML = '<div class="loading">No novels tracked yet.</div>';
+        _listSkeleton = null;
         return;
     }
 
-    if (active.length > 0) {
-        html += active.map(n => _novelCard(n, false)).join('');
-    } else {
-        html += '<div class="loading">No active novels.</div>';
-    }
-
-    if (missing.length > 0) {
-        html += `
-        <div class="missing-section">
-            <button class="missing-toggle" onclick="this.parentElement.classList.toggle('open')">
-                Missing / DMCA'd (${missing.length}) ▸
-            </button>
-            <div class="missing-list">
-                ${missing.map(n => _novelCard(n, true)).join('')}
-            </div>
-        </div>`;
-    }
+    const sk = _ensureListSkeleton(listEl);
+    sk.activeEmpty.style.display = active.length ? 'none' : '';
+    sk.missingSection.style.display = missing.length ? '' : 'none';
+    sk.missingToggle.textContent = `Missing / DMCA'd (${missing.length}) ▸`;
+    sk.active.setRows(active);
+    sk.missing.setRows(missing);
+}
 
-    listEl.innerHTML = html;
+let _searchTimer = 0;
+function onNovelSearchInput() {
+    clearTimeout(_searchTimer);
+    _searchTimer = setTimeout(renderNovels, 150);
 }
 
 /* =========================
@@ -262,10 +434,10 @@ async function markMissing(id) {
 // Returns a Promise that resolves when the refresh task finishes (or rejects on error).
 function _refreshNovelAndWait(id) {
     return new Promise(async (resolve, reject) => {
-        const btn  = document.getElementById(`refresh-${id}`);
-        const prog = document.getElementById(`progress-${id}`);
-        const fill = document.getElementById(`progress-fill-${id}`);
-        const text = document.getElementById(`progress-text-${id}`);
+        const btn  = _cardPart('refresh', id);
+        const prog = _cardPart('progress', id);
+        const fill = _cardPart('progress-fill', id);
+        const text = _cardPart('progress-text', id);
 
         if (btn)  { btn.disabled = true; btn.textContent = 'refreshing…'; }
         if (prog) prog.style.display = 'block';
@@ -371,17 +543,30 @@ function stopRefreshAll() {
    VIEW MISSING
 ========================= */
 
+// Missing chapters come from the server already filtered (?from=) and collapsed
+// into runs ("c101-c245"), so the modal renders one row per range.
+const MISSING_PAGE_RANGES = 200;
+
 async function viewMissing(novelId) {
     const listDiv = document.getElementById('missingChaptersList');
     const actionsDiv = document.getElementById('missingChaptersActions');
     openMissingModal();
     listDiv.textContent = 'Loading...';
     actionsDiv.innerHTML = '';
-    
+
+    const fetchRanges = async (from, cursor) => {
+        const params = new URLSearchParams({ format: 'ranges', limit: String(MISSING_PAGE_RANGES) });
+        if (from) params.set('from', from);
+        if (cursor) params.set('cursor', cursor);
+        const res = await fetch(`/api/novels/${novelId}/missing?${params}`);
+        const data = await res.json();
+        if (!res.ok) throw new Error(data.error || res.status);
+        return data;
+    };
+
     let data;
     try {
-        const res = await fetch(`/api/novels/${novelId}/missing`);
-        data = await res.json();
+        data = await fetchRanges('', null);
     } catch (err) {
         listDiv.textContent = '';
         showToast('Error loading missing chapters: ' + err.message, 'error');
@@ -390,131 +575,142 @@ async function viewMissing(novelId) {
 
     if (data.count === 0) {
         listDiv.innerHTML = "Synced!";
-    } else {
-        const missing = Array.isArray(data.missing) ? data.missing.slice() : [];
-        missing.sort((a, b) => {
-            const av = Number(a.vol || 0);
-            const bv = Number(b.vol || 0);
-            if (av !== bv) return av - bv;
-            return Number(a.ch) - Number(b.ch);
-        });
-
-        const parseStart = (raw) => {
-            const s = String(raw || '').trim().toLowerCase().replace(/\s+/g, '');
-            if (!s) return null;
-            let m = s.match(/^v(\d+)c(\d+)$/i);
-            if (m) return { vol: Number(m[1]), ch: Number(m[2]) };
-            m = s.match(/^c(\d+)$/i);
-            if (m) return { vol: 0, ch: Number(m[1]) };
-            return null;
-        };
+        return;
+    }
 
-        const isAtOrAfter = (item, start) => {
-            if (!start) return true;
-            const v = Number(item.vol || 0);
-            const c = Number(item.ch);
-            if (v > Number(start.vol || 0)) return true;
-            if (v < Number(start.vol || 0)) return false;
-            return c >= Number(start.ch);
-        };
+    let ranges = data.ranges || [];
+    let nextCursor = data.next_cursor;
+    let matched = data.matched;
+    let startVal = '';
 
-        let filteredMissing = missing.slice();
-
-        const render = () => {
-            const startVal = document.getElementById(`startFrom-${novelId}`)?.value || '';
-            const startParsed = parseStart(startVal);
-            filteredMissing = missing.filter(m => isAtOrAfter(m, startParsed));
-
-            const summary = `<div style="margin-bottom:12px;color:var(--text-muted);">Missing: <strong>${data.count}</strong></div>`;
-            const controls = `
-                <div style="display:flex;gap:10px;align-items:center;margin-bottom:10px;">
-                    <label style="color:var(--text-muted);">Start from</label>
-                    <input id="startFrom-${novelId}" value="${escapeHtml(String(startVal))}" placeholder="v2c78 or c32" style="flex:1;" />
-                </div>
-            `;
-
-            const items = filteredMissing.map((m, idx) => {
-                const vol = Number(m.vol || 0);
-                const ch = Number(m.ch);
-                const label = vol > 0 ? `V${vol} C${ch}` : `C${ch}`;
-                const id = `miss-${novelId}-${idx}`;
-                return `
-                    <label class="chapter-item" for="${id}" style="display:flex;align-items:center;gap:10px;">
-                        <input type="checkbox" id="${id}" class="missing-chk" data-idx="${idx}" checked />
-                        <span class="chapter-name">${label}</span>
-                    </label>
-                `;
-            }).join('');
-            listDiv.innerHTML = `${summary}${controls}<div class="chapters-list">${items}</div>`;
-
-            const startEl = document.getElementById(`startFrom-${novelId}`);
-            if (startEl) {
-                startEl.addEventListener('input', () => {
-                    render();
-                });
+    listDiv.innerHTML = `
+        <div style="margin-bottom:12px;color:var(--text-muted);">Missing: <strong>${data.count}</strong> <span id="missingMatched-${novelId}"></span></div>
+        <div style="display:flex;gap:10px;align-items:center;margin-bottom:10px;">
+            <label style="color:var(--text-muted);">Start from</label>
+            <input id="startFrom-${novelId}" placeholder="v2c78 or c32" style="flex:1;" />
+        </div>
+        <div class="chapters-list" id="missingRanges-${novelId}"></div>
+        <button class="btn btn-secondary" id="missingMore-${novelId}" style="display:none;margin-top:10px;">load more</button>`;
+
+    const rangesEl = document.getElementById(`missingRanges-${novelId}`);
+    const moreBtn = document.getElementById(`missingMore-${novelId}`);
+    const matchedEl = document.getElementById(`missingMatched-${novelId}`);
+
+    const rangeRow = (r, idx) => {
+        const id = `miss-${novelId}-${idx}`;
+        const label = escapeHtml(r.label.toUpperCase().replace('-', ' – '));
+        return `
+            <label class="chapter-item" for="${id}" style="display:flex;align-items:center;gap:10px;">
+                <input type="checkbox" id="${id}" class="missing-chk" data-idx="${idx}" checked />
+                <span class="chapter-name">${label}</span>
+                <span style="color:var(--text-muted);margin-left:auto;">${r.count > 1 ? r.count : ''}</span>
+            </label>`;
+    };
+
+    const getSelected = () => Array.from(rangesEl.querySelectorAll('.missing-chk'))
+        .filter(c => c.checked)
+        .map(c => ranges[Number(c.dataset.idx)])
+        .filter(Boolean);
+
+    const updateSubmitLabel = () => {
+        const total = getSelected().reduce((sum, r) => sum + r.count, 0);
+        submitBtn.innerText = `Submit Selected (${total})`;
+        submitBtn.disabled = total === 0;
+    };
+
+    const render = (append = 0) => {
+        if (append) {
+            rangesEl.insertAdjacentHTML('beforeend', ranges.slice(append).map((r, i) => rangeRow(r, append + i)).join(''));
+        } else {
+            rangesEl.innerHTML = ranges.map(rangeRow).join('');
+        }
+        matchedEl.textContent = startVal ? `· from ${startVal}: ${matched}` : '';
+        moreBtn.style.display = nextCursor ? '' : 'none';
+        updateSubmitLabel();
+    };
+
+    rangesEl.addEventListener('change', updateSubmitLabel);
+
+    let startTimer = 0;
+    document.getElementById(`startFrom-${novelId}`).addEventListener('input', (e) => {
+        clearTimeout(startTimer);
+        startTimer = setTimeout(async () => {
+            const value = e.target.value.trim();
+            try {
+                const d = await fetchRanges(value, null);
+                startVal = value;
+                ranges = d.ranges || [];
+                nextCursor = d.next_cursor;
+                matched = d.matched;
+                render();
+            } catch (err) {
+                // Incomplete bound while typing (e.g. "v2") — keep the current list.
             }
+        }, 250);
+    });
 
-            document.querySelectorAll('#missingChaptersList .missing-chk').forEach(c => {
-                c.addEventListener('change', updateSubmitLabel);
-            });
-
-            updateSubmitLabel();
-        };
-
-        const getSelected = () => {
-            const checks = Array.from(document.querySelectorAll('#missingChaptersList .missing-chk'));
-            const selectedIdx = checks
-                .filter(c => c.checked)
-                .map(c => Number(c.dataset.idx))
-                .filter(n => Number.isFinite(n));
-            return selectedIdx.map(i => filteredMissing[i]).filter(Boolean);
-        };
-
-        const updateSubmitLabel = () => {
-            const selected = getSelected();
-            submitBtn.innerText = `Submit Selected (${selected.length})`;
-            submitBtn.disabled = selected.length === 0;
-        };
-
-        const selectAllBtn = document.createElement('button');
-        selectAllBtn.className = 'btn btn-secondary';
-        selectAllBtn.innerText = 'Select All';
-
-        const selectNoneBtn = document.createElement('button');
-        selectNoneBtn.className = 'btn btn-secondary';
-        selectNoneBtn.innerText = 'Select None';
-
-        const submitBtn = document.createElement('button');
-        submitBtn.className = 'btn btn-primary';
-
-        selectAllBtn.onclick = () => {
-            document.querySelectorAll('#missingChaptersList .missing-chk').forEach(c => { c.checked = true; });
-            updateSubmitLabel();
-        };
-
-        selectNoneBtn.onclick = () => {
-            document.querySelectorAll('#missingChaptersList .missing-chk').forEach(c => { c.checked = false; });
-            updateSubmitLabel();
-        };
-
-        submitBtn.onclick = async () => {
-            const selected = getSelected();
-            if (selected.length === 0) return;
-            await fetch(`/api/novels/${novelId}/submit`, {
+    moreBtn.onclick = async () => {
+        try {
+            const d = await fetchRanges(startVal, nextCursor);
+            const before = ranges.length;
+            ranges = ranges.concat(d.ranges || []);
+            nextCursor = d.next_cursor;
+            render(before);
+        } catch (err) {
+            showToast(err.message, 'error');
+        }
+    };
+
+    const selectAllBtn = document.createElement('button');
+    selectAllBtn.className = 'btn btn-secondary';
+    selectAllBtn.innerText = 'Select All';
+
+    const selectNoneBtn = document.createElement('button');
+    selectNoneBtn.className = 'btn btn-secondary';
+    selectNoneBtn.innerText = 'Select None';
+
+    const submitBtn = document.createElement('button');
+    submitBtn.className = 'btn btn-primary';
+
+    selectAllBtn.onclick = () => {
+        rangesEl.querySelectorAll('.missing-chk').forEach(c => { c.checked = true; });
+        updateSubmitLabel();
+    };
+
+    selectNoneBtn.onclick = () => {
+        rangesEl.querySelectorAll('.missing-chk').forEach(c => { c.checked = false; });
+        updateSubmitLabel();
+    };
+
+    submitBtn.onclick = async () => {
+        const selected = getSelected();
+        if (selected.length === 0) return;
+        // Everything selected and nothing left to page in: let the server expand it.
+        const everything = !nextCursor && selected.length === ranges.length;
+        const payload = everything
+            ? (startVal ? { from: startVal } : { all: true })
+            : { ranges: selected.map(r => ({ vol: r.vol, from: r.from, to: r.to })) };
+        try {
+            const res = await fetch(`/api/novels/${novelId}/submit`, {
                 method: 'POST',
                 headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({chapters: selected})
+                body: JSON.stringify(payload)
             });
-            alert("Submitted!");
+            const result = await res.json();
+            if (!res.ok) throw new Error(result.error || res.status);
+            const dupes = result.already_queued ? ` (${result.already_queued} already queued)` : '';
+            alert(`Submitted! ${result.queued} queued${dupes}.`);
             closeMissingModal();
-        };
+        } catch (err) {
+            showToast('Submit failed: ' + err.message, 'error');
+        }
+    };
 
-        actionsDiv.appendChild(selectAllBtn);
-        actionsDiv.appendChild(selectNoneBtn);
-        actionsDiv.appendChild(submitBtn);
+    actionsDiv.appendChild(selectAllBtn);
+    actionsDiv.appendChild(selectNoneBtn);
+    actionsDiv.appendChild(submitBtn);
 
-        render();
-    }
+    render();
 }
 /* =========================
    SYNC FROM FENRIR REALM
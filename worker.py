@@ -0,0 +1,290 @@
+"""
+Crawl worker processes.
+
+With JOB_MODE=worker the web process only enqueues refresh/sync jobs into the
+shared SQLite job table and reads their progress back; the crawling happens
+here, in N separate processes that each own a headless crawl browser. A Chrome
+hang or a heavy sync then never stalls the UI, and crawls spread across cores.
+
+Usage:
+    JOB_MODE=worker python app.py
+    python worker.py --processes 3
+
+Process 0 also drains the NU submission queue (headed browser) unless
+--no-submissions is given.
+
+Node mode scales refreshes out across machines sharing the database: each
+process registers as a node, leases batches of due novels, refreshes them with
+its own browser and heartbeats to keep its leases. Leases of nodes that stop
+heartbeating are reclaimed by the others.
+
+    python worker.py node --processes 4 --batch 5 --min-age 3600
+    python worker.py node --shard 0/2      # on machine A
+    python worker.py node --shard 1/2      # on machine B
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+logger = logging.getLogger("worker")
+
+POLL_SECONDS = 1.0
+# Close an idle worker's browser after this long without jobs.
+IDLE_CLOSE_SECONDS = 60
+# How often each worker sweeps for jobs whose worker died.
+STALE_SWEEP_SECONDS = 60
+# Node heartbeat; must stay well under NODE_DEAD_SECONDS and LEASE_TTL_SECONDS.
+HEARTBEAT_SECONDS = 20
+
+
+def run_worker(index, kinds=None, submissions=False, poll=POLL_SECONDS):
+    """Claim and run jobs forever in this process."""
+    import app
+
+    # Each process gets its own Chrome profile dir: two Chromes cannot share one.
+    app.crawl_browser = app.BrowserManager(name=f"crawl-{index}", profile="crawl")
+    app.BROWSERS = (app.browser, app.crawl_browser)
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    logger.info(
+        "👷 Worker %s started (kinds=%s)",
+        worker_id,
+        ",".join(kinds) if kinds else "all",
+    )
+
+    if submissions:
+        threading.Thread(target=app.submission_worker, daemon=True).start()
+
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    last_job = time.monotonic()
+    last_sweep = 0.0
+    while not stop.is_set():
+        now = time.monotonic()
+        if now - last_sweep > STALE_SWEEP_SECONDS:
+            last_sweep = now
+            requeued = app.requeue_stale_jobs()
+            if requeued:
+                logger.warning("♻️ Requeued %d stale jobs", requeued)
+
+        job = app.claim_next_job(worker_id, kinds)
+        if not job:
+            if app.crawl_browser.sb and now - last_job > IDLE_CLOSE_SECONDS:
+                app.crawl_browser.close()
+            stop.wait(poll)
+            continue
+
+        logger.info(
+            "👷 %s running job %s (%s, novel %s)",
+            worker_id,
+            job.id,
+            job.kind,
+            job.novel_id,
+        )
+        # Keep the browser between jobs; it is closed once the queue goes idle.
+        app.run_claimed_job(job, close_browser=False)
+        last_job = time.monotonic()
+
+    app.crawl_browser.close()
+
+
+def run_node(
+    index, batch=5, min_age=3600, shard_spec=None, poll=5.0, exit_when_idle=False
+):
+    """Lease due novels and refresh them until stopped."""
+    import app
+
+    app.crawl_browser = app.BrowserManager(name=f"crawl-{index}", profile="crawl")
+    app.BROWSERS = (app.browser, app.crawl_browser)
+
+    node_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    shard = app.parse_shard(shard_spec)
+    stats = {"refreshed": 0, "failed": 0}
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    def heartbeat():
+        while not stop.wait(HEARTBEAT_SECONDS):
+            try:
+                app.node_heartbeat(node_id, shard_spec, **stats)
+                dead, freed = app.reclaim_dead_leases()
+                if dead:
+                    logger.warning(
+                        "♻️ Nodes %s look dead; freed %d leases", ", ".join(dead), freed
+                    )
+            except Exception as e:
+                logger.warning("⚠️ Heartbeat failed: %s", e)
+
+    app.node_heartbeat(node_id, shard_spec)
+    app.reclaim_dead_leases()
+    threading.Thread(target=heartbeat, daemon=True).start()
+    logger.info(
+        "🛰️ Node %s started (batch=%d, shard=%s)", node_id, batch, shard_spec or "none"
+    )
+
+    last_work = time.monotonic()
+    try:
+        while not stop.is_set():
+            ids = app.lease_novels(node_id, batch, min_age_seconds=min_age, shard=shard)
+            if not ids:
+                if exit_when_idle:
+                    break
+                if (
+                    app.crawl_browser.sb
+                    and time.monotonic() - last_work > IDLE_CLOSE_SECONDS
+                ):
+                    app.crawl_browser.close()
+                stop.wait(poll)
+                continue
+
+            for novel_id in ids:
+                if stop.is_set():
+                    app.release_lease(novel_id, node_id)
+                    continue
+                try:
+                    app.run_refresh_job(
+                        novel_id, mode=app.REFRESH_MODE, close_browser=False
+                    )
+                    stats["refreshed"] += 1
+                    app.release_lease(novel_id, node_id)
+                except Exception as e:
+                    logger.warning(
+                        "❌ Node %s: refresh of %s failed: %s", node_id, novel_id, e
+                    )
+                    stats["failed"] += 1
+                    app.release_lease(
+                        novel_id,
+                        node_id,
+                        backoff_seconds=app.LEASE_FAIL_BACKOFF_SECONDS,
+                    )
+            last_work = time.monotonic()
+    finally:
+        stop.set()
+        app.node_heartbeat(node_id, shard_spec, status="stopped", **stats)
+        app.crawl_browser.close()
+        logger.info(
+            "🛰️ Node %s stopped: %d refreshed, %d failed",
+            node_id,
+            stats["refreshed"],
+            stats["failed"],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run crawl worker processes")
+    parser.add_argument(
+        "mode",
+        nargs="?",
+        choices=("jobs", "node"),
+        default="jobs",
+        help="jobs: run queued refresh/sync jobs; node: lease and refresh due novels",
+    )
+    parser.add_argument(
+        "--processes", "-n", type=int, default=int(os.getenv("WORKER_PROCESSES", "2"))
+    )
+    parser.add_argument(
+        "--kinds",
+        help="Comma-separated job kinds to take (refresh,sync,backfill); default all",
+    )
+    parser.add_argument(
+        "--no-submissions", action="store_true", help="Don't drain the submission queue"
+    )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        default=POLL_SECONDS,
+        help="Seconds between queue polls when idle",
+    )
+    parser.add_argument(
+        "--batch", type=int, default=5, help="node: novels leased per round"
+    )
+    parser.add_argument(
+        "--min-age",
+        type=int,
+        default=3600,
+        help="node: only refresh novels last checked more than this many seconds ago",
+    )
+    parser.add_argument("--shard", help="node: i/n, only take novels with id %% n == i")
+    parser.add_argument(
+        "--exit-when-idle", action="store_true", help="node: exit once nothing is due"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(processName)s %(message)s",
+    )
+    kinds = [k.strip() for k in args.kinds.split(",")] if args.kinds else None
+
+    # Create tables / run migrations once, before the workers race for it.
+    import app  # noqa: F401
+
+    # app installs browser-cleanup signal handlers; the supervisor owns no
+    # browser and should stop (and stop its workers) on SIGINT / SIGTERM.
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    ctx = multiprocessing.get_context("spawn")
+    procs = {}
+
+    if args.mode == "node":
+        app.parse_shard(args.shard)  # fail fast on a bad spec
+
+    def launch(i):
+        if args.mode == "node":
+            target = run_node
+            fn_args = (
+                i,
+                args.batch,
+                args.min_age,
+                args.shard,
+                max(args.poll, 1.0),
+                args.exit_when_idle,
+            )
+        else:
+            target = run_worker
+            fn_args = (i, kinds, i == 0 and not args.no_submissions, args.poll)
+        p = ctx.Process(
+            target=target, args=fn_args, name=f"{args.mode}-{i}", daemon=False
+        )
+        p.start()
+        procs[i] = p
+
+    for i in range(max(1, args.processes)):
+        launch(i)
+    print(f"[*] Started {len(procs)} {args.mode} processes")
+
+    try:
+        while procs:
+            time.sleep(1)
+            for i, p in list(procs.items()):
+                if p.is_alive():
+                    continue
+                if p.exitcode == 0:
+                    del procs[i]
+                    continue
+                logger.warning(
+                    "💥 Worker %d exited (code %s), restarting", i, p.exitcode
+                )
+                launch(i)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for p in procs.values():
+            if p.is_alive():
+                p.terminate()
+        for p in procs.values():
+            p.join(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Production entry point.
+
+Serves the Flask app with waitress (a multi-threaded WSGI server) instead of
+the Flask development server:
+
+    python wsgi.py                        # PORT (5000), WEB_THREADS (8)
+
+Any other WSGI server can import ``wsgi:app``. In the default JOB_MODE=thread
+the app must run in ONE process (scale with threads): refresh/sync tasks, the
+browsers with their profile directories and /metrics are per-process, so a
+second process refuses to start:
+
+    gunicorn -w 1 --threads 8 -b 0.0.0.0:5000 wsgi:app
+
+Several processes need JOB_MODE=worker, where tasks live in the database and
+worker.py runs the browsers and the submission queue (each web process still
+reports its own /metrics):
+
+    JOB_MODE=worker gunicorn -w 4 --threads 4 -b 0.0.0.0:5000 wsgi:app
+    JOB_MODE=worker python worker.py
+
+Don't use gunicorn's --preload, which would take the services lock in the
+master before it forks.
+"""
+
+import os
+
+from app import app, logger, start_background_services
+
+application = app
+start_background_services()
+
+
+def main():
+    from waitress import serve
+
+    host = os.getenv("HOST", "0.0.0.0")
+    port = int(os.getenv("PORT", "5000"))
+    threads = int(os.getenv("WEB_THREADS", "8"))
+    logger.info("🚀 Serving on %s:%d with waitress (%d threads)", host, port, threads)
+    serve(app, host=host, port=port, threads=threads, ident="tracker")
+
+
+if __name__ == "__main__":
+    main()